@@ -1,34 +1,421 @@
 """Main module"""
-from ens_load_forecast.data_preprocessing import (
-    get_merged_dataset,
-    get_load_actual,
-    get_load_forecast,
-    get_weather,
-)
-from ens_load_forecast.features_engineering import extract_features
-from ens_load_forecast.models import train_models_for_each_zone
-
-
-def main() -> None:
-    # Load and preprocess data
-    df_load_actual = get_load_actual()
-    df_load_forecast = get_load_forecast()
-    df_weather = get_weather(
-        force_recompute=False
-    )  # Allow up to 5 minutes the first time
-
-    # Merge data
-    df_merged = get_merged_dataset(
-        df_load_actual=df_load_actual,
-        df_load_forecast=df_load_forecast,
-        df_weather=df_weather,
-    )
-
-    # Extract features
-    df_features = extract_features(df=df_merged)
-
-    # Train and save models
-    train_models_for_each_zone(df_features=df_features, force_retrain=False)
+import argparse
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ens_load_forecast.paths import PATH_DATA, PATH_SAVED_MODELS, get_data_paths
+
+# Commands (running the pipeline up to a node, or predicting)
+PREPROCESS = "preprocess"
+FEATURES = "features"
+TRAIN = "train"
+SCORE = "score"
+PREDICT = "predict"
+UPDATE = "update"
+
+logger = logging.getLogger(__name__)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run a stage of the pipeline (by default preprocessing and training), or predict.
+
+    Modules depending on pandas and scikit-learn are only imported once arguments
+    are parsed, and only by the commands using them, so that `--help` is instant.
+
+    Parameters
+    ----------
+    argv : Optional[List[str]], optional
+        Command line arguments, by default None (read from `sys.argv`)
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m ens_load_forecast",
+        description="Preprocess the data, train and score the models (`train`, the "
+        "default command), predict the load of a delivery date, or update the "
+        "merged dataset with new rows.",
+    )
+    _add_common_arguments(parser=parser)
+    _add_pipeline_arguments(parser=parser)
+    subparsers = parser.add_subparsers(dest="command")
+    for command, help_text in [
+        (PREPROCESS, "Load and merge the source files."),
+        (FEATURES, "Extract the features of every zone."),
+        (TRAIN, "Train and score the models of every zone, and save them."),
+        (SCORE, "Print the scores of the models of every zone."),
+    ]:
+        command_parser = subparsers.add_parser(command, help=help_text)
+        _add_common_arguments(parser=command_parser, suppress=True)
+        _add_pipeline_arguments(parser=command_parser, suppress=True)
+    predict_parser = subparsers.add_parser(
+        PREDICT, help="Predict the load of a delivery date for all zones."
+    )
+    _add_common_arguments(parser=predict_parser, suppress=True)
+    predict_parser.add_argument("--date", required=True, help="e.g. 2024-01-02")
+    predict_parser.add_argument(
+        "--load-forecast",
+        type=Path,
+        default=None,
+        help="NYISO load forecasts (default: <data-dir>/latest_load_forecast.csv).",
+    )
+    predict_parser.add_argument(
+        "--weather",
+        type=Path,
+        default=None,
+        help="Weather forecasts (default: <data-dir>/latest_weather.csv).",
+    )
+    predict_parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="Predictions (default: <data-dir>/predictions/<date>.csv).",
+    )
+    predict_parser.add_argument(
+        "--mmap",
+        action="store_true",
+        help="Memory-map uncompressed models instead of copying them in memory.",
+    )
+    predict_parser.add_argument(
+        "--compiled",
+        action="store_true",
+        help="Compile tree ensembles before predicting (same predictions, faster).",
+    )
+    update_parser = subparsers.add_parser(
+        UPDATE,
+        help="Merge the rows appended to the source files since the last update "
+        "into the incremental merged dataset.",
+    )
+    _add_common_arguments(parser=update_parser, suppress=True)
+    update_parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Rebuild the incremental merged dataset from the whole source files.",
+    )
+    args = parser.parse_args(argv)
+    command = args.command or TRAIN
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+
+    # Imported here, so that `--help` does not import pandas
+    from ens_load_forecast.instrumentation import reset, save_report
+
+    reset(profile_dir=args.profile, deep_memory=args.deep_memory)
+    data_paths = get_data_paths(path_data=args.data_dir)
+    models_dir = args.models_dir
+    if models_dir is None:
+        models_dir = (
+            PATH_SAVED_MODELS
+            if args.data_dir == PATH_DATA
+            else data_paths["saved_models"]
+        )
+
+    if command == PREDICT:
+        from ens_load_forecast.predict import predict_day_ahead
+        from ens_load_forecast.registry import ModelRegistry, get_registry
+
+        predict_day_ahead(
+            delivery_date=args.date,
+            path_load_forecast=args.load_forecast or data_paths["latest_load_forecast"],
+            path_weather=args.weather or data_paths["latest_weather"],
+            path_zones_and_stations=data_paths["zones_and_stations"],
+            output_path=args.output or data_paths["predictions"] / f"{args.date}.csv",
+            registry=(
+                ModelRegistry(path=models_dir, mmap_mode="r")
+                if args.mmap
+                else get_registry(path=models_dir)
+            ),
+            compiled=args.compiled,
+        )
+    elif command == UPDATE:
+        from ens_load_forecast.incremental import update_merged_dataset
+        from ens_load_forecast.instrumentation import OUTPUT, stage
+
+        with stage(name=UPDATE) as record:
+            record[OUTPUT] = update_merged_dataset(
+                force_rebuild=args.rebuild,
+                paths=data_paths,
+                path=data_paths["incremental"],
+            )
+    else:
+        _run_pipeline_command(
+            parser=parser,
+            args=args,
+            command=command,
+            data_paths=data_paths,
+            models_dir=models_dir,
+        )
+
+    if args.report is not None:
+        save_report(path=args.report)
+
+
+def _run_pipeline_command(
+    parser: argparse.ArgumentParser,
+    args: argparse.Namespace,
+    command: str,
+    data_paths: Dict[str, Path],
+    models_dir: Path,
+) -> None:
+    """Run the pipeline up to the node of a command.
+
+    Nodes whose inputs, parameters and code did not change are loaded from their
+    artifacts. Tuned hyperparameters (see `tuning`) are used, and source files are
+    loaded concurrently.
+
+    Parameters
+    ----------
+    parser : argparse.ArgumentParser
+        Parser of the arguments, to report invalid ones.
+    args : argparse.Namespace
+        Parsed arguments.
+    command : str
+        `preprocess`, `features`, `train` or `score`.
+    data_paths : Dict[str, Path]
+        Files and folders of the data folder (see `get_data_paths`).
+    models_dir : Path
+        Folder of saved models.
+    """
+    from ens_load_forecast import pipeline
+
+    unknown_nodes = set(args.force) - set(pipeline.NODES)
+    if len(unknown_nodes) != 0:
+        parser.error(
+            f"unknown nodes {sorted(unknown_nodes)} for --force, expected "
+            f"{list(pipeline.NODES)}"
+        )
+    targets = {
+        PREPROCESS: [pipeline.MERGED],
+        FEATURES: [pipeline.FEATURES],
+        TRAIN: [pipeline.TRAIN, pipeline.SCORE],
+        SCORE: [pipeline.SCORE],
+    }[command]
+    force = set(args.force)
+    if args.recompute:
+        force.update(pipeline.get_upstream_nodes(targets=targets))
+    if args.retrain:
+        force.update([pipeline.TRAIN, pipeline.SCORE])
+
+    zone_params = None
+    if command in [TRAIN, SCORE]:
+        from ens_load_forecast.models import load_hyperparameters
+
+        zone_params = load_hyperparameters(path=models_dir)
+    outputs = pipeline.run_pipeline(
+        targets=targets,
+        params=pipeline.get_node_params(
+            paths=data_paths,
+            zone_params=zone_params,
+            n_jobs=args.n_jobs,
+            streaming_linear=args.streaming_linear,
+        ),
+        force=force,
+        path=data_paths["artifacts"],
+        source_jobs=args.source_jobs,
+    )
+    if command == TRAIN:
+        _export_models(
+            args=args,
+            models=outputs[pipeline.TRAIN],
+            scores=outputs[pipeline.SCORE],
+            models_dir=models_dir,
+        )
+    elif command == SCORE:
+        print(json.dumps(outputs[pipeline.SCORE], indent=4))
+    pipeline.evict_artifacts(
+        max_bytes=args.max_artifacts_bytes,
+        max_age_days=args.max_age_days,
+        path=data_paths["artifacts"],
+    )
+
+
+def _export_models(
+    args: argparse.Namespace,
+    models: Dict[str, Any],
+    scores: Dict[str, Any],
+    models_dir: Path,
+) -> None:
+    """Save the trained models, unless the models folder already holds them.
+
+    Models are exported when the `train` or `score` node was computed by this run,
+    or when the models folder is missing or was exported from other artifacts or
+    with other options (written in its `export.json`).
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        Parsed arguments.
+    models : Dict[str, Any]
+        Output of the `train` node.
+    scores : Dict[str, Any]
+        Output of the `score` node.
+    models_dir : Path
+        Folder of saved models.
+    """
+    from ens_load_forecast import constants as cst
+    from ens_load_forecast import pipeline
+    from ens_load_forecast.instrumentation import get_report
+    from ens_load_forecast.models import save_models
+
+    records = {
+        record["stage"]: record
+        for record in get_report()["stages"]
+        if record["stage"] in [pipeline.TRAIN, pipeline.SCORE]
+    }
+    export = {
+        **{name: record["key"] for name, record in records.items()},
+        "compress": args.compress,
+        "compress_method": args.compress_method,
+        "compiled": args.compiled,
+    }
+    previous_export = None
+    if (Path(models_dir) / cst.EXPORT_FILE).exists():
+        with open(Path(models_dir) / cst.EXPORT_FILE, encoding="utf-8") as file:
+            previous_export = json.load(file)
+    if (
+        all(record["cached"] for record in records.values())
+        and previous_export == export
+        and all((Path(models_dir) / zone).exists() for zone in models)
+    ):
+        logger.info("Models of %s are up to date, not exported", models_dir)
+        return
+    save_models(
+        models=models,
+        scores=scores,
+        path=models_dir,
+        compress=args.compress,
+        compress_method=args.compress_method,
+        compiled=args.compiled,
+    )
+    with open(Path(models_dir) / cst.EXPORT_FILE, "w", encoding="utf-8") as file:
+        json.dump(export, file, indent=4)
+
+
+def _add_common_arguments(
+    parser: argparse.ArgumentParser, suppress: bool = False
+) -> None:
+    """Add the arguments of every command.
+
+    Parameters
+    ----------
+    parser : argparse.ArgumentParser
+        Parser of the main command or of a sub-command.
+    suppress : bool, optional
+        Do not set defaults, so that a sub-command does not override the value
+        given before it, by default False
+    """
+    parser.add_argument(
+        "--data-dir",
+        type=Path,
+        default=argparse.SUPPRESS if suppress else PATH_DATA,
+        help="Folder of the csv files, artifacts and predictions.",
+    )
+    parser.add_argument(
+        "--models-dir",
+        type=Path,
+        default=argparse.SUPPRESS if suppress else None,
+        help="Folder of saved models (default: <data-dir>/saved_models).",
+    )
+    parser.add_argument(
+        "--report",
+        default=argparse.SUPPRESS if suppress else None,
+        help="Write the run report (json) to this path.",
+    )
+    parser.add_argument(
+        "--profile",
+        default=argparse.SUPPRESS if suppress else None,
+        help="Write a cProfile dump of each stage (.prof) in this folder.",
+    )
+    parser.add_argument(
+        "--deep-memory",
+        action="store_true",
+        default=argparse.SUPPRESS if suppress else False,
+        help="Include strings in the memory of the stage outputs of the report.",
+    )
+
+
+def _add_pipeline_arguments(
+    parser: argparse.ArgumentParser, suppress: bool = False
+) -> None:
+    """Add the arguments of the commands running the pipeline.
+
+    Parameters
+    ----------
+    parser : argparse.ArgumentParser
+        Parser of the main command or of a sub-command.
+    suppress : bool, optional
+        Do not set defaults, so that a sub-command does not override the value
+        given before it, by default False
+    """
+    parser.add_argument(
+        "--recompute",
+        action="store_true",
+        default=argparse.SUPPRESS if suppress else False,
+        help="Recompute every step of the command instead of using artifacts.",
+    )
+    parser.add_argument(
+        "--retrain",
+        action="store_true",
+        default=argparse.SUPPRESS if suppress else False,
+        help="Retrain and score models instead of using artifacts.",
+    )
+    parser.add_argument(
+        "--force",
+        nargs="+",
+        metavar="NODE",
+        default=argparse.SUPPRESS if suppress else [],
+        help="Recompute these pipeline nodes even if their artifact exists "
+        "(load_actual, load_forecast, weather, merged, features, train, score, "
+        "aggregates, feature_statistics).",
+    )
+    parser.add_argument(
+        "--n-jobs",
+        type=int,
+        default=argparse.SUPPRESS if suppress else -1,
+        help="Cores used to train models (-1: all cores).",
+    )
+    parser.add_argument(
+        "--streaming-linear",
+        action="store_true",
+        default=argparse.SUPPRESS if suppress else False,
+        help="Fit the linear and polynomial models from streamed statistics, "
+        "without building the polynomial features.",
+    )
+    parser.add_argument(
+        "--source-jobs",
+        type=int,
+        default=argparse.SUPPRESS if suppress else -1,
+        help="Processes loading the source files concurrently (-1: one per core).",
+    )
+    parser.add_argument(
+        "--max-artifacts-bytes",
+        type=int,
+        default=argparse.SUPPRESS if suppress else None,
+        help="Evict least recently used artifacts beyond this total size.",
+    )
+    parser.add_argument(
+        "--max-age-days",
+        type=float,
+        default=argparse.SUPPRESS if suppress else None,
+        help="Evict artifacts not used for this number of days.",
+    )
+    parser.add_argument(
+        "--compress",
+        type=int,
+        default=argparse.SUPPRESS if suppress else 0,
+        choices=range(10),
+        help="Compression level of saved models (0: uncompressed, memory-mappable).",
+    )
+    parser.add_argument(
+        "--compress-method",
+        default=argparse.SUPPRESS if suppress else "zlib",
+        help="Compression method of saved models.",
+    )
+    parser.add_argument(
+        "--compiled",
+        action="store_true",
+        default=argparse.SUPPRESS if suppress else False,
+        help="Save tree ensembles compiled into flat arrays (same predictions, "
+        "faster).",
+    )
 
 
 if __name__ == "__main__":
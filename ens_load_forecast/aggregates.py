@@ -0,0 +1,174 @@
+"""Module computing the aggregate cube used by analysis plots.
+
+The cube holds, for each (zone, day of year, hour) and each (zone, month):
+- count: number of hours with an actual load (and a load forecast, if errors are
+  computed),
+- load: mean actual load,
+- bias, mae, rmse: error statistics of the NYISO load forecast (forecast - actual),
+  if the data has a `load_forecast` column.
+
+It is computed in a single pass over the data: each row gets a cell code, and the
+sums of each cell are accumulated with `np.bincount`. Days of year are counted on
+a leap year calendar (1 March is always day 61), so that a date falls in the same
+cell every year and 29 February is a cell of its own. Every cell is present, cells
+without data having a count of 0 and missing statistics, so that the seasonal
+cube of a zone can always be reshaped to (366, 24).
+
+`get_aggregates` keeps the cubes of the last DataFrames in memory, the `aggregates`
+node of the pipeline saves it as an artifact.
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+import ens_load_forecast.constants as cst
+
+MAX_CACHED_AGGREGATES = 4
+
+_aggregates: "OrderedDict[str, Dict[str, pd.DataFrame]]" = OrderedDict()
+
+
+def compute_aggregates(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """Compute the seasonal and monthly aggregates of each zone.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Hourly data (e.g. merged dataset or load actual)
+        - index: date
+        - columns: zone, load, and optionally load_forecast
+
+    Returns
+    -------
+    Dict[str, pd.DataFrame]
+        Aggregates, with keys:
+        - seasonal: index (zone, day_of_year, hour), day of year from 1 to 366
+        - monthly: index (zone, month), month from 1 to 12
+        Columns are count, load, and bias, mae and rmse if errors are computed.
+    """
+    zone_codes, zones = pd.factorize(np.asarray(df[cst.ZONE]), sort=True)
+    dates = pd.DatetimeIndex(df.index)
+    load = df[cst.LOAD].to_numpy(dtype=np.float64)
+    valid = ~np.isnan(load) & (zone_codes >= 0)
+    values = {cst.LOAD: load}
+    if cst.LOAD_FORECAST in df.columns:
+        errors = df[cst.LOAD_FORECAST].to_numpy(dtype=np.float64) - load
+        valid &= ~np.isnan(errors)
+        values.update(
+            {cst.BIAS: errors, cst.MAE: np.abs(errors), cst.RMSE: errors**2}
+        )
+
+    # Position in a leap year, so that dates after February keep their cell
+    day_of_year = dates.dayofyear.to_numpy() + (~dates.is_leap_year & (dates.month > 2))
+    shapes = {
+        cst.SEASONAL: (len(zones), cst.DAYS_IN_LEAP_YEAR, 24),
+        cst.MONTHLY: (len(zones), 12),
+    }
+    cells = {
+        cst.SEASONAL: np.ravel_multi_index(
+            (zone_codes[valid], day_of_year[valid] - 1, dates.hour[valid]),
+            dims=shapes[cst.SEASONAL],
+        ),
+        cst.MONTHLY: np.ravel_multi_index(
+            (zone_codes[valid], dates.month[valid] - 1), dims=shapes[cst.MONTHLY]
+        ),
+    }
+    levels = {
+        cst.SEASONAL: [
+            list(zones),
+            np.arange(1, cst.DAYS_IN_LEAP_YEAR + 1),
+            np.arange(24),
+        ],
+        cst.MONTHLY: [list(zones), np.arange(1, 13)],
+    }
+    names = {
+        cst.SEASONAL: [cst.ZONE, cst.DAY_OF_YEAR, cst.HOUR],
+        cst.MONTHLY: [cst.ZONE, cst.MONTH],
+    }
+
+    aggregates = {}
+    for key, shape in shapes.items():
+        n_cells = int(np.prod(shape))
+        counts = np.bincount(cells[key], minlength=n_cells)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = {
+                name: np.bincount(cells[key], weights=array[valid], minlength=n_cells)
+                / counts
+                for name, array in values.items()
+            }
+        if cst.RMSE in means:
+            means[cst.RMSE] = np.sqrt(means[cst.RMSE])
+        aggregates[key] = pd.DataFrame(
+            data={cst.COUNT: counts, **means},
+            index=pd.MultiIndex.from_product(levels[key], names=names[key]),
+        )
+    return aggregates
+
+
+def get_aggregates(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """Get the aggregates of a DataFrame, computed once per DataFrame content.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Hourly data (see `compute_aggregates`).
+
+    Returns
+    -------
+    Dict[str, pd.DataFrame]
+        Aggregates (see `compute_aggregates`).
+    """
+    columns = [
+        column
+        for column in [cst.ZONE, cst.LOAD, cst.LOAD_FORECAST]
+        if column in df.columns
+    ]
+    key = hashlib.sha256(
+        pd.util.hash_pandas_object(df[columns], index=True).to_numpy().tobytes()
+    ).hexdigest()
+    if key in _aggregates:
+        _aggregates.move_to_end(key)
+    else:
+        _aggregates[key] = compute_aggregates(df=df)
+        while len(_aggregates) > MAX_CACHED_AGGREGATES:
+            _aggregates.popitem(last=False)
+    return _aggregates[key]
+
+
+def get_zone_statistics(
+    aggregates: Dict[str, pd.DataFrame], months: Optional[List[int]] = None
+) -> pd.DataFrame:
+    """Get the statistics of each zone, from its monthly aggregates.
+
+    Parameters
+    ----------
+    aggregates : Dict[str, pd.DataFrame]
+        Aggregates (see `compute_aggregates`).
+    months : Optional[List[int]], optional
+        Months to include (1 to 12), by default None (all months)
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per zone, with columns zone, count, load, and bias, mae and rmse if
+        computed.
+    """
+    df = aggregates[cst.MONTHLY]
+    if months is not None:
+        df = df[df.index.get_level_values(cst.MONTH).isin(months)]
+    counts = df[cst.COUNT].groupby(level=cst.ZONE, sort=False).sum()
+    statistics = {cst.COUNT: counts}
+    for column in df.columns.drop(cst.COUNT):
+        # Means of months are weighted by their counts, RMSE through squared errors
+        values = df[column].fillna(0.0)
+        if column == cst.RMSE:
+            values = values**2
+        sums = (values * df[cst.COUNT]).groupby(level=cst.ZONE, sort=False).sum()
+        statistics[column] = sums / counts.replace(0, np.nan)
+        if column == cst.RMSE:
+            statistics[column] = np.sqrt(statistics[column])
+    return pd.DataFrame(data=statistics).rename_axis(index=cst.ZONE).reset_index()
@@ -0,0 +1,372 @@
+"""Module to backtest models with rolling forecast origins.
+
+At each origin (every day, week or month), models are refitted on the data before
+the origin, either all of it (expanding window) or the last days (sliding window),
+and scored on the data until the next origin.
+
+The features of each zone are converted once to NumPy arrays, and folds are
+contiguous slices of these arrays (rows are sorted by date), so that no DataFrame
+is sliced or copied per fold. When folds run in parallel processes, arrays are
+memory-mapped from a temporary file shared by all workers.
+"""
+
+import json
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed, parallel_backend
+from sklearn.metrics import mean_absolute_error, mean_squared_error
+
+import ens_load_forecast.constants as cst
+from ens_load_forecast.models import get_model_inputs, initialize_models
+from ens_load_forecast.paths import PATH_BACKTESTS
+
+EXPANDING = "expanding"
+SLIDING = "sliding"
+REFIT_FREQUENCIES = {"daily": "D", "weekly": "7D", "monthly": "MS"}
+FOLD = "fold"
+
+
+def get_origins(
+    start: pd.Timestamp,
+    end: pd.Timestamp,
+    refit: str = "weekly",
+    min_train_days: int = 90,
+) -> pd.DatetimeIndex:
+    """Get the forecast origins (refit dates) of a backtest.
+
+    Parameters
+    ----------
+    start : pd.Timestamp
+        First date of the data.
+    end : pd.Timestamp
+        Last date of the data.
+    refit : str, optional
+        Refit cadence: `daily`, `weekly` or `monthly`, by default "weekly"
+    min_train_days : int, optional
+        Number of days of data before the first origin, by default 90
+
+    Returns
+    -------
+    pd.DatetimeIndex
+        Origins, at midnight. Each origin is the end of the test period of the
+        previous one.
+    """
+    first_origin = (start + pd.Timedelta(value=min_train_days, unit="days")).normalize()
+    return pd.date_range(start=first_origin, end=end, freq=REFIT_FREQUENCIES[refit])
+
+
+def get_zone_arrays(
+    df_features: pd.DataFrame,
+) -> Dict[str, Dict[str, np.ndarray]]:
+    """Convert the features of each zone to arrays sorted by date.
+
+    Parameters
+    ----------
+    df_features : pd.DataFrame
+        DataFrame containing features for all zones, index is the date.
+
+    Returns
+    -------
+    Dict[str, Dict[str, np.ndarray]]
+        Arrays of each zone, with keys:
+        - X: features (float64, columns ordered as `FEATURES_LIST`)
+        - y: actual load
+        - ts: dates (int64 nanoseconds)
+    """
+    arrays = {}
+    for zone, df_zone in df_features.groupby(by=cst.ZONE, sort=False):
+        order = np.argsort(df_zone.index.asi8, kind="stable")
+        arrays[zone] = {
+            "X": get_model_inputs(df=df_zone).to_numpy()[order],
+            "y": df_zone[cst.LOAD].to_numpy(dtype=np.float64)[order],
+            "ts": df_zone.index.asi8[order],
+        }
+    return arrays
+
+
+def share_arrays(arrays: Any, path: Path) -> Any:
+    """Dump arrays once and memory-map them.
+
+    Memory-mapped arrays are sent to worker processes as a reference to the file,
+    instead of a copy per task.
+
+    Parameters
+    ----------
+    arrays : Any
+        Arrays, or a structure containing arrays (e.g. see `get_zone_arrays`).
+    path : Path
+        Folder where arrays are dumped, which must exist until workers are done.
+
+    Returns
+    -------
+    Any
+        Same structure, with read-only memory-mapped arrays.
+    """
+    file_path = Path(path) / "arrays.joblib"
+    joblib.dump(value=arrays, filename=file_path)
+    return joblib.load(filename=file_path, mmap_mode="r")
+
+
+def get_folds(
+    ts: np.ndarray,
+    origins: pd.DatetimeIndex,
+    refit: str = "weekly",
+    window: str = EXPANDING,
+    window_days: int = 365,
+) -> List[Tuple[int, slice, slice]]:
+    """Get the train and test rows of each fold, for sorted dates.
+
+    Parameters
+    ----------
+    ts : np.ndarray
+        Sorted dates (int64 nanoseconds).
+    origins : pd.DatetimeIndex
+        Forecast origins (see `get_origins`).
+    refit : str, optional
+        Refit cadence: `daily`, `weekly` or `monthly`, by default "weekly"
+    window : str, optional
+        `expanding` (train on all previous data) or `sliding` (train on the last
+        `window_days` days), by default "expanding"
+    window_days : int, optional
+        Length of the sliding window, by default 365
+
+    Returns
+    -------
+    List[Tuple[int, slice, slice]]
+        Folds with a non-empty train and test set, as (fold number, train rows,
+        test rows).
+    """
+    ends = origins + pd.tseries.frequencies.to_offset(REFIT_FREQUENCIES[refit])
+    origin_rows = np.searchsorted(ts, origins.asi8)
+    end_rows = np.searchsorted(ts, ends.asi8)
+    if window == SLIDING:
+        start_rows = np.searchsorted(
+            ts, (origins - pd.Timedelta(value=window_days, unit="days")).asi8
+        )
+    else:
+        start_rows = np.zeros(len(origins), dtype=int)
+
+    return [
+        (fold, slice(start_row, origin_row), slice(origin_row, end_row))
+        for fold, (start_row, origin_row, end_row) in enumerate(
+            zip(start_rows, origin_rows, end_rows)
+        )
+        if origin_row > start_row and end_row > origin_row
+    ]
+
+
+def run_backtest(
+    df_features: pd.DataFrame,
+    refit: str = "weekly",
+    window: str = EXPANDING,
+    window_days: int = 365,
+    min_train_days: int = 90,
+    model_names: Optional[List[str]] = None,
+    n_jobs: int = 1,
+    random_state: int = 0,
+    params: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> pd.DataFrame:
+    """Backtest every model on every zone with rolling forecast origins.
+
+    Parameters
+    ----------
+    df_features : pd.DataFrame
+        DataFrame containing features for all zones
+    refit : str, optional
+        Refit cadence: `daily`, `weekly` or `monthly`, by default "weekly"
+    window : str, optional
+        `expanding` or `sliding`, by default "expanding"
+    window_days : int, optional
+        Length of the sliding window, by default 365
+    min_train_days : int, optional
+        Number of days of data before the first origin, by default 90
+    model_names : Optional[List[str]], optional
+        Models to backtest, by default None (all models)
+    n_jobs : int, optional
+        Number of parallel processes (-1 for all cores), by default 1
+    random_state : int, optional
+        Seed of the randomized models, by default 0
+    params : Optional[Dict[str, Dict[str, Any]]], optional
+        Hyperparameters overriding the default ones (see `initialize_models`), by
+        default None
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per (zone, model, fold), with columns zone, model_name, fold,
+        train_start, test_start, test_end, n_train, n_test, then train and test MAE
+        and RMSE (e.g. `test_rmse`).
+    """
+    if model_names is None:
+        model_names = list(initialize_models())
+    arrays = get_zone_arrays(df_features=df_features)
+    origins = get_origins(
+        start=df_features.index.min(),
+        end=df_features.index.max(),
+        refit=refit,
+        min_train_days=min_train_days,
+    )
+    folds = {
+        zone: get_folds(
+            ts=zone_arrays["ts"],
+            origins=origins,
+            refit=refit,
+            window=window,
+            window_days=window_days,
+        )
+        for zone, zone_arrays in arrays.items()
+    }
+    tasks = [
+        (zone, model_name, fold)
+        for zone in arrays
+        for model_name in model_names
+        for fold in folds[zone]
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if n_jobs != 1:
+            arrays = share_arrays(arrays=arrays, path=Path(tmp_dir))
+        with parallel_backend(backend="loky", inner_max_num_threads=1):
+            metrics = Parallel(n_jobs=n_jobs)(
+                delayed(_run_fold)(
+                    model_name=model_name,
+                    X=arrays[zone]["X"],
+                    y=arrays[zone]["y"],
+                    train_rows=train_rows,
+                    test_rows=test_rows,
+                    random_state=random_state,
+                    params=params,
+                )
+                for zone, model_name, (_, train_rows, test_rows) in tasks
+            )
+        rows = []
+        for (zone, model_name, (fold, train_rows, test_rows)), fold_metrics in zip(
+            tasks, metrics
+        ):
+            ts = arrays[zone]["ts"]
+            rows.append(
+                {
+                    cst.ZONE: zone,
+                    cst.MODEL_NAME: model_name,
+                    FOLD: fold,
+                    "train_start": ts[train_rows.start],
+                    "test_start": origins[fold],
+                    "test_end": ts[test_rows.stop - 1],
+                    "n_train": train_rows.stop - train_rows.start,
+                    "n_test": test_rows.stop - test_rows.start,
+                    **fold_metrics,
+                }
+            )
+    df_folds = pd.DataFrame(rows)
+    for column in ["train_start", "test_end"]:
+        df_folds[column] = pd.to_datetime(df_folds[column], utc=True).dt.tz_convert(
+            origins.tz
+        )
+    return df_folds
+
+
+def _run_fold(
+    model_name: str,
+    X: np.ndarray,  # noqa: N803
+    y: np.ndarray,
+    train_rows: slice,
+    test_rows: slice,
+    random_state: int,
+    params: Optional[Dict[str, Dict[str, Any]]],
+) -> Dict[str, float]:
+    """Fit a model on the train rows and score it on train and test rows.
+
+    Parameters
+    ----------
+    model_name : str
+        Name of the model (see `initialize_models`).
+    X : np.ndarray
+        Features of the zone.
+    y : np.ndarray
+        Actual load of the zone.
+    train_rows : slice
+        Train rows.
+    test_rows : slice
+        Test rows.
+    random_state : int
+        Seed of the randomized models.
+    params : Optional[Dict[str, Dict[str, Any]]]
+        Hyperparameters overriding the default ones (see `initialize_models`).
+
+    Returns
+    -------
+    Dict[str, float]
+        Train and test MAE and RMSE.
+    """
+    model = initialize_models(random_state=random_state, params=params)[model_name]
+    model.fit(X[train_rows], y[train_rows])
+    metrics = {}
+    for kind, rows in zip([cst.TRAIN, cst.TEST], [train_rows, test_rows]):
+        y_pred = model.predict(X[rows])
+        metrics[f"{kind}_{cst.MAE}"] = mean_absolute_error(
+            y_true=y[rows], y_pred=y_pred
+        )
+        metrics[f"{kind}_{cst.RMSE}"] = mean_squared_error(
+            y_true=y[rows], y_pred=y_pred, squared=False
+        )
+    return metrics
+
+
+def get_backtest_scores(df_folds: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """Pool the metrics of all folds, in the format of `scores.json`.
+
+    MAE are averaged and MSE are averaged before the square root, weighting each
+    fold by its number of rows, as if errors of all folds were scored at once.
+
+    Parameters
+    ----------
+    df_folds : pd.DataFrame
+        Metrics of each fold (see `run_backtest`).
+
+    Returns
+    -------
+    Dict[str, Dict[str, Any]]
+        Scores, per zone then model name then train/test.
+    """
+    scores: Dict[str, Dict[str, Any]] = {}
+    for (zone, model_name), df in df_folds.groupby(
+        by=[cst.ZONE, cst.MODEL_NAME], sort=False
+    ):
+        model_scores = {}
+        for kind in [cst.TRAIN, cst.TEST]:
+            weights = df[f"n_{kind}"].to_numpy()
+            model_scores[kind] = {
+                cst.MAE: float(np.average(df[f"{kind}_{cst.MAE}"], weights=weights)),
+                cst.RMSE: float(
+                    np.sqrt(np.average(df[f"{kind}_{cst.RMSE}"] ** 2, weights=weights))
+                ),
+            }
+        scores.setdefault(zone, {})[model_name] = model_scores
+    return scores
+
+
+def save_backtest(df_folds: pd.DataFrame, path: Path = PATH_BACKTESTS) -> None:
+    """Save the metrics of each fold, and the pooled scores of each zone.
+
+    Parameters
+    ----------
+    df_folds : pd.DataFrame
+        Metrics of each fold (see `run_backtest`).
+    path : Path, optional
+        Output folder, by default PATH_BACKTESTS. Fold metrics are written in
+        `folds.csv`, and scores in `<zone>/scores.json`.
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    df_folds.to_csv(path / "folds.csv", index=False)
+    for zone, zone_scores in get_backtest_scores(df_folds=df_folds).items():
+        (path / zone).mkdir(exist_ok=True)
+        with open(
+            path / zone / f"scores{cst.JSON}", mode="w", encoding="utf-8"
+        ) as file:
+            json.dump(obj=zone_scores, fp=file, indent=4)
@@ -0,0 +1,933 @@
+"""Module to benchmark the pipeline stages."""
+
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+
+import ens_load_forecast.constants as cst
+from ens_load_forecast.compiled_trees import compile_model
+from ens_load_forecast.data_preprocessing import (
+    _aggregate_weather_record_apply,
+    aggregate_weather_record,
+    get_load_actual,
+    get_load_forecast,
+    get_merged_dataset,
+    get_weather,
+    get_weather_records,
+    localize_weather_dates,
+    remove_forbidden_forecasts,
+)
+from ens_load_forecast.features_engineering import extract_features
+from ens_load_forecast.memory import get_frame_memory
+from ens_load_forecast.models import (
+    fit_model,
+    get_model_inputs,
+    initialize_models,
+    load_saved_models,
+    score_model,
+    split_zones,
+    train_models,
+    train_models_for_each_zone,
+)
+from ens_load_forecast.paths import PATH_BENCHMARKS, PATH_REPO, PATH_SYNTHETIC_DATA
+from ens_load_forecast.pipeline import (
+    LOAD_ACTUAL,
+    LOAD_FORECAST,
+    MERGED,
+    WEATHER,
+    get_node_params,
+    run_pipeline,
+)
+from ens_load_forecast.registry import get_registry
+from ens_load_forecast.synthetic_data import generate_synthetic_data
+
+
+def time_function(
+    func: Callable[..., Any], repeat: int = 1, **kwargs: Any
+) -> Tuple[Any, float]:
+    """Call a function and measure its wall time.
+
+    Parameters
+    ----------
+    func : Callable[..., Any]
+        Function to time.
+    repeat : int, optional
+        Number of calls, the best time is kept, by default 1
+    **kwargs : Any
+        Arguments of the function.
+
+    Returns
+    -------
+    Tuple[Any, float]
+        Result of the last call and best wall time (seconds).
+    """
+    best_time = np.inf
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(**kwargs)
+        best_time = min(best_time, time.perf_counter() - start)
+    return result, best_time
+
+
+def benchmark_weather_aggregation(
+    df: Optional[pd.DataFrame] = None, repeat: int = 1
+) -> Dict[str, Any]:
+    """Compare vectorized and reference weather aggregation.
+
+    Parameters
+    ----------
+    df : Optional[pd.DataFrame], optional
+        Weather records per station (see `get_weather_records`). If None, the full
+        weather history is loaded, by default None
+    repeat : int, optional
+        Number of runs per implementation, by default 1
+
+    Returns
+    -------
+    Dict[str, Any]
+        Timings (seconds), speedup and differences between both implementations.
+        Differences are only expected for groups with a missing value, where the
+        vectorized implementation renormalizes weights.
+    """
+    if df is None:
+        df = get_weather_records()
+
+    vectorized, vectorized_time = time_function(
+        aggregate_weather_record, repeat=repeat, df=df
+    )
+    reference, reference_time = time_function(
+        _aggregate_weather_record_apply, repeat=repeat, df=df
+    )
+    reference = reference.reindex(vectorized.index)
+
+    # Groups containing at least one missing value
+    features = df[cst.SELECTED_WEATHER_FEATURES].replace(
+        to_replace=cst.NG, value=np.nan
+    )
+    has_missing = (
+        features.isna().any(axis="columns").groupby(by=[df.index, df[cst.ZONE]]).any()
+    )
+    has_missing.index.names = vectorized.index.names
+    complete = ~has_missing.reindex(vectorized.index, fill_value=False).to_numpy()
+
+    difference = (vectorized - reference).abs().to_numpy()
+    return {
+        "n_records": len(df),
+        "n_groups": len(vectorized),
+        "n_groups_with_missing_values": int((~complete).sum()),
+        "reference_seconds": reference_time,
+        "vectorized_seconds": vectorized_time,
+        "speedup": reference_time / vectorized_time,
+        "max_abs_difference_complete_groups": float(
+            np.nanmax(difference[complete], initial=0.0)
+        ),
+    }
+
+
+def benchmark_compact_mode(
+    df_weather: pd.DataFrame,
+    df_load_actual: pd.DataFrame,
+    df_load_forecast: pd.DataFrame,
+) -> Dict[str, Any]:
+    """Compare memory and accuracy of the default and compact dtypes.
+
+    Both modes fit linear models from streamed statistics, as the pipeline does in
+    compact mode (see `get_node_params`), so that only dtypes differ.
+
+    Parameters
+    ----------
+    df_weather : pd.DataFrame
+        Weather data (see `get_weather`)
+    df_load_actual : pd.DataFrame
+        Actual load data (see `get_load_actual`)
+    df_load_forecast : pd.DataFrame
+        Forecast load data (see `get_load_forecast`)
+
+    Returns
+    -------
+    Dict[str, Any]
+        Memory (bytes) of merged and features DataFrames in both modes, relative
+        change of test RMSE per zone and model, and whether all changes are within
+        `COMPACT_RMSE_TOLERANCE`.
+    """
+    results: Dict[str, Any] = {"memory": {}, "relative_rmse_change": {}}
+    zone_scores = {}
+    for compact in [False, True]:
+        mode = "compact" if compact else "default"
+        df_merged = get_merged_dataset(
+            df_weather=df_weather,
+            df_load_actual=df_load_actual,
+            df_load_forecast=df_load_forecast,
+            compact=compact,
+        )
+        df_features = extract_features(df=df_merged, compact=compact)
+        results["memory"][mode] = {
+            "merged": get_frame_memory(df=df_merged),
+            "features": get_frame_memory(df=df_features),
+        }
+        zone_scores[mode] = {
+            zone: train_models(
+                df_features=df_features[df_features[cst.ZONE] == zone],
+                streaming_linear=True,
+            )[1]
+            for zone in df_features[cst.ZONE].unique()
+        }
+
+    max_change = 0.0
+    for zone, scores in zone_scores["default"].items():
+        results["relative_rmse_change"][zone] = {}
+        for model_name, model_scores in scores.items():
+            rmse = model_scores[cst.TEST][cst.RMSE]
+            compact_rmse = zone_scores["compact"][zone][model_name][cst.TEST][cst.RMSE]
+            change = float(abs(compact_rmse - rmse) / rmse)
+            results["relative_rmse_change"][zone][model_name] = change
+            max_change = max(max_change, change)
+    results["max_relative_rmse_change"] = max_change
+    results["within_tolerance"] = bool(max_change <= cst.COMPACT_RMSE_TOLERANCE)
+    return results
+
+
+def measure_stage(
+    func: Callable[..., Any], measure_memory: bool = True, **kwargs: Any
+) -> Tuple[Any, Dict[str, Any]]:
+    """Measure the wall time and peak memory of a pipeline stage.
+
+    Tracing allocations slows the stage down, so the peak memory is measured in a
+    second call.
+
+    Parameters
+    ----------
+    func : Callable[..., Any]
+        Stage to measure.
+    measure_memory : bool, optional
+        Measure the peak memory, by default True
+    **kwargs : Any
+        Arguments of the stage.
+
+    Returns
+    -------
+    Tuple[Any, Dict[str, Any]]
+        Result of the stage, and its measures:
+        - seconds: wall time
+        - peak_memory_bytes: peak of memory allocated by Python and numpy during
+          the stage (if measured)
+        - rows: number of rows of the result (if it is a DataFrame)
+    """
+    result, seconds = time_function(func, **kwargs)
+    measures: Dict[str, Any] = {"seconds": seconds}
+    if measure_memory:
+        tracemalloc.start()
+        try:
+            func(**kwargs)
+            measures["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    if isinstance(result, pd.DataFrame):
+        measures["rows"] = len(result)
+    return result, measures
+
+
+def benchmark_gradient_boosting(df_features: pd.DataFrame) -> Dict[str, Any]:
+    """Compare the exact and histogram-based gradient boosting models.
+
+    The histogram-based model is run with calendar features as one-hots and as
+    native categorical features (see `CalendarEncoder`), using all cores.
+
+    Parameters
+    ----------
+    df_features : pd.DataFrame
+        DataFrame containing features for all zones
+
+    Returns
+    -------
+    Dict[str, Any]
+        For each variant (`exact`, `histogram`, `histogram_native_categoricals`):
+        - fit_seconds: time to fit the models of every zone
+        - test_rmse: test RMSE per zone
+        - mean_test_rmse: mean of test RMSEs
+    """
+    variants = {
+        "exact": (cst.GRADIENT_BOOSTING_MODEL, None),
+        "histogram": (cst.HIST_GRADIENT_BOOSTING_MODEL, None),
+        "histogram_native_categoricals": (
+            cst.HIST_GRADIENT_BOOSTING_MODEL,
+            {
+                cst.HIST_GRADIENT_BOOSTING_MODEL: {
+                    "calendar_encoder__native_categoricals": True
+                }
+            },
+        ),
+    }
+    splits = split_zones(df_features=df_features)
+    results: Dict[str, Any] = {}
+    for variant, (model_name, params) in variants.items():
+        fit_seconds = 0.0
+        test_rmse = {}
+        for zone, (df_train, df_test) in splits.items():
+            model, seconds = time_function(
+                fit_model, model_name=model_name, df_train=df_train, params=params
+            )
+            fit_seconds += seconds
+            test_rmse[zone] = score_model(
+                df_train=df_train, df_test=df_test, model=model
+            )[cst.TEST][cst.RMSE]
+        results[variant] = {
+            "fit_seconds": fit_seconds,
+            "test_rmse": test_rmse,
+            "mean_test_rmse": float(np.mean(list(test_rmse.values()))),
+        }
+    return results
+
+
+def benchmark_model_layouts(
+    df_features: pd.DataFrame,
+    scale_per_zone: bool = False,
+    latency_rows: int = 24,
+    repeat: int = 5,
+) -> Dict[str, Any]:
+    """Compare one model per zone with one global model for all zones.
+
+    Both layouts are fitted on the same train sets (see `split_zones`), without
+    parallelism, and scored on the test set of each zone.
+
+    Parameters
+    ----------
+    df_features : pd.DataFrame
+        DataFrame containing features for all zones
+    scale_per_zone : bool, optional
+        Scale the load of each zone in global models (see `GlobalModel`), by
+        default False
+    latency_rows : int, optional
+        Rows per zone predicted to measure latency, by default 24 (one day)
+    repeat : int, optional
+        Number of predictions when measuring latency, the best time is kept, by
+        default 5
+
+    Returns
+    -------
+    Dict[str, Any]
+        For each layout (`per_zone` and `global`) then model name:
+        - fit_seconds: time to fit the model(s) of every zone
+        - artifact_bytes: size of the saved model(s) of every zone
+        - latency_seconds: time to predict `latency_rows` rows of every zone
+        - test_rmse: test RMSE per zone
+    """
+    splits = split_zones(df_features=df_features)
+    df_train = pd.concat([df_train for df_train, _ in splits.values()])
+    latency_inputs = {
+        zone: df_test[:latency_rows] for zone, (_, df_test) in splits.items()
+    }
+    df_latency = pd.concat(latency_inputs.values())
+    results: Dict[str, Any] = {"per_zone": {}, cst.GLOBAL: {}}
+    for model_name in initialize_models():
+        zone_models = {}
+        fit_seconds = 0.0
+        for zone, (df_zone_train, _) in splits.items():
+            zone_models[zone], zone_seconds = time_function(
+                fit_model, model_name=model_name, df_train=df_zone_train
+            )
+            fit_seconds += zone_seconds
+        global_model, global_seconds = time_function(
+            fit_model,
+            model_name=model_name,
+            df_train=df_train,
+            global_model=True,
+            scale_per_zone=scale_per_zone,
+        )
+        _, zone_latency = time_function(
+            lambda: [
+                zone_models[zone].predict(get_model_inputs(df=df_zone))
+                for zone, df_zone in latency_inputs.items()
+            ],
+            repeat=repeat,
+        )
+        _, global_latency = time_function(
+            global_model.predict, repeat=repeat, X=df_latency
+        )
+        for layout, models, seconds, latency in [
+            ("per_zone", zone_models, fit_seconds, zone_latency),
+            (
+                cst.GLOBAL,
+                {zone: global_model for zone in splits},
+                global_seconds,
+                global_latency,
+            ),
+        ]:
+            results[layout][model_name] = {
+                "fit_seconds": seconds,
+                "artifact_bytes": sum(
+                    _get_pickled_size(model=model)
+                    for model in {
+                        id(model): model for model in models.values()
+                    }.values()
+                ),
+                "latency_seconds": latency,
+                "test_rmse": {
+                    zone: score_model(
+                        df_train=df_zone_train, df_test=df_zone_test, model=models[zone]
+                    )[cst.TEST][cst.RMSE]
+                    for zone, (df_zone_train, df_zone_test) in splits.items()
+                },
+            }
+    return results
+
+
+def benchmark_compiled_trees(
+    df_features: pd.DataFrame, repeat: int = 20
+) -> Dict[str, Any]:
+    """Compare the latency of tree ensembles before and after `compile_model`.
+
+    Models of each zone are fitted on their train set. Latency is measured for
+    one row and one day of one zone, and for one day of every zone (one call per
+    zone), with the inputs of the test sets.
+
+    Parameters
+    ----------
+    df_features : pd.DataFrame
+        DataFrame containing features for all zones
+    repeat : int, optional
+        Number of predictions when measuring latency, the best time is kept, by
+        default 20
+
+    Returns
+    -------
+    Dict[str, Any]
+        For each model name:
+        - identical: whether compiled models predict the same test values
+        - latency_seconds: per batch (`1`, `24` and `24x<number of zones>`), time
+          to predict with the original and the compiled models
+    """
+    splits = split_zones(df_features=df_features)
+    inputs = {
+        zone: get_model_inputs(df=df_test) for zone, (_, df_test) in splits.items()
+    }
+    first_zone = next(iter(splits))
+    batches = {
+        "1": {first_zone: 1},
+        "24": {first_zone: 24},
+        f"24x{len(splits)}": {zone: 24 for zone in splits},
+    }
+    results: Dict[str, Any] = {}
+    for model_name in [cst.RANDOM_FOREST_MODEL, cst.GRADIENT_BOOSTING_MODEL]:
+        models = {
+            zone: fit_model(model_name=model_name, df_train=df_train)
+            for zone, (df_train, _) in splits.items()
+        }
+        compiled = {zone: compile_model(model=model) for zone, model in models.items()}
+        results[model_name] = {
+            "identical": all(
+                np.array_equal(
+                    models[zone].predict(inputs[zone]),
+                    compiled[zone].predict(inputs[zone].to_numpy()),
+                )
+                for zone in splits
+            ),
+            "latency_seconds": {},
+        }
+        for batch, rows in batches.items():
+            _, original_latency = time_function(
+                lambda: [
+                    models[zone].predict(inputs[zone][:n_rows])
+                    for zone, n_rows in rows.items()
+                ],
+                repeat=repeat,
+            )
+            _, compiled_latency = time_function(
+                lambda: [
+                    compiled[zone].predict(inputs[zone][:n_rows].to_numpy())
+                    for zone, n_rows in rows.items()
+                ],
+                repeat=repeat,
+            )
+            results[model_name]["latency_seconds"][batch] = {
+                "original": original_latency,
+                "compiled": compiled_latency,
+            }
+    return results
+
+
+def benchmark_concurrent_loading(
+    path_data: Path = PATH_SYNTHETIC_DATA,
+    source_jobs: int = 3,
+    repeat: int = 3,
+    **parameters: Any,
+) -> Dict[str, Any]:
+    """Compare sequential and concurrent loading of the source files.
+
+    The `merged` node of the pipeline is computed from synthetic data, with its
+    source nodes (load actual, load forecast and weather) computed one after the
+    other, then in parallel processes (see `run_pipeline`).
+
+    Parameters
+    ----------
+    path_data : Path, optional
+        Folder of the synthetic data, by default PATH_SYNTHETIC_DATA
+    source_jobs : int, optional
+        Number of parallel processes of the concurrent run, by default 3
+    repeat : int, optional
+        Number of runs of each mode, the best time is kept, by default 3
+    **parameters : Any
+        Parameters of `generate_synthetic_data`.
+
+    Returns
+    -------
+    Dict[str, Any]
+        - sequential_seconds, concurrent_seconds: time to get the merged dataset
+        - saved_seconds: difference of both
+        - identical: whether both modes give the same merged dataset
+    """
+    paths = generate_synthetic_data(path=path_data, **parameters)
+    params = get_node_params(paths=paths)
+    force = [LOAD_ACTUAL, LOAD_FORECAST, WEATHER, MERGED]
+    results: Dict[str, Any] = {}
+    merged = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for mode, n_jobs in [("sequential", 1), ("concurrent", source_jobs)]:
+            outputs, results[f"{mode}_seconds"] = time_function(
+                run_pipeline,
+                repeat=repeat,
+                targets=[MERGED],
+                params=params,
+                force=force,
+                path=Path(tmp_dir) / mode,
+                source_jobs=n_jobs,
+            )
+            merged[mode] = outputs[MERGED]
+    results["saved_seconds"] = (
+        results["sequential_seconds"] - results["concurrent_seconds"]
+    )
+    results["identical"] = merged["sequential"].equals(merged["concurrent"])
+    return results
+
+
+def _get_pickled_size(model: Any) -> int:
+    """Get the size of a model saved with joblib.
+
+    Parameters
+    ----------
+    model : Any
+        Model.
+
+    Returns
+    -------
+    int
+        Size (bytes).
+    """
+    buffer = io.BytesIO()
+    joblib.dump(value=model, filename=buffer)
+    return buffer.getbuffer().nbytes
+
+
+def run_benchmark_suite(
+    path_data: Path = PATH_SYNTHETIC_DATA,
+    path_output: Optional[Path] = PATH_BENCHMARKS,
+    n_years: float = 1.0,
+    n_stations: int = 30,
+    vintages_per_day: int = 2,
+    seed: int = 0,
+    measure_memory: bool = True,
+) -> Dict[str, Any]:
+    """Run every pipeline stage on synthetic data and measure it.
+
+    Stages are `get_weather` (computed then cached), `remove_forbidden_forecasts`
+    (on weather records), `get_merged_dataset`, `extract_features`, `train_models`
+    (every zone, without parallelism) and `load_saved_models` (from disk).
+
+    Parameters
+    ----------
+    path_data : Path, optional
+        Folder of the synthetic data, of the preprocessed weather and of the saved
+        models, by default PATH_SYNTHETIC_DATA
+    path_output : Optional[Path], optional
+        Folder where results are saved, as `<date>_<commit>.json`. By default
+        PATH_BENCHMARKS, None to not save them.
+    n_years : float, optional
+        Number of years of synthetic data, by default 1.0
+    n_stations : int, optional
+        Number of weather stations, by default 30
+    vintages_per_day : int, optional
+        Number of weather forecasts issued per day, by default 2
+    seed : int, optional
+        Seed of the synthetic data, by default 0
+    measure_memory : bool, optional
+        Measure peak memory of each stage, by default True
+
+    Returns
+    -------
+    Dict[str, Any]
+        Results:
+        - metadata: commit, date, versions and parameters of the run
+        - stages: measures of each stage (see `measure_stage`)
+    """
+    path_data = Path(path_data)
+    parameters = {
+        "n_years": n_years,
+        "n_stations": n_stations,
+        "vintages_per_day": vintages_per_day,
+        "seed": seed,
+    }
+    paths, generation_time = time_function(
+        generate_synthetic_data, path=path_data, **parameters
+    )
+    path_preprocessed = path_data / "preprocessed_weather"
+    path_saved_models = path_data / "saved_models"
+    stages = {}
+
+    weather_kwargs = {
+        "path": paths["weather"],
+        "path_zones_and_stations": paths["zones_and_stations"],
+        "path_preprocessed": path_preprocessed,
+    }
+    df_weather, stages["get_weather"] = measure_stage(
+        get_weather,
+        measure_memory=measure_memory,
+        force_recompute=True,
+        **weather_kwargs,
+    )
+    _, stages["get_weather_cached"] = measure_stage(
+        get_weather,
+        measure_memory=measure_memory,
+        force_recompute=False,
+        **weather_kwargs,
+    )
+
+    df_records = localize_weather_dates(
+        df=pd.read_csv(paths["weather"], index_col=1, low_memory=False)
+    )
+    _, stages["remove_forbidden_forecasts"] = measure_stage(
+        remove_forbidden_forecasts,
+        measure_memory=measure_memory,
+        df=df_records,
+        duplicates_key=cst.STATION_CODE,
+    )
+    del df_records
+
+    df_load_actual, stages["get_load_actual"] = measure_stage(
+        get_load_actual, measure_memory=measure_memory, path=paths["load_actual"]
+    )
+    df_load_forecast, stages["get_load_forecast"] = measure_stage(
+        get_load_forecast, measure_memory=measure_memory, path=paths["load_forecast"]
+    )
+    df_merged, stages["get_merged_dataset"] = measure_stage(
+        get_merged_dataset,
+        measure_memory=measure_memory,
+        df_weather=df_weather,
+        df_load_actual=df_load_actual,
+        df_load_forecast=df_load_forecast,
+    )
+    df_features, stages["extract_features"] = measure_stage(
+        extract_features, measure_memory=measure_memory, df=df_merged
+    )
+    _, stages["train_models"] = measure_stage(
+        train_models_for_each_zone,
+        measure_memory=measure_memory,
+        df_features=df_features,
+        force_retrain=True,
+        path=path_saved_models,
+    )
+    _, stages["load_saved_models"] = measure_stage(
+        _load_saved_models_from_disk,
+        measure_memory=measure_memory,
+        path=path_saved_models,
+    )
+
+    results = {
+        "metadata": {
+            **_get_run_metadata(),
+            "parameters": parameters,
+            "input_rows": {
+                name: _count_rows(path=path) for name, path in paths.items()
+            },
+            "generation_seconds": generation_time,
+        },
+        "stages": stages,
+    }
+    if path_output is not None:
+        save_benchmark_results(results=results, path=path_output)
+    return results
+
+
+def _get_synthetic_features(
+    path_data: Path = PATH_SYNTHETIC_DATA, **parameters: Any
+) -> pd.DataFrame:
+    """Generate synthetic data and extract its features.
+
+    Parameters
+    ----------
+    path_data : Path, optional
+        Folder of the synthetic data and of the preprocessed weather, by default
+        PATH_SYNTHETIC_DATA
+    **parameters : Any
+        Parameters of `generate_synthetic_data`.
+
+    Returns
+    -------
+    pd.DataFrame
+        Features of all zones.
+    """
+    paths = generate_synthetic_data(path=path_data, **parameters)
+    df_weather = get_weather(
+        force_recompute=True,
+        path=paths["weather"],
+        path_zones_and_stations=paths["zones_and_stations"],
+        path_preprocessed=Path(path_data) / "preprocessed_weather",
+    )
+    df_merged = get_merged_dataset(
+        df_weather=df_weather,
+        df_load_actual=get_load_actual(path=paths["load_actual"]),
+        df_load_forecast=get_load_forecast(path=paths["load_forecast"]),
+    )
+    return extract_features(df=df_merged)
+
+
+def _load_saved_models_from_disk(path: Path) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Load saved models, dropping the ones already resident in the registry.
+
+    Parameters
+    ----------
+    path : Path
+        Folder of saved models.
+
+    Returns
+    -------
+    Tuple[Dict[str, Any], Dict[str, Any]]
+        Models and scores (see `load_saved_models`).
+    """
+    get_registry(path=path).refresh()
+    return load_saved_models(path=path)
+
+
+def _count_rows(path: Path) -> int:
+    """Count the rows of a csv file, header excluded.
+
+    Parameters
+    ----------
+    path : Path
+        Path to the csv file.
+
+    Returns
+    -------
+    int
+        Number of rows.
+    """
+    with open(path, mode="rb") as file:
+        return sum(1 for _ in file) - 1
+
+
+def _get_run_metadata() -> Dict[str, Any]:
+    """Describe the code and environment of a benchmark run.
+
+    Returns
+    -------
+    Dict[str, Any]
+        Commit (None outside of a git repository), date, and versions.
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PATH_REPO,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "date": pd.Timestamp.now().strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "scikit-learn": sklearn.__version__,
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def save_benchmark_results(results: Dict[str, Any], path: Path) -> Path:
+    """Save benchmark results as `<date>_<commit>.json`.
+
+    Parameters
+    ----------
+    results : Dict[str, Any]
+        Results (see `run_benchmark_suite`).
+    path : Path
+        Output folder.
+
+    Returns
+    -------
+    Path
+        Path of the json file.
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    metadata = results["metadata"]
+    date = metadata["date"].replace(":", "").replace("-", "")
+    file_path = path / f"{date}_{metadata['commit'] or 'unknown'}{cst.JSON}"
+    with open(file_path, mode="w", encoding="utf-8") as file:
+        json.dump(obj=results, fp=file, indent=4)
+    return file_path
+
+
+def compare_benchmark_results(
+    path_reference: Path, path_candidate: Path
+) -> Dict[str, Dict[str, Optional[float]]]:
+    """Compare two benchmark runs, stage by stage.
+
+    Parameters
+    ----------
+    path_reference : Path
+        Results of the reference run (json).
+    path_candidate : Path
+        Results of the candidate run (json).
+
+    Returns
+    -------
+    Dict[str, Dict[str, Optional[float]]]
+        For each stage of both runs, ratios candidate / reference of the wall time
+        and of the peak memory (None if not measured in both runs).
+    """
+    stages: List[Dict[str, Any]] = []
+    for path in [path_reference, path_candidate]:
+        with open(path, mode="r", encoding="utf-8") as file:
+            stages.append(json.load(file)["stages"])
+    reference, candidate = stages
+
+    comparison = {}
+    for stage in reference:
+        if stage not in candidate:
+            continue
+        comparison[stage] = {
+            f"{measure}_ratio": (
+                candidate[stage][measure] / reference[stage][measure]
+                if measure in reference[stage] and measure in candidate[stage]
+                else None
+            )
+            for measure in ["seconds", "peak_memory_bytes"]
+        }
+    return comparison
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the benchmark suite, or compare two runs.
+
+    Parameters
+    ----------
+    argv : Optional[List[str]], optional
+        Command line arguments, by default None (`sys.argv`)
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m ens_load_forecast.benchmarks",
+        description="Benchmark pipeline stages on synthetic data.",
+    )
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--stations", type=int, default=30)
+    parser.add_argument("--vintages-per-day", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--no-memory", action="store_true", help="Do not measure peak memory."
+    )
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        type=Path,
+        metavar=("REFERENCE", "CANDIDATE"),
+        help="Compare two result files instead of running the suite.",
+    )
+    parser.add_argument(
+        "--aggregation",
+        action="store_true",
+        help="Compare weather aggregation implementations on the real data.",
+    )
+    parser.add_argument(
+        "--boosting",
+        action="store_true",
+        help="Compare exact and histogram-based gradient boosting on synthetic data.",
+    )
+    parser.add_argument(
+        "--layouts",
+        action="store_true",
+        help="Compare per-zone and global models on synthetic data.",
+    )
+    parser.add_argument(
+        "--compiled",
+        action="store_true",
+        help="Compare tree ensembles before and after compilation on synthetic data.",
+    )
+    parser.add_argument(
+        "--loading",
+        action="store_true",
+        help="Compare sequential and concurrent loading of synthetic source files.",
+    )
+    parser.add_argument(
+        "--scale-per-zone",
+        action="store_true",
+        help="Scale the load of each zone in global models (with --layouts).",
+    )
+    args = parser.parse_args(argv)
+
+    if args.compare is not None:
+        results = compare_benchmark_results(*args.compare)
+    elif args.aggregation:
+        results = benchmark_weather_aggregation()
+    elif args.boosting:
+        results = benchmark_gradient_boosting(
+            df_features=_get_synthetic_features(
+                n_years=args.years,
+                n_stations=args.stations,
+                vintages_per_day=args.vintages_per_day,
+                seed=args.seed,
+            ),
+        )
+    elif args.layouts:
+        results = benchmark_model_layouts(
+            df_features=_get_synthetic_features(
+                n_years=args.years,
+                n_stations=args.stations,
+                vintages_per_day=args.vintages_per_day,
+                seed=args.seed,
+            ),
+            scale_per_zone=args.scale_per_zone,
+        )
+    elif args.compiled:
+        results = benchmark_compiled_trees(
+            df_features=_get_synthetic_features(
+                n_years=args.years,
+                n_stations=args.stations,
+                vintages_per_day=args.vintages_per_day,
+                seed=args.seed,
+            ),
+        )
+    elif args.loading:
+        results = benchmark_concurrent_loading(
+            n_years=args.years,
+            n_stations=args.stations,
+            vintages_per_day=args.vintages_per_day,
+            seed=args.seed,
+        )
+    else:
+        results = run_benchmark_suite(
+            n_years=args.years,
+            n_stations=args.stations,
+            vintages_per_day=args.vintages_per_day,
+            seed=args.seed,
+            measure_memory=not args.no_memory,
+        )
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    main()
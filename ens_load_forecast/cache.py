@@ -0,0 +1,220 @@
+"""Module to cache DataFrames in a columnar, memory-mappable NumPy layout.
+
+A cached frame is a folder containing one `.npy` file per column (index levels
+included) and a `metadata.json` file describing dtypes, time zones and the
+fingerprint of the source files the frame was computed from.
+"""
+
+import json
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+CACHE_FORMAT_VERSION = 1
+METADATA_FILE = "metadata.json"
+
+# Column kinds
+DATETIME = "datetime"
+CODES = "codes"
+CATEGORY = "category"
+ARRAY = "array"
+
+
+def get_fingerprint(paths: Iterable[Path]) -> Dict[str, Any]:
+    """Compute a cheap fingerprint of source files (size and modification time).
+
+    Parameters
+    ----------
+    paths : Iterable[Path]
+        Source files.
+
+    Returns
+    -------
+    Dict[str, Any]
+        Fingerprint, JSON serializable. Missing files are recorded as `None`.
+    """
+    fingerprint = {}
+    for path in paths:
+        path = Path(path)
+        if path.exists():
+            stat = path.stat()
+            fingerprint[str(path.resolve())] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+            }
+        else:
+            fingerprint[str(path.resolve())] = None
+    return fingerprint
+
+
+def _encode_column(series: pd.Series) -> Dict[str, Any]:
+    """Split a column in a NumPy array and JSON serializable metadata.
+
+    Parameters
+    ----------
+    series : pd.Series
+        Column to encode.
+
+    Returns
+    -------
+    Dict[str, Any]
+        Dictionary with keys `array` (np.ndarray) and `metadata`.
+    """
+    dtype = series.dtype
+    if isinstance(dtype, pd.DatetimeTZDtype):
+        # Stored as UTC nanoseconds
+        array = pd.DatetimeIndex(series).asi8
+        metadata = {"kind": DATETIME, "tz": str(dtype.tz)}
+    elif pd.api.types.is_datetime64_dtype(dtype):
+        array = pd.DatetimeIndex(series).asi8
+        metadata = {"kind": DATETIME, "tz": None}
+    elif isinstance(dtype, pd.CategoricalDtype):
+        array = series.cat.codes.to_numpy()
+        metadata = {
+            "kind": CATEGORY,
+            "categories": dtype.categories.tolist(),
+            "ordered": bool(dtype.ordered),
+        }
+    elif dtype == object:
+        # Strings (or other python objects) are factorized, -1 stands for missing
+        codes, uniques = pd.factorize(series)
+        array = codes
+        metadata = {"kind": CODES, "uniques": uniques.tolist()}
+    else:
+        array = series.to_numpy()
+        metadata = {"kind": ARRAY}
+    return {"array": np.ascontiguousarray(array), "metadata": metadata}
+
+
+def _decode_column(array: np.ndarray, metadata: Dict[str, Any]) -> Any:
+    """Rebuild a column from its array and metadata.
+
+    Parameters
+    ----------
+    array : np.ndarray
+        Stored array.
+    metadata : Dict[str, Any]
+        Stored metadata.
+
+    Returns
+    -------
+    Any
+        Array-like usable to build a DataFrame column or index level.
+    """
+    kind = metadata["kind"]
+    if kind == DATETIME:
+        values = pd.DatetimeIndex(np.asarray(array).view("datetime64[ns]"))
+        if metadata["tz"] is not None:
+            values = values.tz_localize("UTC").tz_convert(metadata["tz"])
+        return values
+    if kind == CATEGORY:
+        return pd.Categorical.from_codes(
+            codes=array,
+            categories=metadata["categories"],
+            ordered=metadata["ordered"],
+        )
+    if kind == CODES:
+        uniques = np.array(metadata["uniques"] + [np.nan], dtype=object)
+        return uniques[np.asarray(array)]  # code -1 picks the trailing nan
+    return array
+
+
+def save_frame(
+    df: pd.DataFrame, path: Path, fingerprint: Optional[Dict[str, Any]] = None
+) -> None:
+    """Save a DataFrame in the columnar cache layout.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame to save. Column and index level names must be strings.
+    path : Path
+        Folder of the cached frame (replaced if it exists).
+    fingerprint : Optional[Dict[str, Any]], optional
+        Fingerprint of the source files, by default None
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    if tmp_path.exists():
+        shutil.rmtree(tmp_path)
+    tmp_path.mkdir(parents=True)
+
+    # Unnamed index levels get a placeholder name, restored when loading
+    index_names = list(df.index.names)
+    level_names = [
+        f"__index_level_{level}__" if name is None else name
+        for level, name in enumerate(index_names)
+    ]
+    flat_df = df.rename_axis(index=level_names).reset_index()
+    columns = []
+    for position, column in enumerate(flat_df.columns):
+        encoded = _encode_column(flat_df[column])
+        file_name = f"{position}.npy"
+        np.save(file=tmp_path / file_name, arr=encoded["array"], allow_pickle=False)
+        columns.append({"name": column, "file": file_name, **encoded["metadata"]})
+
+    metadata = {
+        "version": CACHE_FORMAT_VERSION,
+        "fingerprint": fingerprint,
+        "index_names": index_names,
+        "level_names": level_names,
+        "columns": columns,
+    }
+    with open(tmp_path / METADATA_FILE, mode="w", encoding="utf-8") as file:
+        json.dump(obj=metadata, fp=file, indent=4)
+
+    # Replace the previous cache only once the new one is complete
+    if path.exists():
+        shutil.rmtree(path)
+    tmp_path.rename(path)
+
+
+def load_frame(
+    path: Path,
+    fingerprint: Optional[Dict[str, Any]] = None,
+    mmap: bool = True,
+) -> Optional[pd.DataFrame]:
+    """Load a DataFrame saved with `save_frame`.
+
+    Parameters
+    ----------
+    path : Path
+        Folder of the cached frame.
+    fingerprint : Optional[Dict[str, Any]], optional
+        Expected fingerprint of the source files. If given and different from the
+        stored one, the cache is considered stale, by default None
+    mmap : bool, optional
+        Memory-map the column files instead of reading them, by default True
+
+    Returns
+    -------
+    Optional[pd.DataFrame]
+        Cached DataFrame, or None if the cache is missing or stale.
+    """
+    path = Path(path)
+    metadata_path = path / METADATA_FILE
+    if not metadata_path.exists():
+        return None
+    with open(metadata_path, mode="r", encoding="utf-8") as file:
+        metadata = json.load(file)
+    if metadata["version"] != CACHE_FORMAT_VERSION:
+        return None
+    if fingerprint is not None and metadata["fingerprint"] != fingerprint:
+        return None
+
+    data = {}
+    for column in metadata["columns"]:
+        array = np.load(
+            file=path / column["file"],
+            mmap_mode="r" if mmap else None,
+            allow_pickle=False,
+        )
+        data[column["name"]] = _decode_column(array=array, metadata=column)
+    df = pd.DataFrame(data=data)
+
+    df = df.set_index(metadata["level_names"])
+    df.index.names = metadata["index_names"]
+    return df
@@ -0,0 +1,213 @@
+"""Module to compile tree ensembles into flat arrays, for low-latency predictions.
+
+`Pipeline.predict` of a random forest or a gradient boosting validates its inputs
+and dispatches every tree separately, which dominates the prediction time of a few
+rows. `compile_model` packs the nodes of all trees in flat arrays (split feature,
+threshold, children, value), and `CompiledTreeEnsemble.predict` moves every
+(tree, row) pair down one level at a time, for all trees at once. Pairs having
+reached a leaf are dropped from the next levels.
+
+Predictions are identical to the original model: inputs are cast to float32 as
+scikit-learn does, and tree values are summed in the same order. Arrays are plain
+NumPy arrays, so that a compiled model saved uncompressed can be memory-mapped
+(see `save_models`).
+"""
+
+from typing import Any, Dict, List
+
+import numpy as np
+from sklearn.base import BaseEstimator
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.pipeline import Pipeline
+
+
+class CompiledTreeEnsemble(BaseEstimator):
+    """Tree ensemble stored as flat node arrays (see `compile_model`).
+
+    Nodes of all trees are concatenated.
+
+    Parameters
+    ----------
+    feature : np.ndarray
+        Split feature of each node (-1 for leaves).
+    threshold : np.ndarray
+        Split threshold of each node, rows with a lower or equal value go left.
+    children : np.ndarray
+        Index of the left then right child of each node, interleaved (children of
+        node `i` are at `2 * i` and `2 * i + 1`).
+    value : np.ndarray
+        Value of each node, already multiplied by the tree weight.
+    roots : np.ndarray
+        Index of the root of each tree.
+    max_depth : int
+        Depth of the deepest tree.
+    init : float, optional
+        Value added to the sum of trees, by default 0.0
+    divisor : float, optional
+        Divisor of the sum of trees (e.g. the number of trees of a forest), by
+        default 1.0
+    """
+
+    def __init__(  # noqa: D107 (disable ruff: missing docstring)
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        children: np.ndarray,
+        value: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int,
+        init: float = 0.0,
+        divisor: float = 1.0,
+    ) -> None:
+        super().__init__()
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.init = init
+        self.divisor = divisor
+
+    def predict(self, X) -> np.ndarray:  # noqa: D102, N803
+        # Trees compare float32 values, as scikit-learn
+        columns = np.ascontiguousarray(np.asarray(X, dtype=np.float32).T)
+        n_rows = columns.shape[1]
+        flat = columns.ravel()
+        # Current node of each (tree, row) pair, trees first
+        nodes = np.repeat(self.roots, n_rows)
+        rows = np.tile(np.arange(n_rows), len(self.roots))
+        active = np.flatnonzero(self.feature[nodes] >= 0)
+        for _ in range(self.max_depth):
+            if len(active) == 0:
+                break
+            current = nodes[active]
+            values = flat[self.feature[current] * n_rows + rows[active]]
+            children = self.children[2 * current + (values > self.threshold[current])]
+            nodes[active] = children
+            active = active[self.feature[children] >= 0]
+        # Trees are added one after the other to the initial value, as scikit-learn
+        # does (`sum` would add them pairwise when there is a single row)
+        predictions = np.full(n_rows, self.init, dtype=np.float64)
+        for tree_values in self.value[nodes].reshape(len(self.roots), n_rows):
+            predictions += tree_values
+        if self.divisor != 1.0:
+            predictions /= self.divisor
+        return predictions
+
+
+def compile_model(model: Any) -> Any:
+    """Compile a random forest or a gradient boosting into flat arrays.
+
+    Parameters
+    ----------
+    model : Any
+        Fitted `RandomForestRegressor` or `GradientBoostingRegressor`, possibly as
+        the only step of a `Pipeline`, or a `GlobalModel` of one of them.
+
+    Returns
+    -------
+    Any
+        `CompiledTreeEnsemble` (wrapped in a `GlobalModel` if given one), or the
+        model itself if it is not supported.
+    """
+    # Imported here, models depending on this module
+    from ens_load_forecast.models import GlobalModel
+
+    if isinstance(model, GlobalModel):
+        compiled = compile_model(model=model.model)
+        if compiled is model.model:
+            return model
+        global_model = GlobalModel(model=compiled, scale_per_zone=model.scale_per_zone)
+        global_model.zones_ = model.zones_
+        global_model.scales_ = model.scales_
+        return global_model
+    estimator = model
+    if isinstance(model, Pipeline):
+        if len(model.steps) != 1:
+            return model
+        estimator = model.steps[0][1]
+    if isinstance(estimator, RandomForestRegressor):
+        trees = [tree.tree_ for tree in estimator.estimators_]
+        return _pack_trees(trees=trees, weight=1.0, init=0.0, divisor=len(trees))
+    if isinstance(estimator, GradientBoostingRegressor):
+        if estimator.init_ != "zero" and not hasattr(estimator.init_, "constant_"):
+            return model  # Only constant initial predictions are supported
+        init = 0.0 if estimator.init_ == "zero" else estimator.init_.constant_
+        return _pack_trees(
+            trees=[tree.tree_ for tree in estimator.estimators_[:, 0]],
+            weight=estimator.learning_rate,
+            init=float(np.ravel(init)[0]),
+            divisor=1.0,
+        )
+    return model
+
+
+def compile_models(models: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Compile the tree ensembles of each zone.
+
+    Parameters
+    ----------
+    models : Dict[str, Dict[str, Any]]
+        Fitted models, per zone then model name.
+
+    Returns
+    -------
+    Dict[str, Dict[str, Any]]
+        Same models, random forests and gradient boostings being compiled.
+    """
+    return {
+        zone: {
+            model_name: compile_model(model=model)
+            for model_name, model in zone_models.items()
+        }
+        for zone, zone_models in models.items()
+    }
+
+
+def _pack_trees(
+    trees: List[Any], weight: float, init: float, divisor: float
+) -> CompiledTreeEnsemble:
+    """Concatenate the nodes of scikit-learn trees.
+
+    Parameters
+    ----------
+    trees : List[Any]
+        `sklearn.tree._tree.Tree` of each estimator.
+    weight : float
+        Factor applied to node values (e.g. the learning rate of a boosting).
+    init : float
+        Initial value of predictions.
+    divisor : float
+        Divisor of the sum of trees.
+
+    Returns
+    -------
+    CompiledTreeEnsemble
+        Compiled ensemble.
+    """
+    offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+    feature, threshold, children, value = [], [], [], []
+    for offset, tree in zip(offsets, trees):
+        is_leaf = tree.children_left == -1
+        feature.append(np.where(is_leaf, -1, tree.feature))
+        threshold.append(tree.threshold)
+        children.append(
+            np.where(
+                is_leaf[:, np.newaxis],
+                -1,
+                np.column_stack([tree.children_left, tree.children_right]) + offset,
+            ).ravel()
+        )
+        value.append(weight * tree.value[:, 0, 0])
+    index_dtype = np.int32 if offsets[-1] < np.iinfo(np.int32).max else np.int64
+    return CompiledTreeEnsemble(
+        feature=np.concatenate(feature).astype(index_dtype),
+        threshold=np.concatenate(threshold).astype(np.float64),
+        children=np.concatenate(children).astype(index_dtype),
+        value=np.concatenate(value).astype(np.float64),
+        roots=offsets[:-1].astype(index_dtype),
+        max_depth=max(tree.max_depth for tree in trees),
+        init=init,
+        divisor=divisor,
+    )
@@ -12,6 +12,23 @@ FORECAST_HORIZON = "forecast_horizon"
 STATION_CODE = "station_code"
 DELIVERY_TS = "delivery_ts"
 WEIGHT = "weight"
+LOAD_PREDICTION = "load_prediction"
+MODEL_NAME = "model_name"
+
+# NYISO load zones
+ZONES = [
+    "CAPITL",
+    "CENTRL",
+    "DUNWOD",
+    "GENESE",
+    "HUD VL",
+    "LONGIL",
+    "MHK VL",
+    "MILLWD",
+    "N.Y.C.",
+    "NORTH",
+    "WEST",
+]
 
 # wind speed has value "NG" sometimes
 NG = "NG"
@@ -67,6 +84,14 @@ PERCENT_FEATURES = [
     SKY,
     PSN,
 ]
+CALENDAR_ONE_HOTS = {
+    MONTH: [f"{MONTH}_{name}" for name in MONTH_NAMES],
+    DAY_OF_WEEK: [f"{DAY_OF_WEEK}_{name}" for name in DAY_NAMES],
+    TIME_OF_DAY: [f"{TIME_OF_DAY}_{name}" for name in DAY_TIMES],
+}
+CALENDAR_FEATURES = [
+    column for columns in CALENDAR_ONE_HOTS.values() for column in columns
+]
 FEATURES_LIST = [
     LOAD_FORECAST,
     TMP,
@@ -77,9 +102,7 @@ FEATURES_LIST = [
     PSN,
     COS_WDR,
     SIN_WDR,
-    *[f"{MONTH}_{name}" for name in MONTH_NAMES],
-    *[f"{DAY_OF_WEEK}_{name}" for name in DAY_NAMES],
-    *[f"{TIME_OF_DAY}_{name}" for name in DAY_TIMES],
+    *CALENDAR_FEATURES,
 ]
 
 
@@ -89,13 +112,31 @@ NAIVE_MODEL = "naive_model"
 LINEAR_MODEL = "linear_model"
 POLYNOMIAL_MODEL = "polynomial_model"
 GRADIENT_BOOSTING_MODEL = "gradient_boosting_model"
+HIST_GRADIENT_BOOSTING_MODEL = "hist_gradient_boosting_model"
 RANDOM_FOREST_MODEL = "radom_forest_model"
 TRAIN = "train"
 TEST = "test"
 MAE = "mae"
 RMSE = "rmse"
+GLOBAL = "global"  # Key of models trained on all zones
+
+# Aggregates (see `aggregates`)
+SEASONAL = "seasonal"  # zone x day of year x hour
+MONTHLY = "monthly"  # zone x month
+COUNT = "count"
+BIAS = "bias"  # Mean error of NYISO load forecasts (forecast - actual)
+DAYS_IN_LEAP_YEAR = 366
+
+# Feature statistics (see `streaming_statistics`)
+CORRELATIONS = "correlations"  # Pearson correlations per zone, and of all zones
+SAMPLE = "sample"  # Rows sampled uniformly in each zone
+
+# Maximum relative change of test RMSE allowed when using compact dtypes
+COMPACT_RMSE_TOLERANCE = 0.01
 
 
 # Files
 JSON = ".json"
 JOBLIB = ".joblib"
+ARTIFACTS_FILE = "artifacts.json"  # Metadata of the saved models of a zone
+EXPORT_FILE = "export.json"  # Pipeline keys of the saved models and scores
@@ -1,9 +1,19 @@
 """Module to load and pre-process data (handle index, timezones, etc.)."""
+from pathlib import Path
+from typing import List, Optional
+
 import numpy as np
 import pandas as pd
 import pytz
 
 import ens_load_forecast.constants as cst
+from ens_load_forecast.cache import get_fingerprint, load_frame, save_frame
+from ens_load_forecast.instrumentation import OUTPUT, stage
+from ens_load_forecast.memory import (
+    harmonize_zone_categories,
+    log_frame_memory,
+    to_compact,
+)
 from ens_load_forecast.paths import (
     PATH_LOAD_ACTUAL,
     PATH_LOAD_FORECAST,
@@ -15,13 +25,17 @@ from ens_load_forecast.paths import (
 eastern_tz = pytz.timezone("EST")
 
 
-def get_load_actual() -> pd.DataFrame:
+def get_load_actual(
+    path: Path = PATH_LOAD_ACTUAL, compact: bool = False
+) -> pd.DataFrame:
     """Get actual load data. Time zone is `EST`.
 
     Parameters
     ----------
-    path : Path
-        Path to the data
+    path : Path, optional
+        Path to the data, by default PATH_LOAD_ACTUAL
+    compact : bool, optional
+        Use compact dtypes (float32, categorical zone), by default False
 
     Returns
     -------
@@ -32,21 +46,47 @@ def get_load_actual() -> pd.DataFrame:
             - zone: the zone
             - load: the load (MW)
     """
-    df = pd.read_csv(
-        PATH_LOAD_ACTUAL, index_col=0
-    )  # using first column as index (date)
+    with stage(name="read_csv") as record:
+        df = pd.read_csv(path, index_col=0)  # using first column as index (date)
+        record[OUTPUT] = df
+    with stage(name="preprocess", inputs=[df]) as record:
+        df = preprocess_load_actual(df=df)
+        record[OUTPUT] = df
+    if compact:
+        df = to_compact(df=df)
+    log_frame_memory(df=df, stage="load_actual")
+    return df
+
+
+def preprocess_load_actual(df: pd.DataFrame) -> pd.DataFrame:
+    """Preprocess raw actual load data.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Raw actual load data, index is the date.
+
+    Returns
+    -------
+    pd.DataFrame
+        Actual load data, localized to `EST`.
+    """
     # Localizing to Eastern Standard Time
     df.index = pd.to_datetime(df.index).tz_localize(tz=eastern_tz)
     return df
 
 
-def get_load_forecast() -> pd.DataFrame:
+def get_load_forecast(
+    path: Path = PATH_LOAD_FORECAST, compact: bool = False
+) -> pd.DataFrame:
     """Get forecast load data. Time zone is `EST`.
 
     Parameters
     ----------
-    path : Path
-        Path to the data
+    path : Path, optional
+        Path to the data, by default PATH_LOAD_FORECAST
+    compact : bool, optional
+        Use compact dtypes (float32, categorical zone), by default False
 
     Returns
     -------
@@ -58,10 +98,33 @@ def get_load_forecast() -> pd.DataFrame:
             - load: the load (MW)
             - vintage_date: issued date (around 11:30 AM)
     """
-    df = pd.read_csv(
-        PATH_LOAD_FORECAST, index_col=0
-    )  # use first column as index (target date of the forecast)
+    with stage(name="read_csv") as record:
+        df = pd.read_csv(
+            path, index_col=0
+        )  # use first column as index (target date of the forecast)
+        record[OUTPUT] = df
+    with stage(name="preprocess", inputs=[df]) as record:
+        df = preprocess_load_forecast(df=df)
+        record[OUTPUT] = df
+    if compact:
+        df = to_compact(df=df)
+    log_frame_memory(df=df, stage="load_forecast")
+    return df
+
+
+def preprocess_load_forecast(df: pd.DataFrame) -> pd.DataFrame:
+    """Preprocess raw forecast load data.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Raw forecast load data, index is the target date.
 
+    Returns
+    -------
+    pd.DataFrame
+        Forecast load data, localized to `EST`, without forbidden forecasts.
+    """
     # Handle dates
     df.index = pd.to_datetime(df.index)
     df[cst.VINTAGE_DATE] = pd.to_datetime(df[cst.VINTAGE_DATE])
@@ -73,7 +136,7 @@ def get_load_forecast() -> pd.DataFrame:
     df.index = df.index.tz_localize(tz=eastern_tz, ambiguous=True)
 
     # Capitalize zone
-    df[cst.ZONE] = df[cst.ZONE].apply(lambda x: x.upper())
+    df[cst.ZONE] = df[cst.ZONE].str.upper()
 
     # Remove forbidden forecasts (They must be issued before 5AM on the previous day)
     df = remove_forbidden_forecasts(df=df, duplicates_key=cst.ZONE)
@@ -81,33 +144,207 @@ def get_load_forecast() -> pd.DataFrame:
     return df
 
 
-def get_weather(force_recompute: bool) -> pd.DataFrame:
+def get_weather(
+    force_recompute: bool,
+    chunksize: Optional[int] = None,
+    compact: bool = False,
+    path: Path = PATH_WEATHER,
+    path_zones_and_stations: Path = PATH_ZONES_AND_STATIONS,
+    path_preprocessed: Path = PATH_PREPROCESSED_WEATHER,
+) -> pd.DataFrame:
     """Get weather forecast data.
 
     Parameters
     ----------
     force_recompute : bool
-        Recompute the weather dataframe instead of using saved one.
+        Recompute the weather dataframe instead of using saved one. The saved one
+        is also recomputed if `weather.csv` or `zones_and_stations.csv` changed.
+    chunksize : Optional[int], optional
+        If given, `weather.csv` is streamed by chunks of this number of rows, which
+        bounds memory usage. By default None (file is loaded at once).
+    compact : bool, optional
+        Use compact dtypes (float32, categorical zone), by default False
+    path : Path, optional
+        Weather forecasts, by default PATH_WEATHER
+    path_zones_and_stations : Path, optional
+        Stations weights, by default PATH_ZONES_AND_STATIONS
+    path_preprocessed : Path, optional
+        Folder of the saved weather dataframe, by default PATH_PREPROCESSED_WEATHER
+
+    Returns
+    -------
+    pd.DataFrame
+        - index: (date (EST), zone)
+        - columns: a column per weather feature
+    """
+    fingerprint = get_fingerprint(paths=[path, path_zones_and_stations])
+    if not force_recompute:
+        with stage(name="load_cache") as record:
+            df = load_frame(path=path_preprocessed, fingerprint=fingerprint)
+            record[OUTPUT] = df
+        if df is not None:
+            return _finalize_weather(df=df, compact=compact)
+
+    df = get_weather_records(
+        chunksize=chunksize,
+        path=path,
+        path_zones_and_stations=path_zones_and_stations,
+    )
+
+    with stage(name="aggregate_weather_record", inputs=[df]) as record:
+        aggregated_df = aggregate_weather_record(df=df)
+        record[OUTPUT] = aggregated_df
+
+    with stage(name="save_cache"):
+        save_frame(df=aggregated_df, path=path_preprocessed, fingerprint=fingerprint)
+
+    return _finalize_weather(df=aggregated_df, compact=compact)
+
+
+def _finalize_weather(df: pd.DataFrame, compact: bool) -> pd.DataFrame:
+    """Cast preprocessed weather to compact dtypes if required, and log its memory.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Preprocessed weather.
+    compact : bool
+        Use compact dtypes (float32, categorical zone).
+
+    Returns
+    -------
+    pd.DataFrame
+        Preprocessed weather.
+    """
+    if compact:
+        df = to_compact(df=df)
+    log_frame_memory(df=df, stage="weather")
+    return df
+
+
+def get_weather_records(
+    chunksize: Optional[int] = None,
+    path: Path = PATH_WEATHER,
+    path_zones_and_stations: Path = PATH_ZONES_AND_STATIONS,
+) -> pd.DataFrame:
+    """Get weather forecasts per station, before aggregation. Time zone is `EST`.
+
+    Parameters
+    ----------
+    chunksize : Optional[int], optional
+        If given, `weather.csv` is streamed by chunks of this number of rows.
+        Forbidden and outdated forecasts are removed from each chunk, and chunks
+        are regularly merged into the kept records, dropping the forecasts they
+        supersede, so that memory is bounded by the kept records and not by the
+        file. Columns unused by the aggregation are also dropped. By default None.
+    path : Path, optional
+        Path to the weather data, by default PATH_WEATHER
+    path_zones_and_stations : Path, optional
+        Path to the stations weights, by default PATH_ZONES_AND_STATIONS
 
     Returns
     -------
     pd.DataFrame
         - index: date (EST)
         - columns:
+            - station_code
+            - vintage_date
             - zone
             - weight: weight of the station in the zone
             - a column per weather feature
     """
-    if PATH_PREPROCESSED_WEATHER.exists() and not force_recompute:
-        return get_preprocessed_weather()
-
-    df = pd.read_csv(
-        PATH_WEATHER, index_col=1, low_memory=False
-    )  # using second column as index (target date of the forecast)
     df_zones_and_stations = pd.read_csv(
-        PATH_ZONES_AND_STATIONS, index_col=1
+        path_zones_and_stations, index_col=1
     )  # using station code as index
 
+    if chunksize is None:
+        with stage(name="read_csv") as record:
+            df = pd.read_csv(
+                path, index_col=1, low_memory=False
+            )  # using second column as index (target date of the forecast)
+            record[OUTPUT] = df
+        with stage(name="localize_weather_dates", inputs=[df]):
+            df = localize_weather_dates(df=df)
+
+        # Remove forbidden forecasts (They must be issued before 5AM on the previous
+        # day)
+        with stage(name="remove_forbidden_forecasts", inputs=[df]) as record:
+            df = remove_forbidden_forecasts(df=df, duplicates_key=cst.STATION_CODE)
+            record[OUTPUT] = df
+    else:
+        with stage(name="read_csv_by_chunks") as record:
+            df = None
+            chunks = []  # Reduced chunks, not merged in `df` yet
+            n_rows = 0
+            for chunk in pd.read_csv(path, index_col=1, chunksize=chunksize):
+                chunk = localize_weather_dates(df=chunk)
+                chunk = chunk[
+                    [
+                        cst.STATION_CODE,
+                        cst.VINTAGE_DATE,
+                        *cst.SELECTED_WEATHER_FEATURES,
+                    ]
+                ]
+                chunks.append(
+                    remove_forbidden_forecasts(
+                        df=chunk, duplicates_key=cst.STATION_CODE
+                    )
+                )
+                n_rows += len(chunks[-1])
+                # Merging once reduced chunks outnumber the kept records bounds
+                # memory to twice the kept records plus one chunk, for a total
+                # merge time linear in the number of rows
+                if n_rows >= max(chunksize, 0 if df is None else len(df)):
+                    df = _merge_weather_chunks(df=df, chunks=chunks)
+                    chunks = []
+                    n_rows = 0
+            df = _merge_weather_chunks(df=df, chunks=chunks)
+            record[OUTPUT] = df
+
+    # Add zone. Note: index gets duplicated here because some stations are used for
+    # multiple zones.
+    with stage(name="join_stations", inputs=[df]) as record:
+        df = df.join(other=df_zones_and_stations, on=cst.STATION_CODE, how="left")
+        record[OUTPUT] = df
+    return df
+
+
+def _merge_weather_chunks(
+    df: Optional[pd.DataFrame], chunks: List[pd.DataFrame]
+) -> pd.DataFrame:
+    """Merge chunks of weather records into the kept records.
+
+    Parameters
+    ----------
+    df : Optional[pd.DataFrame]
+        Kept records, None before the first merge.
+    chunks : List[pd.DataFrame]
+        Records of the next chunks, in file order.
+
+    Returns
+    -------
+    pd.DataFrame
+        Kept records, records of later chunks replacing the ones of previous chunks.
+    """
+    frames = chunks if df is None else [df, *chunks]
+    if len(frames) == 1:
+        return frames[0]
+    return drop_older_forecasts(df=pd.concat(frames), duplicates_key=cst.STATION_CODE)
+
+
+def localize_weather_dates(df: pd.DataFrame) -> pd.DataFrame:
+    """Parse weather dates, given in UTC, and convert them to `EST`.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Raw weather data, index is the target date.
+
+    Returns
+    -------
+    pd.DataFrame
+        Weather data with localized index and vintage date.
+    """
     # Localize in UTC
     df.index = pd.to_datetime(df.index, utc=True)
     df[cst.VINTAGE_DATE] = pd.to_datetime(df[cst.VINTAGE_DATE], utc=True)
@@ -115,31 +352,22 @@ def get_weather(force_recompute: bool) -> pd.DataFrame:
     # Convert to EST time (original timezone is UTC)
     df.index = df.index.tz_convert(tz=eastern_tz)
     df[cst.VINTAGE_DATE] = df[cst.VINTAGE_DATE].dt.tz_convert(tz=eastern_tz)
-
-    # Remove forbidden forecasts (They must be issued before 5AM on the previous day)
-    df = remove_forbidden_forecasts(df=df, duplicates_key=cst.STATION_CODE)
-
-    # Add zone. Note: index gets duplicated here because some stations are used for
-    # multiple zones.
-    df = df.join(other=df_zones_and_stations, on=cst.STATION_CODE, how="left")
-
-    aggregated_df = aggregate_weather_record(df=df)
-
-    aggregated_df.to_csv(path_or_buf=PATH_PREPROCESSED_WEATHER)
-
-    return aggregated_df
+    return df
 
 
 def get_preprocessed_weather() -> pd.DataFrame:
-    """Get weather data from a preprocessed csv file.
+    """Get weather data from the preprocessed cache, whether it is up to date or not.
 
     Returns
     -------
     pd.DataFrame
         The preprocessed weather data.
     """
-    df = pd.read_csv(PATH_PREPROCESSED_WEATHER, index_col=0, low_memory=False)
-    df.index = pd.to_datetime(df.index)
+    df = load_frame(path=PATH_PREPROCESSED_WEATHER)
+    if df is None:
+        raise FileNotFoundError(
+            f"No preprocessed weather found in {PATH_PREPROCESSED_WEATHER}"
+        )
     return df
 
 
@@ -170,18 +398,37 @@ def remove_forbidden_forecasts(df: pd.DataFrame, duplicates_key: str) -> pd.Data
     df = df[df[cst.VINTAGE_DATE] < last_valid_date]
 
     # Only keep most recent prevision
-    df["tmp_col"] = df.index
-    df = df.drop_duplicates(subset=["tmp_col", duplicates_key], keep="last").drop(
-        "tmp_col", axis="columns"
-    )
+    return drop_older_forecasts(df=df, duplicates_key=duplicates_key)
 
-    return df
+
+def drop_older_forecasts(df: pd.DataFrame, duplicates_key: str) -> pd.DataFrame:
+    """Drop duplicated forecasts, keeping the last one (most recent).
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The DataFrame, index is the target date.
+    duplicates_key : str
+        Key used, along with the index, to identify duplicates.
+
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame without duplicates.
+    """
+    duplicated = pd.MultiIndex.from_arrays([df.index, df[duplicates_key]]).duplicated(
+        keep="last"
+    )
+    return df[~duplicated]
 
 
 def aggregate_weather_record(df: pd.DataFrame) -> pd.DataFrame:
     """Weighs forecasts according to column `weight`.
 
-    Then sum and divide by sum of weights.
+    Then sum and divide by sum of weights. The aggregation is vectorized: weighted
+    features and weights are summed in a single groupby pass. Weights are
+    renormalized per feature, so a station with a missing value (e.g. wind speed
+    `NG`) does not contribute to the denominator of that feature.
 
     Parameters
     ----------
@@ -192,9 +439,65 @@ def aggregate_weather_record(df: pd.DataFrame) -> pd.DataFrame:
     -------
     pd.DataFrame
         Dataframe with aggregated values.
+        - index: (delivery_ts, zone)
+        - columns: a column per weather feature
     """
-    # Cast wind speed to float
-    # (missing values are indicated with a string, therefore the column has object type)
+    # Replace missing values (indicated with the string `NG`, so that columns having
+    # some have object type) with nan in every feature, and cast features to float
+    values = (
+        df[cst.SELECTED_WEATHER_FEATURES]
+        .replace(to_replace=cst.NG, value=np.nan)
+        .to_numpy(dtype=float)
+    )
+    weights = df[cst.WEIGHT].to_numpy(dtype=float)[:, np.newaxis]
+
+    # Weigh features, and keep track of the weights of available values only
+    available = ~np.isnan(values)
+    weighted_values = np.where(available, values * weights, 0.0)
+    available_weights = np.where(available, weights, 0.0)
+
+    n_features = len(cst.SELECTED_WEATHER_FEATURES)
+    weight_columns = [
+        f"{cst.WEIGHT}_{feature}" for feature in cst.SELECTED_WEATHER_FEATURES
+    ]
+    sums = (
+        pd.DataFrame(
+            data=np.hstack([weighted_values, available_weights]),
+            index=df.index,
+            columns=[*cst.SELECTED_WEATHER_FEATURES, *weight_columns],
+        )
+        .groupby(by=[df.index, df[cst.ZONE]])
+        .sum()
+    )
+    sums.index.names = [cst.DELIVERY_TS, cst.ZONE]
+
+    # Divide by sum of weights (nan if no station has a value)
+    sums_array = sums.to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        aggregated = sums_array[:, :n_features] / sums_array[:, n_features:]
+    return pd.DataFrame(
+        data=aggregated, index=sums.index, columns=cst.SELECTED_WEATHER_FEATURES
+    )
+
+
+def _aggregate_weather_record_apply(df: pd.DataFrame) -> pd.DataFrame:
+    """Aggregate weather records with a non-vectorized `groupby().apply`.
+
+    Only kept as the reference of tests and benchmarks. Note that weights are not
+    renormalized when a value is missing, and that rows with wind speed `NG` are
+    discarded entirely.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Dataframe to aggregate.
+
+    Returns
+    -------
+    pd.DataFrame
+        Dataframe with aggregated values.
+    """
+    df = df.copy()
     df[df[cst.WSP] == cst.NG] = np.nan
     df[cst.WSP] = df[cst.WSP].astype(float)
 
@@ -211,8 +514,9 @@ def aggregate_weather_record(df: pd.DataFrame) -> pd.DataFrame:
 
 def get_merged_dataset(
     df_weather: pd.DataFrame,
-    df_load_actual: pd.DataFrame,
+    df_load_actual: Optional[pd.DataFrame],
     df_load_forecast: pd.DataFrame,
+    compact: bool = False,
 ) -> pd.DataFrame:
     """Merge all datasets in one.
 
@@ -220,26 +524,45 @@ def get_merged_dataset(
     ----------
     df_weather : pd.DataFrame
         Weather data
-    df_load_actual : pd.DataFrame
-        Actual load data
+    df_load_actual : Optional[pd.DataFrame]
+        Actual load data. None when actual load is not known yet (predictions), in
+        which case the merged DataFrame has no `load` column.
     df_load_forecast : pd.DataFrame
         Forecast load data
+    compact : bool, optional
+        Use compact dtypes (float32, categorical zone), by default False. Inputs
+        are cast if they were not loaded in compact mode.
 
     Returns
     -------
     pd.DataFrame
         Merged DataFrame.
     """
-    # Merge load and load forecast
-    df_merged = pd.merge(
-        left=df_load_forecast,
-        right=df_load_actual,
-        on=[cst.DELIVERY_TS, cst.ZONE],
-        how="inner",
-    )
-    # Two columns have the same name, we need to rename them after the merging operation
-    renaming_dict = {f"{cst.LOAD}_x": cst.LOAD_FORECAST, f"{cst.LOAD}_y": cst.LOAD}
-    df_merged = df_merged.rename(columns=renaming_dict)
+    if compact:
+        frames = [
+            to_compact(df=df)
+            for df in [df_weather, df_load_actual, df_load_forecast]
+            if df is not None
+        ]
+        harmonize_zone_categories(frames=frames)
+        df_weather, df_load_forecast = frames[0], frames[-1]
+        if df_load_actual is not None:
+            df_load_actual = frames[1]
+
+    if df_load_actual is None:
+        df_merged = df_load_forecast.rename(columns={cst.LOAD: cst.LOAD_FORECAST})
+    else:
+        # Merge load and load forecast
+        df_merged = pd.merge(
+            left=df_load_forecast,
+            right=df_load_actual,
+            on=[cst.DELIVERY_TS, cst.ZONE],
+            how="inner",
+        )
+        # Two columns have the same name, we need to rename them after the merging
+        # operation
+        renaming_dict = {f"{cst.LOAD}_x": cst.LOAD_FORECAST, f"{cst.LOAD}_y": cst.LOAD}
+        df_merged = df_merged.rename(columns=renaming_dict)
 
     # Merge the result with weather data
     df_merged = pd.merge(
@@ -248,4 +571,5 @@ def get_merged_dataset(
 
     # Drop nan values
     df_merged = df_merged.dropna(how="any", axis="index")
+    log_frame_memory(df=df_merged, stage="merged")
     return df_merged
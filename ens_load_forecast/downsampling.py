@@ -0,0 +1,221 @@
+"""Module to downsample time series before plotting them.
+
+Plotting every hourly point of every zone over years serializes hundreds of
+thousands of points in the figure. Since a screen cannot show more than a few
+points per pixel, series are downsampled to a number of buckets matching the width
+of the plot:
+- `min_max_indices` keeps the minimum and the maximum of each bucket, in time
+  order, so peaks are preserved exactly (default),
+- `lttb_indices` keeps one point per bucket, the one forming the largest triangle
+  with its neighbours (Largest-Triangle-Three-Buckets), which follows the shape of
+  the series with half the points.
+
+`TimeSeriesPyramid` precomputes min/max levels of a series, each with `factor`
+times fewer points than the previous one, so that the points of any visible range
+are sliced from the right level without scanning the whole series (e.g. to
+re-aggregate a plot when zooming).
+"""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+MIN_MAX = "min_max"
+LTTB = "lttb"
+
+
+def min_max_indices(y: np.ndarray, n_buckets: int) -> np.ndarray:
+    """Get the indices of the minimum and maximum of each bucket of a series.
+
+    Parameters
+    ----------
+    y : np.ndarray
+        Values of the series (missing values are ignored).
+    n_buckets : int
+        Number of buckets of consecutive points, of (almost) equal sizes.
+
+    Returns
+    -------
+    np.ndarray
+        Sorted indices of kept points, at most `2 * n_buckets` (all indices if the
+        series is not longer).
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n_points = len(y)
+    if n_points <= 2 * n_buckets:
+        return np.arange(n_points)
+    starts = np.linspace(0, n_points, n_buckets + 1).astype(np.int64)[:-1]
+    buckets = np.repeat(np.arange(n_buckets), np.diff(np.append(starts, n_points)))
+    indices = []
+    for reduce in [np.fmin, np.fmax]:
+        extrema = reduce.reduceat(y, starts)
+        matches = np.flatnonzero(y == extrema[buckets])
+        # First match of each bucket (buckets whose values are all missing have none)
+        _, first = np.unique(buckets[matches], return_index=True)
+        indices.append(matches[first])
+    return np.unique(np.concatenate(indices))
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Get the indices of points kept by Largest-Triangle-Three-Buckets.
+
+    The first and last points are kept, the others are split in `n_out - 2`
+    buckets. In each bucket, the point forming the largest triangle with the point
+    kept in the previous bucket and the mean of the next bucket is kept. Missing
+    values are dropped first.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        Increasing positions of the points (e.g. timestamps as integers).
+    y : np.ndarray
+        Values of the points.
+    n_out : int
+        Number of points to keep (at least 3).
+
+    Returns
+    -------
+    np.ndarray
+        Sorted indices of kept points.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    valid = np.flatnonzero(~np.isnan(y))
+    if len(valid) <= n_out or n_out < 3:
+        return valid
+    x, y = x[valid], y[valid]
+    n_points = len(y)
+    edges = np.linspace(1, n_points - 1, n_out - 1).astype(np.int64)
+    # Mean of each bucket, the last point being the bucket after the last one
+    counts = np.diff(edges)
+    mean_x = np.append(np.add.reduceat(x[1:-1], edges[:-1] - 1) / counts, x[-1])
+    mean_y = np.append(np.add.reduceat(y[1:-1], edges[:-1] - 1) / counts, y[-1])
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n_points - 1
+    for bucket in range(n_out - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        previous = kept[bucket]
+        # Twice the area of the triangles (previous, point, next bucket mean)
+        areas = np.abs(
+            (x[previous] - mean_x[bucket + 1]) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (mean_y[bucket + 1] - y[previous])
+        )
+        kept[bucket + 1] = start + np.argmax(areas)
+    return valid[kept]
+
+
+def downsample(
+    x: np.ndarray, y: np.ndarray, n_buckets: int, method: str = MIN_MAX
+) -> np.ndarray:
+    """Get the indices of the points of a series kept for plotting.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        Increasing positions of the points (e.g. timestamps as integers).
+    y : np.ndarray
+        Values of the points.
+    n_buckets : int
+        Number of buckets, e.g. the width of the plot in pixels.
+    method : str, optional
+        `min_max` (2 points per bucket) or `lttb` (1 point per bucket), by default
+        MIN_MAX
+
+    Returns
+    -------
+    np.ndarray
+        Sorted indices of kept points.
+    """
+    if method == MIN_MAX:
+        return min_max_indices(y=y, n_buckets=n_buckets)
+    if method == LTTB:
+        return lttb_indices(x=x, y=y, n_out=n_buckets)
+    raise ValueError(f"Unknown downsampling method: {method}")
+
+
+class TimeSeriesPyramid:
+    """Min/max levels of a time series, to plot any range with bounded points.
+
+    Level 0 is the series itself, level `k` keeps the minimum and maximum of
+    buckets of `2 * factor ** k` consecutive points (and the first and last
+    points), so it has `factor ** k` times fewer points, until buckets are fewer
+    than `min_buckets`.
+
+    Parameters
+    ----------
+    series : pd.Series
+        Values, indexed by increasing dates.
+    factor : int, optional
+        Ratio of the number of points of consecutive levels, by default 2
+    min_buckets : int, optional
+        Number of buckets of the coarsest level, at least, by default 100
+    """
+
+    def __init__(  # noqa: D107 (disable ruff: missing docstring)
+        self, series: pd.Series, factor: int = 2, min_buckets: int = 100
+    ) -> None:
+        self.index = series.index
+        self.values = series.to_numpy(dtype=np.float64)
+        self.factor = factor
+        self.levels: List[np.ndarray] = [np.arange(len(self.values))]
+        bucket_size = 2 * factor
+        while len(self.values) / bucket_size >= min_buckets:
+            indices = min_max_indices(
+                y=self.values, n_buckets=int(np.ceil(len(self.values) / bucket_size))
+            )
+            # The first and last points are kept, so that the series is not cut
+            self.levels.append(np.union1d(indices, [0, len(self.values) - 1]))
+            bucket_size *= factor
+
+    def get_points(
+        self,
+        start: Optional[pd.Timestamp] = None,
+        end: Optional[pd.Timestamp] = None,
+        max_points: int = 2000,
+    ) -> Tuple[pd.Index, np.ndarray]:
+        """Get the points of a range, from the finest level having few enough.
+
+        If even the coarsest level has too many points in the range, they are
+        downsampled again with `min_max_indices`.
+
+        Parameters
+        ----------
+        start : Optional[pd.Timestamp], optional
+            Start of the range, by default None (start of the series)
+        end : Optional[pd.Timestamp], optional
+            End of the range, by default None (end of the series)
+        max_points : int, optional
+            Maximum number of points in the range (at least 2), by default 2000
+            (e.g. the minimum and maximum of 1000 pixels)
+
+        Returns
+        -------
+        Tuple[pd.Index, np.ndarray]
+            Dates and values of the points, including the points just before and
+            after the range, so that lines reach the edges of the plot.
+        """
+        first = 0 if start is None else self.index.searchsorted(start, side="left")
+        last = (
+            len(self.index)
+            if end is None
+            else self.index.searchsorted(end, side="right")
+        )
+        for level in self.levels:
+            level_first = np.searchsorted(level, first, side="left")
+            level_last = np.searchsorted(level, last, side="left")
+            if level_last - level_first <= max_points or level is self.levels[-1]:
+                break
+        indices = level[level_first:level_last]
+        if len(indices) > max_points:
+            indices = indices[
+                min_max_indices(y=self.values[indices], n_buckets=max_points // 2)
+            ]
+        indices = np.concatenate(
+            [
+                level[max(level_first - 1, 0) : level_first],
+                indices,
+                level[level_last : level_last + 1],
+            ]
+        )
+        return self.index[indices], self.values[indices]
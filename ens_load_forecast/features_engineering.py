@@ -5,152 +5,94 @@ import numpy as np
 import pandas as pd
 
 import ens_load_forecast.constants as cst
+from ens_load_forecast.memory import log_frame_memory
 
 
-def process_wind_direction(df: pd.DataFrame) -> pd.DataFrame:
-    """Split wind direction in cos and sin of wind direction.
+def extract_feature_matrix(
+    df: pd.DataFrame, dtype: np.dtype = np.float64
+) -> np.ndarray:
+    """Compute all features in one pass, as a float matrix.
 
-    Parameters
-    ----------
-    df : pd.DataFrame
-        Dataframe containing a column `wdr`.
-
-    Returns
-    -------
-    pd.DataFrame
-        DataFrame with split wind direction.
-    """
-    df_copy = df.copy()
-    # first convert in rad
-    df_copy[cst.WDR] = df_copy[cst.WDR] * np.pi / 180
-
-    # add cos and sin
-    df_copy[cst.COS_WDR] = np.cos(df_copy[cst.WDR])
-    df_copy[cst.SIN_WDR] = np.sin(df_copy[cst.WDR])
-    df_copy = df_copy.drop(labels=[cst.WDR], axis="columns")
-    return df_copy
-
-
-def add_month(df: pd.DataFrame) -> pd.DataFrame:
-    """Add one-hot-encoded day of the week.
+    Calendar one-hots are computed from the index components, so that every
+    month/day/time of day column exists even if the data does not contain it.
 
     Parameters
     ----------
     df : pd.DataFrame
-        DataFrame, index is the target date.
+        Merged DataFrame, index is the target date.
+    dtype : np.dtype, optional
+        Float type of the matrix, by default np.float64
 
     Returns
     -------
-    pd.DataFrame
-        DataFrame with one-hot-encoded day of the week.
+    np.ndarray
+        Matrix of shape (len(df), len(FEATURES_LIST)), columns ordered as
+        `FEATURES_LIST`.
     """
-    df_copy = df.copy()
-    # Create a column with day names (Monday, Tuesday, ...)
-    df_copy[cst.MONTH] = df_copy.index.month_name()
-
-    # One-hot-encode
-    df_copy = pd.get_dummies(
-        data=df_copy, columns=[cst.MONTH], prefix_sep="_", dtype=int
-    )
-    return df_copy
-
-
-def add_day_of_week(df: pd.DataFrame) -> pd.DataFrame:
-    """Add one-hot-encoded day of the week.
-
-    Parameters
-    ----------
-    df : pd.DataFrame
-        DataFrame, index is the target date.
-
-    Returns
-    -------
-    pd.DataFrame
-        DataFrame with one-hot-encoded day of the week.
-    """
-    df_copy = df.copy()
-    # Create a column with day names (Monday, Tuesday, ...)
-    df_copy[cst.DAY_OF_WEEK] = df_copy.index.day_name()
-
-    # One-hot-encode
-    df_copy = pd.get_dummies(
-        data=df_copy, columns=[cst.DAY_OF_WEEK], prefix_sep="_", dtype=int
-    )
-    return df_copy
-
-
-def add_time_of_day(df: pd.DataFrame) -> pd.DataFrame:
-    """Add one-hot-encoded time of day (Morning, working_hours, Evening).
-
-    Parameters
-    ----------
-    df : pd.DataFrame
-        DataFrame, index is the target date.
-
-    Returns
-    -------
-    pd.DataFrame
-        DataFrame with one-hot-encoded time of day.
-    """
-    df_copy = df.copy()
-
-    def get_time_of_day(hour):
-        if hour < 7:
-            return cst.MORNING
-        if hour >= 7 and hour < 19:
-            return cst.WORKING_HOURS
-        return cst.EVENING
-
-    # Create a column with time of day names (Morning, working_hours, Evening)
-    df_copy[f"{cst.TIME_OF_DAY}_as_int"] = df_copy.index.hour
-    df_copy[cst.TIME_OF_DAY] = df_copy[f"{cst.TIME_OF_DAY}_as_int"].apply(
-        get_time_of_day
-    )
-    df_copy = df_copy.drop(labels=[f"{cst.TIME_OF_DAY}_as_int"], axis="columns")
-
-    # One-hot-encode
-    df_copy = pd.get_dummies(
-        data=df_copy, columns=[cst.TIME_OF_DAY], prefix_sep="_", dtype=int
-    )
-    return df_copy
-
-
-def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
-    """Normalize columns.
-
-    Parameters
-    ----------
-    df : pd.DataFrame
-        Dataframe
-
-    Returns
-    -------
-    pd.DataFrame
-        Dataframe with some columns normalized
-    """
-    df_copy = df.copy()
-    for column in cst.PERCENT_FEATURES:
-        df_copy[column] = df_copy[column] / 100
-    return df_copy
-
-
-def extract_features(df: pd.DataFrame) -> pd.DataFrame:
+    n_rows = len(df)
+    matrix = np.zeros(shape=(n_rows, len(cst.FEATURES_LIST)), dtype=dtype)
+    position = {feature: i for i, feature in enumerate(cst.FEATURES_LIST)}
+
+    # Continuous features, percents are normalized
+    for feature in [cst.LOAD_FORECAST, cst.TMP, cst.DPT, cst.WSP, cst.GST]:
+        matrix[:, position[feature]] = df[feature].to_numpy()
+    for feature in cst.PERCENT_FEATURES:
+        matrix[:, position[feature]] = df[feature].to_numpy() / 100
+
+    # Wind direction, converted to rad, split in cos and sin
+    wind_direction = df[cst.WDR].to_numpy() * np.pi / 180
+    matrix[:, position[cst.COS_WDR]] = np.cos(wind_direction)
+    matrix[:, position[cst.SIN_WDR]] = np.sin(wind_direction)
+
+    # One-hot-encoded calendar features
+    rows = np.arange(n_rows)
+    hours = df.index.hour.to_numpy()
+    time_of_day = np.digitize(hours, bins=[7, 19])  # Morning, working_hours, Evening
+    for first_column, codes in [
+        (f"{cst.MONTH}_{cst.MONTH_NAMES[0]}", df.index.month.to_numpy() - 1),
+        (f"{cst.DAY_OF_WEEK}_{cst.DAY_NAMES[0]}", df.index.dayofweek.to_numpy()),
+        (f"{cst.TIME_OF_DAY}_{cst.DAY_TIMES[0]}", time_of_day),
+    ]:
+        matrix[rows, position[first_column] + codes] = 1
+    return matrix
+
+
+def extract_features(df: pd.DataFrame, compact: bool = False) -> pd.DataFrame:
     """Extract all features.
 
+    Columns of `df` are kept in their order, without being copied, and the wind
+    direction is dropped. Percent features are replaced by their normalized values,
+    and the other features of `FEATURES_LIST` are added after them.
+
     Parameters
     ----------
     df : pd.DataFrame
         DataFrame.
+    compact : bool, optional
+        Use compact dtypes (float32 features, int8 one-hots), by default False
 
     Returns
     -------
     pd.DataFrame
-        DataFrame with all features
+        DataFrame with all features (columns of `FEATURES_LIST`), and the other
+        columns of `df` (e.g. zone, load).
     """
-    df_copy = df.copy()
-    df_copy = add_month(df=df_copy)
-    df_copy = add_time_of_day(df=df_copy)
-    df_copy = add_day_of_week(df=df_copy)
-    df_copy = process_wind_direction(df=df_copy)
-    df_copy = normalize_columns(df=df_copy)
-    return df_copy
+    dtype = np.float32 if compact else np.float64
+    matrix = extract_feature_matrix(df=df, dtype=dtype)
+    # Shallow copy: columns of `df` are shared, and dropping or replacing one of
+    # them does not change `df`
+    df_features = df.copy(deep=False)
+    del df_features[cst.WDR]
+    for i, feature in enumerate(cst.FEATURES_LIST):
+        if (
+            feature in df.columns
+            and feature not in cst.PERCENT_FEATURES
+            and df[feature].dtype == dtype
+        ):
+            continue
+        values = matrix[:, i]
+        if compact and feature in cst.CALENDAR_FEATURES:
+            values = values.astype(np.int8)
+        df_features[feature] = values
+    log_frame_memory(df=df_features, stage="features")
+    return df_features
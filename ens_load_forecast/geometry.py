@@ -0,0 +1,173 @@
+"""Module loading the zone boundaries plotted on maps.
+
+`map_data.geojson` holds the full-resolution boundaries of the NYISO zones
+(2.3 MB). Reading it with geopandas and sending it to Plotly on every map made each
+choropleth slow to build and heavy to render, while a map is only a few hundred
+pixels wide. `get_zone_geometry` instead returns simplified boundaries:
+- they are computed once per tolerance, with `shapely.coverage_simplify` (shapely
+  >= 2.1) which simplifies each boundary shared by two zones once, so that zones
+  still share their edges (no gaps nor overlaps). With older versions of shapely,
+  each zone is simplified on its own with `preserve_topology=True`, so that
+  neighbouring zones may slightly overlap.
+- they are saved in a JSON file of `data/map_cache/`, with the fingerprint of
+  `map_data.geojson` (recomputed when it changes), and kept in memory.
+
+The GeoJSON dictionary is given to Plotly as is, so a repeated map only joins the
+plotted data with the zones.
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from ens_load_forecast.cache import get_fingerprint
+from ens_load_forecast.paths import PATH_MAP_CACHE, PATH_MAP_DATA
+
+logger = logging.getLogger(__name__)
+
+GEOMETRY_FORMAT_VERSION = 1
+# Tolerance of the simplification, in degrees (about 500 m)
+DEFAULT_TOLERANCE = 0.005
+
+_geometries: Dict[Tuple[str, float], Dict[str, Any]] = {}
+
+
+def simplify_geometry(geojson: Dict[str, Any], tolerance: float) -> Dict[str, Any]:
+    """Simplify the polygons of a GeoJSON feature collection, preserving topology.
+
+    Polygons are made valid first (rings of `map_data.geojson` cross themselves),
+    and exterior rings of the simplified polygons are clockwise, as in the source
+    file and as expected by Plotly.
+
+    Parameters
+    ----------
+    geojson : Dict[str, Any]
+        Feature collection of (multi)polygons, covering an area without overlaps.
+    tolerance : float
+        Maximum distance between the original and simplified boundaries, in the
+        unit of the coordinates.
+
+    Returns
+    -------
+    Dict[str, Any]
+        Feature collection with the same features and properties, and simplified
+        geometries.
+    """
+    import shapely
+    from shapely.geometry import MultiPolygon, mapping, shape
+    from shapely.geometry.polygon import orient
+
+    geometries = [
+        _get_polygons(geometry=shapely.make_valid(shape(feature["geometry"])))
+        for feature in geojson["features"]
+    ]
+    if hasattr(shapely, "coverage_simplify"):
+        simplified = shapely.coverage_simplify(geometries, tolerance=tolerance)
+    else:
+        simplified = shapely.simplify(
+            geometries, tolerance=tolerance, preserve_topology=True
+        )
+    features = []
+    for feature, geometry in zip(geojson["features"], simplified):
+        if geometry.geom_type == "MultiPolygon":
+            geometry = MultiPolygon(
+                [orient(part, sign=-1.0) for part in geometry.geoms]
+            )
+        else:
+            geometry = orient(geometry, sign=-1.0)
+        features.append({**feature, "geometry": mapping(geometry)})
+    return {**geojson, "features": features}
+
+
+def _get_polygons(geometry: Any) -> Any:
+    """Get the union of the polygons of a geometry, dropping lines and points.
+
+    Parameters
+    ----------
+    geometry : Any
+        Shapely geometry, e.g. a geometry collection returned by `make_valid`.
+
+    Returns
+    -------
+    Any
+        Shapely polygon or multipolygon.
+    """
+    import shapely
+
+    parts = [
+        part
+        for part in shapely.get_parts(geometry)
+        if part.geom_type in ["Polygon", "MultiPolygon"]
+    ]
+    return shapely.union_all(parts)
+
+
+def get_zone_geometry(
+    tolerance: float = DEFAULT_TOLERANCE,
+    path: Path = PATH_MAP_DATA,
+    path_cache: Optional[Path] = PATH_MAP_CACHE,
+) -> Dict[str, Any]:
+    """Get the (simplified) boundaries of the zones, computed once per tolerance.
+
+    Parameters
+    ----------
+    tolerance : float, optional
+        Tolerance of the simplification, in degrees, by default DEFAULT_TOLERANCE
+        (0: full resolution)
+    path : Path, optional
+        GeoJSON file of the zones, by default PATH_MAP_DATA
+    path_cache : Optional[Path], optional
+        Folder of the simplified boundaries, by default PATH_MAP_CACHE (None: only
+        kept in memory)
+
+    Returns
+    -------
+    Dict[str, Any]
+        GeoJSON feature collection, each feature having the zone in its `id`
+        property. It is shared between calls and must not be modified.
+    """
+    path = Path(path)
+    fingerprint = get_fingerprint(paths=[path])
+    key = (str(path.resolve()), float(tolerance))
+    if key in _geometries and _geometries[key]["fingerprint"] == fingerprint:
+        return _geometries[key]["geojson"]
+
+    # Full-resolution boundaries are read from the source file directly
+    path_file = (
+        None
+        if path_cache is None or tolerance <= 0
+        else Path(path_cache) / f"{path.stem}_{float(tolerance):g}.json"
+    )
+    record = None
+    if path_file is not None and path_file.exists():
+        with open(path_file, "r", encoding="utf-8") as file:
+            record = json.load(file)
+        if (
+            record.get("version") != GEOMETRY_FORMAT_VERSION
+            or record.get("fingerprint") != fingerprint
+        ):
+            record = None
+    if record is None:
+        with open(path, "r", encoding="utf-8") as file:
+            geojson = json.load(file)
+        if tolerance > 0:
+            geojson = simplify_geometry(geojson=geojson, tolerance=tolerance)
+        record = {
+            "version": GEOMETRY_FORMAT_VERSION,
+            "fingerprint": fingerprint,
+            "tolerance": float(tolerance),
+            "geojson": geojson,
+        }
+        if path_file is not None:
+            path_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(path_file, "w", encoding="utf-8") as file:
+                json.dump(record, file, separators=(",", ":"))
+            logger.info(
+                "Saved the boundaries of %s simplified with tolerance %g (%d bytes)",
+                path.name,
+                tolerance,
+                path_file.stat().st_size,
+            )
+    _geometries[key] = record
+    return record["geojson"]
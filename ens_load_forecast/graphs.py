@@ -1,24 +1,42 @@
-"""Module implementing graphs."""
+"""Module implementing graphs.
 
-from typing import Any
+Plotly (and shapely, to simplify the zone boundaries once, see `geometry`) are
+imported by the functions using them, so that importing the package does not pay
+for them.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
 
-import geopandas as gpd
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 
 import ens_load_forecast.constants as cst
-from ens_load_forecast.paths import PATH_MAP_DATA
+from ens_load_forecast.aggregates import get_aggregates, get_zone_statistics
+from ens_load_forecast.downsampling import MIN_MAX, TimeSeriesPyramid, downsample
+from ens_load_forecast.geometry import DEFAULT_TOLERANCE, get_zone_geometry
 from ens_load_forecast.plot_params import (
     EQUAL_ASPECT_RATIO_LAYOUT,
     MAP_LAYOUT,
-    TRANSPARENT_RED_MARKERS,
+    SAMPLE_MARKERS,
+)
+from ens_load_forecast.streaming_statistics import (
+    SAMPLE_COLUMNS,
+    ZoneMoments,
+    ZoneReservoir,
 )
 
 
-def plot_load_per_zone(df: pd.DataFrame, **kwargs: Any) -> None:
+def plot_load_per_zone(
+    df: pd.DataFrame,
+    width_pixels: Optional[int] = 1000,
+    method: str = MIN_MAX,
+    resample_on_zoom: bool = False,
+    **kwargs: Any,
+) -> None:
     """Plot load evolution for each zone.
 
+    Series are downsampled to `width_pixels` buckets (see `downsampling`), so that
+    the size of the figure does not grow with the history.
+
     Parameters
     ----------
     df : pd.DataFrame
@@ -26,17 +44,43 @@ def plot_load_per_zone(df: pd.DataFrame, **kwargs: Any) -> None:
         Expected columns:
         - "zone"
         - "load"
-
+    width_pixels : Optional[int], optional
+        Number of buckets of each series, e.g. the width of the plot in pixels, by
+        default 1000. None to plot every point.
+    method : str, optional
+        Downsampling method, `min_max` (keeps peaks) or `lttb`, by default MIN_MAX
+    resample_on_zoom : bool, optional
+        Display a `FigureWidget` whose series are downsampled again for the visible
+        range after each zoom, from a `TimeSeriesPyramid` of each zone (min/max
+        buckets, `method` is ignored), by default False
     **kwargs : Any
         Extra arguments for plotly.
     """
+    import plotly.graph_objects as go
+
+    series = {
+        zone: df.loc[df[cst.ZONE] == zone, cst.LOAD] for zone in df[cst.ZONE].unique()
+    }
+    if resample_on_zoom:
+        if width_pixels is None:
+            raise ValueError("`width_pixels` is required to resample on zoom.")
+        _plot_resampled_on_zoom(series=series, max_points=2 * width_pixels, **kwargs)
+        return
+
     fig = go.Figure()
-    for zone in df[cst.ZONE].unique():
-        zone_df = df[df[cst.ZONE] == zone]
+    for zone, zone_series in series.items():
+        if width_pixels is not None:
+            indices = downsample(
+                x=zone_series.index.asi8,
+                y=zone_series.to_numpy(),
+                n_buckets=width_pixels,
+                method=method,
+            )
+            zone_series = zone_series.iloc[indices]
         fig.add_trace(
             go.Scatter(
-                x=zone_df.index,
-                y=zone_df[cst.LOAD],
+                x=zone_series.index,
+                y=zone_series,
                 name=zone,
             )
         )
@@ -44,27 +88,111 @@ def plot_load_per_zone(df: pd.DataFrame, **kwargs: Any) -> None:
     fig.show()
 
 
-def plot_load_seasonal(df: pd.DataFrame, zone: str, **kwargs: Any) -> None:
+def _plot_resampled_on_zoom(
+    series: Dict[str, pd.Series], max_points: int, **kwargs: Any
+) -> None:
+    """Display load series, downsampled for the visible range on each zoom.
+
+    Parameters
+    ----------
+    series : Dict[str, pd.Series]
+        Load of each zone.
+    max_points : int
+        Maximum number of points of each series in the visible range.
+    **kwargs : Any
+        Extra arguments for plotly.
+    """
+    import plotly.graph_objects as go
+    from IPython.display import display
+
+    pyramids = {zone: TimeSeriesPyramid(series=s) for zone, s in series.items()}
+    fig = go.FigureWidget()
+    for zone, pyramid in pyramids.items():
+        x, y = pyramid.get_points(max_points=max_points)
+        fig.add_trace(go.Scatter(x=x, y=y, name=zone))
+    fig.update_layout(yaxis={"ticksuffix": "MW"}, **kwargs)
+
+    def update_points(layout: Any, x_range: Optional[Tuple[Any, Any]]) -> None:
+        with fig.batch_update():
+            for trace, pyramid in zip(fig.data, pyramids.values()):
+                start, end = (
+                    (None, None)
+                    if x_range is None
+                    else [
+                        _get_axis_timestamp(value=value, tz=pyramid.index.tz)
+                        for value in x_range
+                    ]
+                )
+                trace.x, trace.y = pyramid.get_points(
+                    start=start, end=end, max_points=max_points
+                )
+
+    fig.layout.on_change(update_points, "xaxis.range")
+    display(fig)
+
+
+def _get_axis_timestamp(value: Any, tz: Any) -> pd.Timestamp:
+    """Convert a bound of a plotly date axis to a timestamp of the series.
+
+    Parameters
+    ----------
+    value : Any
+        Bound of the axis (plotly gives dates as naive strings).
+    tz : Any
+        Time zone of the series, None if naive.
+
+    Returns
+    -------
+    pd.Timestamp
+        Bound, in the time zone of the series.
+    """
+    timestamp = pd.Timestamp(value)
+    if tz is not None and timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize(
+            tz=tz, ambiguous=True, nonexistent="shift_forward"
+        )
+    return timestamp
+
+
+def plot_load_seasonal(
+    df: Optional[pd.DataFrame],
+    zone: str,
+    aggregates: Optional[Dict[str, pd.DataFrame]] = None,
+    statistic: str = cst.LOAD,
+    **kwargs: Any,
+) -> None:
     """Plot a heatmap showing averaged data on a grid.
 
     With
-    - x-axis: day of year
+    - x-axis: day of year (of a leap year, days without data are left blank)
     - y-axis: hour of day.
 
     Parameters
     ----------
-    df : pd.DataFrame
-        The load data
+    df : Optional[pd.DataFrame]
+        The load data (ignored if `aggregates` are given)
     zone : str
         The zone
+    aggregates : Optional[Dict[str, pd.DataFrame]], optional
+        Aggregates of the data (see `compute_aggregates`), by default None (computed
+        once per DataFrame, see `get_aggregates`)
+    statistic : str, optional
+        Column of the seasonal aggregates to plot (`load`, `count`, `bias`, `mae`
+        or `rmse`), by default cst.LOAD
     **kwargs : Any
         Extra arguments for plotly.
     """
-    load_df = df[df[cst.ZONE] == zone].drop(labels="zone", axis="columns")
-    load_df[cst.DAY_OF_YEAR] = load_df.index.dayofyear
-    load_df[cst.HOUR] = load_df.index.hour
-    average_seasonal_load = load_df.groupby([cst.DAY_OF_YEAR, cst.HOUR]).mean()
-    load_array = average_seasonal_load[cst.LOAD].to_numpy().reshape((366, 24)).T
+    import plotly.express as px
+
+    if aggregates is None:
+        aggregates = get_aggregates(df=df)
+    load_array = (
+        aggregates[cst.SEASONAL]
+        .loc[zone, statistic]
+        .to_numpy()
+        .reshape((cst.DAYS_IN_LEAP_YEAR, 24))
+        .T
+    )
     # Create a day of year axis (from a leap year)
     x_axis_date = pd.Series(pd.date_range(start="2000-01-01", end="2000-12-31")).apply(
         lambda x: f"{x.month_name()} {x.day}"
@@ -81,22 +209,41 @@ def plot_load_seasonal(df: pd.DataFrame, zone: str, **kwargs: Any) -> None:
     fig.show()
 
 
-def plot_on_map(df: pd.DataFrame, quantity_key: str, **kwargs: Any) -> None:
+def plot_on_map(
+    df: pd.DataFrame,
+    quantity_key: str,
+    aggregates: Optional[Dict[str, pd.DataFrame]] = None,
+    tolerance: float = DEFAULT_TOLERANCE,
+    **kwargs: Any,
+) -> None:
     """Represent a quantity on a map (NYISO) using a color gradient.
 
     Parameters
     ----------
     df : pd.DataFrame
-        DataFrame with at least a `zone` column.
+        DataFrame with at least a `zone` column. If it has several rows per zone
+        (e.g. hourly data), the statistics of each zone are plotted instead (see
+        `get_zone_statistics`), `quantity_key` being one of their columns.
     quantity_key : str
         Name of DataFrame column used to color the map.
+    aggregates : Optional[Dict[str, pd.DataFrame]], optional
+        Aggregates of the data, used if `df` has several rows per zone, by default
+        None (computed once per DataFrame, see `get_aggregates`)
+    tolerance : float, optional
+        Tolerance of the simplification of the zone boundaries, in degrees, by
+        default DEFAULT_TOLERANCE (0: full resolution, see `get_zone_geometry`)
     **kwargs : Any
         Extra arguments for plotly.
     """
-    geo_data = gpd.read_file(PATH_MAP_DATA)
+    import plotly.express as px
+
+    if df[cst.ZONE].duplicated().any():
+        df = get_zone_statistics(
+            aggregates=get_aggregates(df=df) if aggregates is None else aggregates
+        )
     fig = px.choropleth(
         data_frame=df,
-        geojson=geo_data,
+        geojson=get_zone_geometry(tolerance=tolerance),
         locations=cst.ZONE,
         featureidkey="properties.id",
         color=quantity_key,
@@ -107,17 +254,32 @@ def plot_on_map(df: pd.DataFrame, quantity_key: str, **kwargs: Any) -> None:
     fig.show()
 
 
-def correlation_heatmap(df: pd.DataFrame, **kwargs: Any) -> None:
+def correlation_heatmap(
+    df: Optional[pd.DataFrame] = None,
+    correlations: Optional[pd.DataFrame] = None,
+    zone: str = cst.GLOBAL,
+    **kwargs: Any,
+) -> None:
     """Plot a correlation heatmap.
 
     Parameters
     ----------
-    df : pd.DataFrame
-        Features DataFrame
+    df : Optional[pd.DataFrame], optional
+        Features DataFrame, used if `correlations` is not given, by default None
+    correlations : Optional[pd.DataFrame], optional
+        Correlations of each zone (see `compute_feature_statistics`), by default
+        None (computed from `df`)
+    zone : str, optional
+        Zone of the correlations, by default `global` (all rows together)
     **kwargs : Any
         Extra arguments for plotly.
     """
-    correlations = df[[*cst.FEATURES_LIST, cst.LOAD]].corr(method="pearson")
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    if correlations is None:
+        correlations = ZoneMoments().partial_fit(df=df).get_correlations()
+    correlations = correlations.loc[zone]
 
     heatmap = go.Heatmap(
         z=correlations,
@@ -132,31 +294,85 @@ def correlation_heatmap(df: pd.DataFrame, **kwargs: Any) -> None:
     fig.show()
 
 
-def scatter_matrix(df: pd.DataFrame, **kwargs: Any) -> None:
-    """Plot a scatter matrix.
+def load_correlation_heatmap(
+    df: Optional[pd.DataFrame] = None,
+    correlations: Optional[pd.DataFrame] = None,
+    **kwargs: Any,
+) -> None:
+    """Plot the correlations of the features with the load, for all zones at once.
 
     Parameters
     ----------
-    df : pd.DataFrame
-        Features DataFrame.
+    df : Optional[pd.DataFrame], optional
+        Features DataFrame, used if `correlations` is not given, by default None
+    correlations : Optional[pd.DataFrame], optional
+        Correlations of each zone (see `compute_feature_statistics`), by default
+        None (computed from `df`)
+    **kwargs : Any
+        Extra arguments for plotly.
+    """
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    if correlations is None:
+        correlations = ZoneMoments().partial_fit(df=df).get_correlations()
+    # One row per zone (and `global`), one column per feature
+    load_correlations = (
+        correlations[cst.LOAD]
+        .unstack(level=cst.ZONE)
+        .T.reindex(
+            index=correlations.index.get_level_values(cst.ZONE).unique(),
+            columns=correlations.columns.drop(cst.LOAD),
+        )
+    )
+
+    heatmap = go.Heatmap(
+        z=load_correlations,
+        x=load_correlations.columns,
+        y=load_correlations.index,
+        colorscale=px.colors.diverging.RdBu,
+        zmin=-1,
+        zmax=1,
+    )
+    fig = go.Figure(heatmap)
+    fig.update_layout(**kwargs)
+    fig.show()
+
+
+def scatter_matrix(
+    df: Optional[pd.DataFrame] = None,
+    sample: Optional[pd.DataFrame] = None,
+    zones: Optional[List[str]] = None,
+    **kwargs: Any,
+) -> None:
+    """Plot a scatter matrix of sampled rows, colored by zone.
+
+    The number of points only depends on the number of zones, not on the length
+    of the history.
+
+    Parameters
+    ----------
+    df : Optional[pd.DataFrame], optional
+        Features DataFrame, used if `sample` is not given, by default None
+    sample : Optional[pd.DataFrame], optional
+        Rows sampled in each zone (see `compute_feature_statistics`), by default
+        None (DEFAULT_SAMPLE_SIZE rows per zone sampled from `df`)
+    zones : Optional[List[str]], optional
+        Zones to plot, by default None (all zones)
     **kwargs : Any
         Extra arguments for plotly.
     """
-    features_to_plot = [
-        cst.LOAD_FORECAST,
-        cst.TMP,
-        cst.DPT,
-        cst.SKY,
-        cst.WSP,
-        cst.GST,
-        cst.PSN,
-        cst.COS_WDR,
-        cst.SIN_WDR,
-        cst.LOAD,
-    ]
+    import plotly.express as px
+
+    if sample is None:
+        sample = ZoneReservoir().partial_fit(df=df).get_sample()
+    if zones is not None:
+        sample = sample[sample[cst.ZONE].isin(zones)]
     fig = px.scatter_matrix(
-        df[features_to_plot],
+        sample,
+        dimensions=[column for column in SAMPLE_COLUMNS if column in sample.columns],
+        color=cst.ZONE,
     )
-    fig.update_traces(marker=TRANSPARENT_RED_MARKERS)
+    fig.update_traces(marker=SAMPLE_MARKERS)
     fig.update_layout(**EQUAL_ASPECT_RATIO_LAYOUT, **kwargs)
     fig.show()
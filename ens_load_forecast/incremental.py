@@ -0,0 +1,424 @@
+"""Module to update the merged dataset incrementally, as new data is received.
+
+Source csv files are expected to grow by appending rows. For each source, the
+byte offset of the last processed row is recorded, so that a daily update only
+parses and preprocesses the new rows. Station records, load forecasts and actual
+loads are persisted after deduplication (latest valid vintage only), so that only
+the delivery dates impacted by new rows are re-aggregated and re-merged.
+The watermark of each source (latest stored date) tells which new rows are
+appended as they are (later dates), and which may replace stored rows. As when
+the whole file is read, a new row replaces the stored row of the same date and
+key, whatever their vintages. `python -m ens_load_forecast update` runs an update.
+If a source file was rewritten instead of appended to, or if
+`zones_and_stations.csv` changed, everything is rebuilt.
+"""
+
+import hashlib
+import io
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import ens_load_forecast.constants as cst
+from ens_load_forecast.cache import get_fingerprint, load_frame, save_frame
+from ens_load_forecast.data_preprocessing import (
+    aggregate_weather_record,
+    drop_older_forecasts,
+    get_merged_dataset,
+    localize_weather_dates,
+    preprocess_load_actual,
+    preprocess_load_forecast,
+    remove_forbidden_forecasts,
+)
+from ens_load_forecast.paths import (
+    PATH_INCREMENTAL,
+    PATH_LOAD_ACTUAL,
+    PATH_LOAD_FORECAST,
+    PATH_WEATHER,
+    PATH_ZONES_AND_STATIONS,
+)
+
+STATE_FILE = "state.json"
+LOAD_ACTUAL = "load_actual"
+WEATHER_RECORDS = "weather_records"
+MERGED = "merged"
+CHECKSUM_WINDOW = 65536  # bytes preceding the offset used to detect rewrites
+
+
+def update_merged_dataset(
+    force_rebuild: bool = False,
+    paths: Optional[Dict[str, Path]] = None,
+    path: Path = PATH_INCREMENTAL,
+) -> pd.DataFrame:
+    """Update the persisted merged dataset with rows appended to source files.
+
+    Parameters
+    ----------
+    force_rebuild : bool, optional
+        Rebuild the dataset from scratch, by default False
+    paths : Optional[Dict[str, Path]], optional
+        Source files, with keys `load_actual`, `load_forecast`, `weather` and
+        `zones_and_stations` (missing keys use the default paths), by default None
+    path : Path, optional
+        Folder of the persisted sources, merged dataset and update state, by
+        default PATH_INCREMENTAL
+
+    Returns
+    -------
+    pd.DataFrame
+        Merged DataFrame (see `get_merged_dataset`), sorted by date and zone.
+    """
+    paths = {
+        LOAD_ACTUAL: PATH_LOAD_ACTUAL,
+        cst.LOAD_FORECAST: PATH_LOAD_FORECAST,
+        "weather": PATH_WEATHER,
+        "zones_and_stations": PATH_ZONES_AND_STATIONS,
+        **(paths or {}),
+    }
+    path = Path(path)
+    state = _load_state(path=path)
+    zones_fingerprint = get_fingerprint(paths=[paths["zones_and_stations"]])
+    sources = {
+        LOAD_ACTUAL: Path(paths[LOAD_ACTUAL]),
+        cst.LOAD_FORECAST: Path(paths[cst.LOAD_FORECAST]),
+        WEATHER_RECORDS: Path(paths["weather"]),
+    }
+    if (
+        force_rebuild
+        or state is None
+        or state["zones_and_stations"] != zones_fingerprint
+        or not all(
+            _is_appended(path=source_path, source_state=state["sources"].get(name))
+            for name, source_path in sources.items()
+        )
+    ):
+        state = {"zones_and_stations": zones_fingerprint, "sources": {}}
+        frames = {name: None for name in [*sources, MERGED]}
+    else:
+        frames = {
+            name: load_frame(path=path / name, mmap=False)
+            for name in [*sources, MERGED]
+        }
+
+    # Read and preprocess new rows only, then append them to the stored ones
+    new_rows = {}
+    read_rows = False
+    for name, source_path in sources.items():
+        df, state["sources"][name] = _read_new_rows(
+            path=source_path,
+            source_state=state["sources"].get(name),
+            index_col=1 if name == WEATHER_RECORDS else 0,
+        )
+        if df is None:
+            continue
+        read_rows = True
+        df, duplicates_key = _preprocess_new_rows(name=name, df=df)
+        df = drop_older_forecasts(df=df, duplicates_key=duplicates_key)
+        if len(df) == 0:
+            continue
+        frames[name] = _append_rows(
+            df_stored=frames[name],
+            df_new=df,
+            duplicates_key=duplicates_key,
+            source_state=state["sources"][name],
+        )
+        new_rows[name] = df
+        _update_watermark(df=df, source_state=state["sources"][name])
+
+    # Recompute merged rows of impacted delivery dates
+    if len(new_rows) != 0:
+        new_indexes = [df.index for df in new_rows.values()]
+        impacted_ts = new_indexes[0].append(new_indexes[1:]).unique()
+        frames[MERGED] = _update_merged_rows(
+            frames=frames,
+            impacted_ts=impacted_ts,
+            path_zones_and_stations=paths["zones_and_stations"],
+        )
+        for name in [*new_rows, MERGED]:
+            if frames[name] is not None:
+                save_frame(df=frames[name], path=path / name)
+    if read_rows:
+        _save_state(state=state, path=path)
+
+    return frames[MERGED]
+
+
+def _append_rows(
+    df_stored: Optional[pd.DataFrame],
+    df_new: pd.DataFrame,
+    duplicates_key: str,
+    source_state: Dict[str, Any],
+) -> pd.DataFrame:
+    """Append new rows to a stored source, replacing the rows they update.
+
+    New rows dated after the `last_delivery_ts` watermark are appended as they are,
+    and only stored rows from the first earlier new date on are searched for rows
+    to replace.
+
+    Parameters
+    ----------
+    df_stored : Optional[pd.DataFrame]
+        Stored rows (None if there is none), index is the target date.
+    df_new : pd.DataFrame
+        New rows, without duplicates.
+    duplicates_key : str
+        Key used, along with the index, to identify duplicates.
+    source_state : Dict[str, Any]
+        State of the source, with the watermark of the previous update (if any).
+
+    Returns
+    -------
+    pd.DataFrame
+        Stored rows not replaced, followed by the new rows.
+    """
+    if df_stored is None or "last_delivery_ts" not in source_state:
+        return df_new
+    late = df_new.index <= pd.Timestamp(source_state["last_delivery_ts"])
+    if late.any():
+        tail = np.flatnonzero(df_stored.index >= df_new.index[late].min())
+        stored_keys = pd.MultiIndex.from_arrays(
+            [df_stored.index[tail], df_stored[duplicates_key].to_numpy()[tail]]
+        )
+        new_keys = pd.MultiIndex.from_arrays(
+            [df_new.index[late], df_new[duplicates_key].to_numpy()[late]]
+        )
+        kept = np.ones(len(df_stored), dtype=bool)
+        kept[tail[stored_keys.isin(new_keys)]] = False
+        if not kept.all():
+            df_stored = df_stored[kept]
+    return pd.concat([df_stored, df_new])
+
+
+def _update_watermark(df: pd.DataFrame, source_state: Dict[str, Any]) -> None:
+    """Move the watermark of a source to include appended rows.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Appended rows, index is the target date.
+    source_state : Dict[str, Any]
+        State of the source, updated in place with `last_delivery_ts`, the latest
+        target date of stored rows.
+    """
+    last_delivery_ts = df.index.max()
+    if "last_delivery_ts" in source_state:
+        last_delivery_ts = max(
+            last_delivery_ts, pd.Timestamp(source_state["last_delivery_ts"])
+        )
+    source_state["last_delivery_ts"] = str(last_delivery_ts)
+
+
+def _preprocess_new_rows(name: str, df: pd.DataFrame) -> Tuple[pd.DataFrame, str]:
+    """Preprocess rows read from a source file.
+
+    Parameters
+    ----------
+    name : str
+        Name of the source.
+    df : pd.DataFrame
+        Raw rows.
+
+    Returns
+    -------
+    Tuple[pd.DataFrame, str]
+        Preprocessed rows, and the key identifying duplicates along with the date.
+    """
+    if name == LOAD_ACTUAL:
+        return preprocess_load_actual(df=df), cst.ZONE
+    if name == cst.LOAD_FORECAST:
+        return preprocess_load_forecast(df=df), cst.ZONE
+
+    df = localize_weather_dates(df=df)
+    # Only keep columns used in the aggregation, and cast features to float
+    features = (
+        df[cst.SELECTED_WEATHER_FEATURES]
+        .replace(to_replace=cst.NG, value=np.nan)
+        .astype(float)
+    )
+    df = pd.concat([df[[cst.STATION_CODE, cst.VINTAGE_DATE]], features], axis=1)
+    df = remove_forbidden_forecasts(df=df, duplicates_key=cst.STATION_CODE)
+    return df, cst.STATION_CODE
+
+
+def _update_merged_rows(
+    frames: Dict[str, Optional[pd.DataFrame]],
+    impacted_ts: pd.DatetimeIndex,
+    path_zones_and_stations: Path = PATH_ZONES_AND_STATIONS,
+) -> pd.DataFrame:
+    """Recompute merged rows for the given delivery dates.
+
+    Parameters
+    ----------
+    frames : Dict[str, Optional[pd.DataFrame]]
+        Deduplicated sources, and the previous merged dataset (or None).
+    impacted_ts : pd.DatetimeIndex
+        Delivery dates to recompute.
+    path_zones_and_stations : Path, optional
+        Stations weights, by default PATH_ZONES_AND_STATIONS
+
+    Returns
+    -------
+    pd.DataFrame
+        Updated merged dataset, sorted by date and zone.
+    """
+    if any(
+        frames[name] is None
+        for name in [LOAD_ACTUAL, cst.LOAD_FORECAST, WEATHER_RECORDS]
+    ):
+        return frames[MERGED]
+
+    df_zones_and_stations = pd.read_csv(
+        path_zones_and_stations, index_col=1
+    )  # using station code as index
+    records = frames[WEATHER_RECORDS]
+    records = records[records.index.isin(impacted_ts)]
+    df_weather = aggregate_weather_record(
+        df=records.join(other=df_zones_and_stations, on=cst.STATION_CODE, how="left")
+    )
+    df_load_actual = frames[LOAD_ACTUAL]
+    df_load_forecast = frames[cst.LOAD_FORECAST]
+    df_merged = get_merged_dataset(
+        df_weather=df_weather,
+        df_load_actual=df_load_actual[df_load_actual.index.isin(impacted_ts)],
+        df_load_forecast=df_load_forecast[df_load_forecast.index.isin(impacted_ts)],
+    )
+
+    if frames[MERGED] is None:
+        return df_merged.sort_values(by=[cst.DELIVERY_TS, cst.ZONE], kind="stable")
+    # Previous rows are sorted by date, those before the first impacted date are
+    # kept as they are
+    previous = frames[MERGED]
+    start = previous.index.searchsorted(impacted_ts.min())
+    tail = previous.iloc[start:]
+    tail = pd.concat([tail[~tail.index.isin(impacted_ts)], df_merged])
+    return pd.concat(
+        [
+            previous.iloc[:start],
+            tail.sort_values(by=[cst.DELIVERY_TS, cst.ZONE], kind="stable"),
+        ]
+    )
+
+
+def _read_new_rows(
+    path: Path, source_state: Optional[Dict[str, Any]], index_col: int
+) -> Tuple[Optional[pd.DataFrame], Dict[str, Any]]:
+    """Read rows appended to a csv file since the last update.
+
+    Parameters
+    ----------
+    path : Path
+        Path to the csv file.
+    source_state : Optional[Dict[str, Any]]
+        State of the source after the last update, None to read the whole file.
+    index_col : int
+        Column used as index.
+
+    Returns
+    -------
+    Tuple[Optional[pd.DataFrame], Dict[str, Any]]
+        New rows (None if there is none) and the updated source state.
+    """
+    with open(path, mode="rb") as file:
+        header = file.readline()
+        offset = len(header) if source_state is None else source_state["offset"]
+        file.seek(0, io.SEEK_END)
+        size = file.tell()
+        file.seek(offset)
+        data = file.read(size - offset)
+    new_state = {} if source_state is None else dict(source_state)
+    new_state["offset"] = size
+    new_state["checksum"] = _get_checksum(path=path, offset=size)
+    if len(data.strip()) == 0:
+        return None, new_state
+
+    columns = pd.read_csv(io.BytesIO(header)).columns
+    df = pd.read_csv(
+        io.BytesIO(data),
+        header=None,
+        names=columns,
+        index_col=index_col,
+        low_memory=False,
+    )
+    return df, new_state
+
+
+def _get_checksum(path: Path, offset: int) -> str:
+    """Hash the bytes of a file preceding an offset.
+
+    Parameters
+    ----------
+    path : Path
+        Path to the file.
+    offset : int
+        Offset (in bytes).
+
+    Returns
+    -------
+    str
+        Hexadecimal digest.
+    """
+    start = max(0, offset - CHECKSUM_WINDOW)
+    with open(path, mode="rb") as file:
+        file.seek(start)
+        return hashlib.sha256(file.read(offset - start)).hexdigest()
+
+
+def _is_appended(path: Path, source_state: Optional[Dict[str, Any]]) -> bool:
+    """Check whether a file was only appended to since the last update.
+
+    Parameters
+    ----------
+    path : Path
+        Path to the file.
+    source_state : Optional[Dict[str, Any]]
+        State of the source after the last update.
+
+    Returns
+    -------
+    bool
+        True if already processed bytes are unchanged.
+    """
+    if source_state is None or not path.exists():
+        return False
+    offset = source_state["offset"]
+    if path.stat().st_size < offset:
+        return False
+    return _get_checksum(path=path, offset=offset) == source_state["checksum"]
+
+
+def _load_state(path: Path = PATH_INCREMENTAL) -> Optional[Dict[str, Any]]:
+    """Load the state of the last update.
+
+    Parameters
+    ----------
+    path : Path, optional
+        Folder of the incremental dataset, by default PATH_INCREMENTAL
+
+    Returns
+    -------
+    Optional[Dict[str, Any]]
+        State, or None if no update was done yet.
+    """
+    path = Path(path) / STATE_FILE
+    if not path.exists():
+        return None
+    with open(path, mode="r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def _save_state(state: Dict[str, Any], path: Path = PATH_INCREMENTAL) -> None:
+    """Save the state of the last update.
+
+    Parameters
+    ----------
+    state : Dict[str, Any]
+        State to save.
+    path : Path, optional
+        Folder of the incremental dataset, by default PATH_INCREMENTAL
+    """
+    Path(path).mkdir(parents=True, exist_ok=True)
+    with open(Path(path) / STATE_FILE, mode="w", encoding="utf-8") as file:
+        json.dump(obj=state, fp=file, indent=4)
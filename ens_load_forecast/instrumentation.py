@@ -0,0 +1,230 @@
+"""Module to measure the pipeline stages and report them.
+
+Each stage is run within the `stage` context manager, which records its wall time,
+CPU time, peak RSS increase, input and output rows and output memory. Stages can be
+nested, their names are then joined with `/` (e.g. `get_weather/read_csv`).
+Records are logged as JSON and gathered in a run report (see `get_report`). If a
+profile folder is given to `reset`, top-level stages are also profiled with
+`cProfile`, one `.prof` file per stage.
+"""
+
+import cProfile
+import json
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+import pandas as pd
+
+from ens_load_forecast.memory import get_frame_memory
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Key of a stage record where the caller puts the output of the stage
+OUTPUT = "output"
+
+_state: Dict[str, Any] = {
+    "records": [],
+    "stack": [],
+    "profile_dir": None,
+    "deep_memory": False,
+    "start": time.perf_counter(),
+}
+
+
+def reset(profile_dir: Optional[Path] = None, deep_memory: bool = False) -> None:
+    """Start a new run report.
+
+    Parameters
+    ----------
+    profile_dir : Optional[Path], optional
+        Folder where a cProfile dump of each top-level stage is written, by default
+        None (no profiling)
+    deep_memory : bool, optional
+        Include the memory of strings in the memory of outputs (see
+        `get_frame_memory`), by default False
+    """
+    _state["records"] = []
+    _state["stack"] = []
+    _state["profile_dir"] = None if profile_dir is None else Path(profile_dir)
+    _state["deep_memory"] = deep_memory
+    _state["start"] = time.perf_counter()
+
+
+@contextmanager
+def stage(
+    name: str, inputs: Optional[Iterable[pd.DataFrame]] = None
+) -> Iterator[Dict[str, Any]]:
+    """Measure a stage and add it to the run report.
+
+    The output of the stage can be given by setting the `output` key of the yielded
+    record, to record its number of rows and memory.
+
+    Parameters
+    ----------
+    name : str
+        Name of the stage.
+    inputs : Optional[Iterable[pd.DataFrame]], optional
+        Input DataFrames, to record their number of rows, by default None
+
+    Yields
+    ------
+    Iterator[Dict[str, Any]]
+        Record of the stage.
+    """
+    stack = _state["stack"]
+    profile_dir = _state["profile_dir"] if len(stack) == 0 else None
+    full_name = get_stage_name(name=name)
+    stack.append(name)
+    try:
+        with measure(name=full_name, inputs=inputs, profile_dir=profile_dir) as record:
+            yield record
+    finally:
+        stack.pop()
+    add_record(record=record)
+
+
+@contextmanager
+def measure(
+    name: str,
+    inputs: Optional[Iterable[pd.DataFrame]] = None,
+    profile_dir: Optional[Path] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Measure a stage, without adding it to the run report.
+
+    Used in worker processes, whose records are sent back to the main process and
+    added with `add_record`.
+
+    Parameters
+    ----------
+    name : str
+        Name of the stage.
+    inputs : Optional[Iterable[pd.DataFrame]], optional
+        Input DataFrames, to record their number of rows, by default None
+    profile_dir : Optional[Path], optional
+        Folder where a cProfile dump of the stage is written, by default None
+
+    Yields
+    ------
+    Iterator[Dict[str, Any]]
+        Record of the stage, completed when the stage ends:
+        - stage: name
+        - wall_seconds, cpu_seconds: wall and CPU time of the current process
+        - peak_rss_delta_bytes: increase of the peak resident memory of the
+          process (0 if the peak was reached before the stage)
+        - rows_in: total rows of the inputs, if given
+        - rows_out, memory_out_bytes: rows and memory of the output, if set (strings
+          excluded, unless `deep_memory` is given to `reset`)
+    """
+    record: Dict[str, Any] = {"stage": name}
+    if inputs is not None:
+        record["rows_in"] = sum(len(df) for df in inputs)
+    profiler = None
+    if profile_dir is not None:
+        profiler = cProfile.Profile()
+    peak_rss = _get_peak_rss()
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield record
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        record["wall_seconds"] = time.perf_counter() - wall_start
+        record["cpu_seconds"] = time.process_time() - cpu_start
+        record["peak_rss_delta_bytes"] = (
+            None if peak_rss is None else _get_peak_rss() - peak_rss
+        )
+        output = record.pop(OUTPUT, None)
+        if isinstance(output, pd.DataFrame):
+            record["rows_out"] = len(output)
+            record["memory_out_bytes"] = get_frame_memory(
+                df=output, deep=_state["deep_memory"]
+            )
+        if profiler is not None:
+            profile_dir.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(profile_dir / f"{name.replace('/', '.')}.prof")
+
+
+def get_stage_name(name: str) -> str:
+    """Get the full name of a stage nested in the current stages.
+
+    Parameters
+    ----------
+    name : str
+        Name of the stage.
+
+    Returns
+    -------
+    str
+        Names of the current stages and of the stage, joined with `/`.
+    """
+    return "/".join([*_state["stack"], name])
+
+
+def add_record(record: Dict[str, Any]) -> None:
+    """Add a stage record to the run report, and log it.
+
+    Parameters
+    ----------
+    record : Dict[str, Any]
+        Record of a stage (see `measure`).
+    """
+    _state["records"].append(record)
+    logger.info(json.dumps(record))
+
+
+def get_report() -> Dict[str, Any]:
+    """Get the report of the current run.
+
+    Returns
+    -------
+    Dict[str, Any]
+        Report, with keys:
+        - wall_seconds: time since the start of the run
+        - stages: records of the stages, in completion order (nested stages come
+          before their parent)
+    """
+    return {
+        "wall_seconds": time.perf_counter() - _state["start"],
+        "stages": list(_state["records"]),
+    }
+
+
+def save_report(path: Path) -> None:
+    """Save the report of the current run as JSON.
+
+    Parameters
+    ----------
+    path : Path
+        Path of the json file.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, mode="w", encoding="utf-8") as file:
+        json.dump(obj=get_report(), fp=file, indent=4)
+
+
+def _get_peak_rss() -> Optional[int]:
+    """Get the peak resident memory of the current process.
+
+    Returns
+    -------
+    Optional[int]
+        Peak resident memory (bytes), None if it cannot be measured.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Given in bytes on macOS, in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
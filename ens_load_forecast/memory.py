@@ -0,0 +1,119 @@
+"""Module to measure and reduce the memory footprint of DataFrames."""
+
+import logging
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+import ens_load_forecast.constants as cst
+
+logger = logging.getLogger(__name__)
+
+
+def get_frame_memory(df: pd.DataFrame, deep: bool = True) -> int:
+    """Get the memory used by a DataFrame, index included.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The DataFrame.
+    deep : bool, optional
+        Include the memory of strings, by default True. Measuring it reads every
+        string, while the shallow memory (object columns counted as pointers) only
+        reads the dtypes and shapes.
+
+    Returns
+    -------
+    int
+        Memory in bytes.
+    """
+    return int(df.memory_usage(index=True, deep=deep).sum())
+
+
+def log_frame_memory(df: pd.DataFrame, stage: str, deep: bool = False) -> None:
+    """Log the shape and memory of a DataFrame after a stage.
+
+    Nothing is measured when INFO messages are not logged.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The DataFrame.
+    stage : str
+        Name of the stage.
+    deep : bool, optional
+        Include the memory of strings (see `get_frame_memory`), by default False
+    """
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    logger.info(
+        "%s: %d rows, %d columns, %.1f MB",
+        stage,
+        len(df),
+        len(df.columns),
+        get_frame_memory(df=df, deep=deep) / 1e6,
+    )
+
+
+def to_compact(df: pd.DataFrame) -> pd.DataFrame:
+    """Cast a DataFrame to compact dtypes.
+
+    - float64 columns become float32.
+    - zone (column or index level) becomes categorical.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The DataFrame.
+
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame with compact dtypes.
+    """
+    dtypes = {
+        column: np.float32 for column, dtype in df.dtypes.items() if dtype == np.float64
+    }
+    if cst.ZONE in df.columns:
+        dtypes[cst.ZONE] = "category"
+    df = df.astype(dtypes)
+    if cst.ZONE in df.index.names:
+        level = df.index.names.index(cst.ZONE)
+        df.index = df.index.set_levels(
+            df.index.levels[level].astype("category"), level=level
+        )
+    return df
+
+
+def harmonize_zone_categories(frames: Iterable[pd.DataFrame]) -> None:
+    """Give the same categories to the categorical zone of several DataFrames.
+
+    Merging categorical columns with different categories would fall back to
+    objects. DataFrames are modified in place.
+
+    Parameters
+    ----------
+    frames : Iterable[pd.DataFrame]
+        DataFrames with a categorical zone column or index level.
+    """
+    frames = list(frames)
+    zone_values = []
+    for df in frames:
+        if cst.ZONE in df.columns:
+            zone_values.append(df[cst.ZONE])
+        else:
+            zone_values.append(df.index.get_level_values(cst.ZONE))
+    if not all(isinstance(values.dtype, pd.CategoricalDtype) for values in zone_values):
+        return
+    categories = sorted(
+        set().union(*(values.dtype.categories for values in zone_values))
+    )
+    for df in frames:
+        if cst.ZONE in df.columns:
+            df[cst.ZONE] = df[cst.ZONE].cat.set_categories(categories)
+        else:
+            level = df.index.names.index(cst.ZONE)
+            df.index = df.index.set_levels(
+                df.index.levels[level].set_categories(categories), level=level
+            )
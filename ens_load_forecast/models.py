@@ -1,12 +1,20 @@
 """Module used for model training."""
 
 import json
-from typing import Any, Dict, Tuple
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
 import joblib
+import numpy as np
 import pandas as pd
-from sklearn.base import BaseEstimator
-from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from joblib import Parallel, delayed, parallel_backend
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.ensemble import (
+    GradientBoostingRegressor,
+    HistGradientBoostingRegressor,
+    RandomForestRegressor,
+)
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import mean_absolute_error, mean_squared_error
 from sklearn.model_selection import train_test_split
@@ -14,7 +22,11 @@ from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import PolynomialFeatures
 
 import ens_load_forecast.constants as cst
-from ens_load_forecast.paths import PATH_SAVED_MODELS
+from ens_load_forecast.compiled_trees import compile_model
+from ens_load_forecast.instrumentation import add_record, get_stage_name, measure
+from ens_load_forecast.paths import PATH_GLOBAL_MODELS, PATH_SAVED_MODELS
+from ens_load_forecast.registry import get_registry
+from ens_load_forecast.streaming_regression import StreamingLinearRegression
 
 
 class NaiveModel(BaseEstimator):
@@ -27,12 +39,150 @@ class NaiveModel(BaseEstimator):
         pass
 
     def predict(self, X):  # noqa: D102, N803
+        if isinstance(X, np.ndarray):  # columns ordered as `FEATURES_LIST`
+            return X[:, cst.FEATURES_LIST.index(cst.LOAD_FORECAST)]
         return X[cst.LOAD_FORECAST]
 
 
-def initialize_models() -> Dict[str, BaseEstimator]:
+class CalendarEncoder(BaseEstimator, TransformerMixin):
+    """Replace calendar one-hots by one integer code per calendar feature.
+
+    Inputs are ordered as `FEATURES_LIST` (extra columns after them are kept).
+    With `native_categoricals`, outputs start with the codes of the calendar
+    features (see `CALENDAR_ONE_HOTS`), followed by the other columns, so that they
+    can be given to a model supporting categorical features. Otherwise inputs are
+    returned unchanged.
+
+    Parameters
+    ----------
+    native_categoricals : bool, optional
+        Replace one-hots by codes, by default False
+    """
+
+    def __init__(  # noqa: D107 (disable ruff: missing docstring)
+        self, native_categoricals: bool = False
+    ) -> None:
+        super().__init__()
+        self.native_categoricals = native_categoricals
+
+    def fit(self, X, y=None) -> "CalendarEncoder":  # noqa: D102, N803
+        return self
+
+    def transform(self, X) -> np.ndarray:  # noqa: D102, N803
+        X = np.asarray(X, dtype=np.float64)  # noqa: N806
+        if not self.native_categoricals:
+            return X
+        codes = [
+            np.argmax(X[:, [cst.FEATURES_LIST.index(c) for c in columns]], axis=1)
+            for columns in cst.CALENDAR_ONE_HOTS.values()
+        ]
+        calendar = [cst.FEATURES_LIST.index(c) for c in cst.CALENDAR_FEATURES]
+        return np.column_stack([*codes, np.delete(X, calendar, axis=1)])
+
+    def get_categorical_features(self) -> Optional[List[int]]:
+        """Get the indices of the categorical columns of the outputs.
+
+        Returns
+        -------
+        Optional[List[int]]
+            Indices of the calendar codes, None without `native_categoricals`.
+        """
+        if not self.native_categoricals:
+            return None
+        return list(range(len(cst.CALENDAR_ONE_HOTS)))
+
+
+class GlobalModel(BaseEstimator):
+    """Model of all zones at once, the zone being one-hot encoded.
+
+    Inputs are features DataFrames containing the zone column. With
+    `scale_per_zone`, the load and the load forecast of each zone are divided by
+    the mean load of the zone in the train set, so that zones of different sizes
+    share the same scale.
+
+    Parameters
+    ----------
+    model : BaseEstimator
+        Model fitted on features of `FEATURES_LIST` followed by the zone one-hots.
+    scale_per_zone : bool, optional
+        Scale the load of each zone, by default False
+    """
+
+    def __init__(  # noqa: D107 (disable ruff: missing docstring)
+        self, model: BaseEstimator, scale_per_zone: bool = False
+    ) -> None:
+        super().__init__()
+        self.model = model
+        self.scale_per_zone = scale_per_zone
+
+    def fit(self, X, y) -> "GlobalModel":  # noqa: D102, N803
+        zones = X[cst.ZONE].astype(str).to_numpy()
+        self.zones_ = np.unique(zones)
+        self.scales_ = np.ones(len(self.zones_))
+        if self.scale_per_zone:
+            self.scales_ = (
+                pd.Series(np.asarray(y, dtype=np.float64))
+                .groupby(by=zones)
+                .mean()
+                .reindex(self.zones_)
+                .to_numpy()
+            )
+        features, scales = self._transform(X=X)
+        self.model.fit(features, np.asarray(y, dtype=np.float64) / scales)
+        return self
+
+    def predict(self, X):  # noqa: D102, N803
+        features, scales = self._transform(X=X)
+        return self.model.predict(features) * scales
+
+    def _transform(
+        self, X: pd.DataFrame  # noqa: N803
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Get model inputs (features then zone one-hots) and load scales of rows."""
+        zones = X[cst.ZONE].astype(str).to_numpy()
+        codes = np.searchsorted(self.zones_, zones)
+        codes[codes == len(self.zones_)] = 0
+        unknown = self.zones_[codes] != zones
+        if unknown.any():
+            raise ValueError(f"Unknown zones: {sorted(set(zones[unknown]))}")
+        scales = self.scales_[codes]
+        features = get_model_inputs(df=X).to_numpy(dtype=np.float64, copy=True)
+        features[:, cst.FEATURES_LIST.index(cst.LOAD_FORECAST)] /= scales
+        one_hots = np.zeros((len(X), len(self.zones_)))
+        one_hots[np.arange(len(X)), codes] = 1.0
+        return np.hstack([features, one_hots]), scales
+
+
+def initialize_models(
+    random_state: int = 0,
+    n_jobs: int = 1,
+    params: Optional[Dict[str, Dict[str, Any]]] = None,
+    streaming_linear: bool = False,
+) -> Dict[str, BaseEstimator]:
     """Initialize models.
 
+    Parameters
+    ----------
+    random_state : int, optional
+        Seed of the randomized models, by default 0
+    n_jobs : int, optional
+        Number of threads used by the random forest, by default 1
+    params : Optional[Dict[str, Dict[str, Any]]], optional
+        Hyperparameters overriding the default ones, per model name, given as
+        `set_params` arguments (e.g. `{"gradient_boosting_model":
+        {"gradient_boosting_model__n_estimators": 200}}`), by default None. Calendar
+        features are given as native categorical features to the histogram-based
+        gradient boosting with `{"hist_gradient_boosting_model":
+        {"calendar_encoder__native_categoricals": True}}`.
+    streaming_linear : bool, optional
+        Fit the linear and polynomial models with `StreamingLinearRegression`,
+        without building the polynomial features, by default False. Linear
+        coefficients are those of `LinearRegression`. Polynomial ones can differ
+        where expanded features are collinear (products of one-hots, `cos_wdr ** 2
+        + sin_wdr ** 2 = 1`): the minimum norm least squares solution is returned,
+        while `LinearRegression` can return huge opposite coefficients with a
+        slightly higher squared error.
+
     Returns
     -------
     Dict[str, Any]
@@ -41,6 +191,7 @@ def initialize_models() -> Dict[str, BaseEstimator]:
         - linear_model
         - polynomial_model
         - gradient_boosting_model
+        - hist_gradient_boosting_model
         - radom_forest_model
     """
     naive_model = NaiveModel()  # Scaling unwanted here
@@ -57,37 +208,94 @@ def initialize_models() -> Dict[str, BaseEstimator]:
             ("linear_regression", LinearRegression(fit_intercept=True)),
         ]
     )
+    if streaming_linear:
+        # Fitted chunk by chunk, polynomial features being expanded per chunk
+        linear_model.set_params(
+            linear_model=StreamingLinearRegression(degree=1, keep_statistics=False)
+        )
+        polynomial_model.set_params(
+            polynomial_features="passthrough",
+            linear_regression=StreamingLinearRegression(
+                degree=2, keep_statistics=False
+            ),
+        )
     gradient_boosting_model = Pipeline(
         steps=[
             # ("standard_scaler", StandardScaler()),  # Scaling does not change much
-            ("gradient_boosting_model", GradientBoostingRegressor(n_estimators=100)),
+            (
+                "gradient_boosting_model",
+                GradientBoostingRegressor(n_estimators=100, random_state=random_state),
+            ),
+        ]
+    )
+    # Multi-threaded (OpenMP), stops when the score on 10% of the train set stalls
+    hist_gradient_boosting_model = Pipeline(
+        steps=[
+            ("calendar_encoder", CalendarEncoder(native_categoricals=False)),
+            (
+                "hist_gradient_boosting_model",
+                HistGradientBoostingRegressor(
+                    max_iter=500,
+                    early_stopping=True,
+                    validation_fraction=0.1,
+                    n_iter_no_change=10,
+                    random_state=random_state,
+                ),
+            ),
         ]
     )
     random_forest_model = Pipeline(
         steps=[
             # ("standard_scaler", StandardScaler()),  # Scaling does not change much
-            ("random_forest_model", RandomForestRegressor(n_estimators=100)),
+            (
+                "random_forest_model",
+                RandomForestRegressor(
+                    n_estimators=100, random_state=random_state, n_jobs=n_jobs
+                ),
+            ),
         ]
     )
-    return {
+    models = {
         cst.NAIVE_MODEL: naive_model,
         cst.LINEAR_MODEL: linear_model,
         cst.POLYNOMIAL_MODEL: polynomial_model,
         cst.GRADIENT_BOOSTING_MODEL: gradient_boosting_model,
+        cst.HIST_GRADIENT_BOOSTING_MODEL: hist_gradient_boosting_model,
         cst.RANDOM_FOREST_MODEL: random_forest_model,
     }
+    for model_name, model_params in (params or {}).items():
+        models[model_name].set_params(**model_params)
+    # Categorical columns depend on the encoder, which may have been set above
+    hist_gradient_boosting_model.set_params(
+        hist_gradient_boosting_model__categorical_features=(
+            hist_gradient_boosting_model["calendar_encoder"].get_categorical_features()
+        )
+    )
+    return models
 
 
 def train_models_for_each_zone(
     df_features: pd.DataFrame,
     force_retrain: bool,
+    n_jobs: int = 1,
+    path: Path = PATH_SAVED_MODELS,
 ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
     """Train each model on each zone.
 
+    (zone, model) pairs are trained in parallel processes.
+
     Parameters
     ----------
     df_features : pd.DataFrame
         DataFrame containing features for all zones
+    force_retrain : bool
+        Retrain models instead of loading saved ones.
+    n_jobs : int, optional
+        Total number of cores used (-1 for all cores), shared between processes
+        and the threads of each random forest, by default 1
+    path : Path, optional
+        Folder of saved models, by default PATH_SAVED_MODELS. Hyperparameters saved
+        there for a zone (see `tuning`) are used when retraining it.
 
     Returns
     -------
@@ -97,52 +305,515 @@ def train_models_for_each_zone(
         - scores
     """
     if not force_retrain:
-        models, scores = load_saved_models()
-        if len(models) != 0:
+        models, scores = load_saved_models(path=path)
+        if any(len(zone_models) != 0 for zone_models in models.values()):
             return models, scores
     # If no model was found or retrain is forced:
-    models = {}
+    splits = split_zones(df_features=df_features)
+    zones = list(splits)
+    tasks = [(zone, model_name) for zone in zones for model_name in initialize_models()]
+    results = _run_training_tasks(
+        tasks=tasks,
+        splits=splits,
+        n_jobs=n_jobs,
+        split_params=load_hyperparameters(path=path),
+    )
+
+    models = {zone: {} for zone in zones}
+    scores = {zone: {} for zone in zones}
+    for (zone, model_name), (model, model_scores) in zip(tasks, results):
+        models[zone][model_name] = model
+        scores[zone][model_name] = model_scores
+    save_models(models=models, scores=scores, path=path)
+    return models, scores
+
+
+def split_zones(
+    df_features: pd.DataFrame, test_size: float = 0.25
+) -> Dict[str, Tuple[pd.DataFrame, pd.DataFrame]]:
+    """Split features of each zone in a train and a test set.
+
+    The last `test_size` share of each zone is used for test (no shuffling).
+
+    Parameters
+    ----------
+    df_features : pd.DataFrame
+        DataFrame containing features for all zones
+    test_size : float, optional
+        Share of the test set, by default 0.25
+
+    Returns
+    -------
+    Dict[str, Tuple[pd.DataFrame, pd.DataFrame]]
+        Train and test sets, per zone.
+    """
+    return {
+        zone: tuple(train_test_split(df_zone, test_size=test_size, shuffle=False))
+        for zone, df_zone in df_features.groupby(by=cst.ZONE, sort=False)
+    }
+
+
+def _run_training_tasks(
+    tasks: List[Tuple[Any, str]],
+    splits: Dict[Any, Tuple[pd.DataFrame, pd.DataFrame]],
+    n_jobs: int,
+    fit_only: bool = False,
+    random_state: int = 0,
+    params: Optional[Dict[str, Dict[str, Any]]] = None,
+    split_params: Optional[Dict[Any, Dict[str, Dict[str, Any]]]] = None,
+    global_model: bool = False,
+    scale_per_zone: bool = False,
+    streaming_linear: bool = False,
+) -> List[Tuple[BaseEstimator, Optional[Dict[str, Any]]]]:
+    """Train (split, model) pairs in parallel, within a core budget.
+
+    Each training is measured in its worker process, and recorded in the run report
+    as `<split key>/<model name>`. For each split key, a record sums the times of
+    its models (`fit_seconds`, `cpu_seconds`), which overlap in time. A
+    `parallel_training` record compares the elapsed time of all trainings with the
+    sum of their times:
+    - wall_seconds: time to train all (split, model) pairs
+    - sequential_seconds: sum of the wall times of the trainings, i.e. the time of
+      a sequential run (overestimated if workers compete for cores)
+    - speedup: `sequential_seconds / wall_seconds`
+
+    Parameters
+    ----------
+    tasks : List[Tuple[Any, str]]
+        Pairs of (split key, model name).
+    splits : Dict[Any, Tuple[pd.DataFrame, pd.DataFrame]]
+        Train and test sets, per split key.
+    n_jobs : int
+        Total number of cores used (-1 for all cores).
+    fit_only : bool, optional
+        Only fit models, without scoring them, by default False
+    random_state : int, optional
+        Seed of the randomized models, by default 0
+    params : Optional[Dict[str, Dict[str, Any]]], optional
+        Hyperparameters overriding the default ones (see `initialize_models`), by
+        default None
+    split_params : Optional[Dict[Any, Dict[str, Dict[str, Any]]]], optional
+        Hyperparameters overriding `params`, per split key, by default None
+    global_model : bool, optional
+        Fit `GlobalModel`s, on sets containing several zones, by default False
+    scale_per_zone : bool, optional
+        Scale the load of each zone of global models, by default False
+    streaming_linear : bool, optional
+        Fit linear models from streamed statistics (see `initialize_models`), by
+        default False
+
+    Returns
+    -------
+    List[Tuple[BaseEstimator, Optional[Dict[str, Any]]]]
+        Trained model and scores (None if `fit_only`), in the order of `tasks`.
+    """
+    n_cores = joblib.cpu_count() if n_jobs == -1 else max(1, n_jobs)
+    n_processes = min(n_cores, len(tasks))
+    # Cores left by processes are given to random forests (and BLAS/OpenMP threads)
+    n_threads = max(1, n_cores // n_processes)
+    start = time.perf_counter()
+    with parallel_backend(backend="loky", inner_max_num_threads=n_threads):
+        results = Parallel(n_jobs=n_processes)(
+            delayed(_train_model_measured)(
+                stage_name=get_stage_name(
+                    name=model_name if key is None else f"{key}/{model_name}"
+                ),
+                model_name=model_name,
+                df_train=splits[key][0],
+                df_test=None if fit_only else splits[key][1],
+                n_jobs=n_threads,
+                random_state=random_state,
+                params=merge_params(
+                    params=params, overrides=(split_params or {}).get(key)
+                ),
+                global_model=global_model,
+                scale_per_zone=scale_per_zone,
+                streaming_linear=streaming_linear,
+            )
+            for key, model_name in tasks
+        )
+    wall_seconds = time.perf_counter() - start
+
+    split_records: Dict[Any, Dict[str, Any]] = {}
+    sequential_seconds = 0.0
+    for (key, _), (_, _, record) in zip(tasks, results):
+        add_record(record=record)
+        sequential_seconds += record["wall_seconds"]
+        if key is None:
+            continue
+        if key not in split_records:
+            split_records[key] = {
+                "stage": get_stage_name(name=str(key)),
+                "rows_in": record["rows_in"],
+                "fit_seconds": 0.0,
+                "cpu_seconds": 0.0,
+            }
+        split_records[key]["fit_seconds"] += record["wall_seconds"]
+        split_records[key]["cpu_seconds"] += record["cpu_seconds"]
+    for record in split_records.values():
+        add_record(record=record)
+    add_record(
+        record={
+            "stage": get_stage_name(name="parallel_training"),
+            "tasks": len(tasks),
+            "processes": n_processes,
+            "threads_per_process": n_threads,
+            "wall_seconds": wall_seconds,
+            "sequential_seconds": sequential_seconds,
+            "speedup": sequential_seconds / wall_seconds,
+        }
+    )
+    return [(model, scores) for model, scores, _ in results]
+
+
+def merge_params(
+    params: Optional[Dict[str, Dict[str, Any]]],
+    overrides: Optional[Dict[str, Dict[str, Any]]],
+) -> Optional[Dict[str, Dict[str, Any]]]:
+    """Merge hyperparameters of each model.
+
+    Parameters
+    ----------
+    params : Optional[Dict[str, Dict[str, Any]]]
+        Hyperparameters per model name (see `initialize_models`).
+    overrides : Optional[Dict[str, Dict[str, Any]]]
+        Hyperparameters per model name, overriding `params`.
+
+    Returns
+    -------
+    Optional[Dict[str, Dict[str, Any]]]
+        Merged hyperparameters, None if both are None.
+    """
+    if overrides is None:
+        return params
+    merged = {model_name: dict(values) for model_name, values in (params or {}).items()}
+    for model_name, values in overrides.items():
+        merged.setdefault(model_name, {}).update(values)
+    return merged
+
+
+def _train_model_measured(
+    stage_name: str,
+    model_name: str,
+    df_train: pd.DataFrame,
+    df_test: Optional[pd.DataFrame],
+    n_jobs: int,
+    random_state: int,
+    params: Optional[Dict[str, Dict[str, Any]]],
+    global_model: bool = False,
+    scale_per_zone: bool = False,
+    streaming_linear: bool = False,
+) -> Tuple[BaseEstimator, Optional[Dict[str, Any]], Dict[str, Any]]:
+    """Train and score one model, measuring it.
+
+    Parameters
+    ----------
+    stage_name : str
+        Name of the stage in the run report.
+    model_name : str
+        Name of the model (see `initialize_models`).
+    df_train : pd.DataFrame
+        Train set
+    df_test : Optional[pd.DataFrame]
+        Test set, None to only fit the model.
+    n_jobs : int
+        Number of threads used by the model, when supported.
+    random_state : int
+        Seed of the randomized models.
+    params : Optional[Dict[str, Dict[str, Any]]]
+        Hyperparameters overriding the default ones (see `initialize_models`).
+    global_model : bool, optional
+        Fit a `GlobalModel`, by default False
+    scale_per_zone : bool, optional
+        Scale the load of each zone of a global model, by default False
+    streaming_linear : bool, optional
+        Fit linear models from streamed statistics (see `initialize_models`), by
+        default False
+
+    Returns
+    -------
+    Tuple[BaseEstimator, Optional[Dict[str, Any]], Dict[str, Any]]
+        Trained model, its scores (None without test set) and the record of the
+        stage.
+    """
+    inputs = [df_train] if df_test is None else [df_train, df_test]
+    with measure(name=stage_name, inputs=inputs) as record:
+        model = fit_model(
+            model_name=model_name,
+            df_train=df_train,
+            n_jobs=n_jobs,
+            random_state=random_state,
+            params=params,
+            global_model=global_model,
+            scale_per_zone=scale_per_zone,
+            streaming_linear=streaming_linear,
+        )
+        scores = (
+            None
+            if df_test is None
+            else score_model(df_train=df_train, df_test=df_test, model=model)
+        )
+    return model, scores, record
+
+
+def fit_models_for_each_zone(
+    df_features: pd.DataFrame,
+    test_size: float = 0.25,
+    random_state: int = 0,
+    model_params: Optional[Dict[str, Dict[str, Any]]] = None,
+    zone_params: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None,
+    n_jobs: int = 1,
+    streaming_linear: bool = False,
+) -> Dict[str, Dict[str, Any]]:
+    """Fit each model on the train set of each zone.
+
+    Parameters
+    ----------
+    df_features : pd.DataFrame
+        DataFrame containing features for all zones
+    test_size : float, optional
+        Share of the test set, by default 0.25
+    random_state : int, optional
+        Seed of the randomized models, by default 0
+    model_params : Optional[Dict[str, Dict[str, Any]]], optional
+        Hyperparameters overriding the default ones (see `initialize_models`), by
+        default None
+    zone_params : Optional[Dict[str, Dict[str, Dict[str, Any]]]], optional
+        Hyperparameters overriding `model_params`, per zone (see
+        `load_hyperparameters`), by default None
+    n_jobs : int, optional
+        Total number of cores used (-1 for all cores), by default 1
+    streaming_linear : bool, optional
+        Fit linear models from streamed statistics (see `initialize_models`), by
+        default False
+
+    Returns
+    -------
+    Dict[str, Dict[str, Any]]
+        Fitted models, per zone then model name.
+    """
+    splits = split_zones(df_features=df_features, test_size=test_size)
+    tasks = [
+        (zone, model_name)
+        for zone in splits
+        for model_name in initialize_models(params=model_params)
+    ]
+    results = _run_training_tasks(
+        tasks=tasks,
+        splits=splits,
+        n_jobs=n_jobs,
+        fit_only=True,
+        random_state=random_state,
+        params=model_params,
+        split_params=zone_params,
+        streaming_linear=streaming_linear,
+    )
+    fitted_models: Dict[str, Dict[str, Any]] = {zone: {} for zone in splits}
+    for (zone, model_name), (model, _) in zip(tasks, results):
+        fitted_models[zone][model_name] = model
+    return fitted_models
+
+
+def score_models_for_each_zone(
+    fitted_models: Dict[str, Dict[str, Any]],
+    df_features: pd.DataFrame,
+    test_size: float = 0.25,
+) -> Dict[str, Dict[str, Any]]:
+    """Score each model on the train and test sets of its zone.
+
+    Parameters
+    ----------
+    fitted_models : Dict[str, Dict[str, Any]]
+        Fitted models, per zone then model name.
+    df_features : pd.DataFrame
+        DataFrame containing features for all zones
+    test_size : float, optional
+        Share of the test set, by default 0.25
+
+    Returns
+    -------
+    Dict[str, Dict[str, Any]]
+        Scores, per zone then model name (see `score_model`).
+    """
+    splits = split_zones(df_features=df_features, test_size=test_size)
+    return {
+        zone: {
+            model_name: score_model(
+                df_train=splits[zone][0], df_test=splits[zone][1], model=model
+            )
+            for model_name, model in zone_models.items()
+        }
+        for zone, zone_models in fitted_models.items()
+    }
+
+
+def train_global_models(
+    df_features: pd.DataFrame,
+    scale_per_zone: bool = False,
+    test_size: float = 0.25,
+    random_state: int = 0,
+    model_params: Optional[Dict[str, Dict[str, Any]]] = None,
+    n_jobs: int = 1,
+) -> Tuple[Dict[str, GlobalModel], Dict[str, Any]]:
+    """Train each model once on all zones, and score it on each zone.
+
+    Train and test sets are the same as with per-zone models (see `split_zones`),
+    so that scores can be compared directly.
+
+    Parameters
+    ----------
+    df_features : pd.DataFrame
+        DataFrame containing features for all zones
+    scale_per_zone : bool, optional
+        Scale the load of each zone by its mean (see `GlobalModel`), by default
+        False
+    test_size : float, optional
+        Share of the test set of each zone, by default 0.25
+    random_state : int, optional
+        Seed of the randomized models, by default 0
+    model_params : Optional[Dict[str, Dict[str, Any]]], optional
+        Hyperparameters overriding the default ones (see `initialize_models`), by
+        default None
+    n_jobs : int, optional
+        Total number of cores used (-1 for all cores), by default 1
+
+    Returns
+    -------
+    Tuple[Dict[str, GlobalModel], Dict[str, Any]]
+        Two dictionaries:
+        - trained models, per model name
+        - scores, per zone then model name (see `score_model`)
+    """
+    splits = split_zones(df_features=df_features, test_size=test_size)
+    df_train = pd.concat([df_train for df_train, _ in splits.values()])
+    model_names = list(initialize_models(params=model_params))
+    results = _run_training_tasks(
+        tasks=[(cst.GLOBAL, model_name) for model_name in model_names],
+        splits={cst.GLOBAL: (df_train, None)},
+        n_jobs=n_jobs,
+        fit_only=True,
+        random_state=random_state,
+        params=model_params,
+        global_model=True,
+        scale_per_zone=scale_per_zone,
+    )
+    models = {model_name: model for model_name, (model, _) in zip(model_names, results)}
+    scores = score_models_for_each_zone(
+        fitted_models={zone: models for zone in splits},
+        df_features=df_features,
+        test_size=test_size,
+    )
+    return models, scores
+
+
+def save_global_models(
+    models: Dict[str, GlobalModel],
+    scores: Dict[str, Any],
+    path: Path = PATH_GLOBAL_MODELS,
+    compress: int = 0,
+    compress_method: str = "zlib",
+    compiled: bool = False,
+) -> None:
+    """Save global models, their scores and their metadata.
+
+    Parameters
+    ----------
+    models : Dict[str, GlobalModel]
+        Models, per model name
+    scores : Dict[str, Any]
+        Scores, per zone then model name
+    path : Path, optional
+        Folder of global models, by default PATH_GLOBAL_MODELS
+    compress : int, optional
+        Compression level, from 0 to 9 (see `save_models`), by default 0
+    compress_method : str, optional
+        Compression method of joblib, by default "zlib"
+    compiled : bool, optional
+        Save tree ensembles compiled (see `save_models`), by default False
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    artifacts = {}
+    for model_name, model in models.items():
+        file_path = path / f"{model_name}{cst.JOBLIB}"
+        joblib.dump(
+            value=compile_model(model=model) if compiled else model,
+            filename=file_path,
+            compress=(compress_method, compress) if compress > 0 else 0,
+        )
+        artifacts[model_name] = get_artifact_metadata(
+            file_path=file_path, compress=compress, compress_method=compress_method
+        )
+    with open(path / f"scores{cst.JSON}", mode="w", encoding="utf-8") as file:
+        json.dump(obj=scores, fp=file, indent=4)
+    with open(path / cst.ARTIFACTS_FILE, mode="w", encoding="utf-8") as file:
+        json.dump(obj=artifacts, fp=file, indent=4)
+
+
+def load_global_models(
+    path: Path = PATH_GLOBAL_MODELS,
+) -> Tuple[Dict[str, GlobalModel], Dict[str, Any]]:
+    """Load saved global models and scores.
+
+    Parameters
+    ----------
+    path : Path, optional
+        Folder of global models, by default PATH_GLOBAL_MODELS
+
+    Returns
+    -------
+    Tuple[Dict[str, GlobalModel], Dict[str, Any]]
+        Models per model name, and scores per zone then model name.
+    """
+    path = Path(path)
+    models = {
+        file_path.stem: joblib.load(filename=file_path)
+        for file_path in sorted(path.glob(f"*{cst.JOBLIB}"))
+    }
     scores = {}
-    for zone in df_features[cst.ZONE].unique():
-        df = df_features[df_features[cst.ZONE] == zone]
-        zone_models, zone_scores = train_models(df_features=df)
-        models[zone] = zone_models
-        scores[zone] = zone_scores
-    save_models(models=models, scores=scores)
+    if (path / f"scores{cst.JSON}").exists():
+        with open(path / f"scores{cst.JSON}", mode="r", encoding="utf-8") as file:
+            scores = json.load(file)
     return models, scores
 
 
-def load_saved_models() -> Tuple[Dict[str, Any], Dict[str, Any]]:
-    """Loads saved models and scores
+def load_saved_models(
+    path: Path = PATH_SAVED_MODELS,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Load saved models and scores.
+
+    All models are loaded, use `registry.get_registry` to load them on demand.
+
+    Parameters
+    ----------
+    path : Path, optional
+        Folder of saved models, by default PATH_SAVED_MODELS
 
     Returns
     -------
     Tuple[Dict[str, Any], Dict[str, Any]]
         Models and scores
     """
-    scores = {}
-    models = {}
-    for path in PATH_SAVED_MODELS.iterdir():
-        zone = path.name
-        zone_models = {}
-        for file in path.iterdir():
-            file_name = file.name
-            suffix = file.suffix
-            if suffix == cst.JSON:
-                with open(file=file, mode="r", encoding="utf-8") as score_file:
-                    scores[zone] = json.load(score_file)
-            elif suffix == cst.JOBLIB:
-                model = joblib.load(filename=file)
-                model_name = file_name[: -len(cst.JOBLIB)]
-                zone_models[model_name] = model
-            else:
-                pass
-        models[zone] = zone_models
+    registry = get_registry(path=path)
+    models = {
+        zone: {
+            model_name: registry.get_model(zone=zone, model_name=model_name)
+            for model_name in registry.get_model_names(zone=zone)
+        }
+        for zone in registry.zones
+    }
+    scores = {
+        zone: registry.get_scores(zone=zone)
+        for zone in registry.zones
+        if registry.has_scores(zone=zone)
+    }
     return models, scores
 
 
 def train_models(
     df_features: pd.DataFrame,
+    n_jobs: int = 1,
+    streaming_linear: bool = False,
 ) -> Tuple[Dict[str, BaseEstimator], Dict[str, Any]]:
     """Train and score all defined models on the given Dataset.
 
@@ -152,6 +823,11 @@ def train_models(
     ----------
     df_features : pd.DataFrame
         Features DataFrame, preferably only one zone
+    n_jobs : int, optional
+        Total number of cores used (-1 for all cores), by default 1
+    streaming_linear : bool, optional
+        Fit linear models from streamed statistics (see `initialize_models`), by
+        default False
 
     Returns
     -------
@@ -163,20 +839,92 @@ def train_models(
     # split in train and test set (the 25% last data points are used for test)
     df_train, df_test = train_test_split(df_features, test_size=0.25, shuffle=False)
 
-    # initialize models
-    models = initialize_models()
+    model_names = list(initialize_models())
+    results = _run_training_tasks(
+        tasks=[(None, model_name) for model_name in model_names],
+        splits={None: (df_train, df_test)},
+        n_jobs=n_jobs,
+        streaming_linear=streaming_linear,
+    )
 
     scores = {}
     trained_models = {}
-    for model_name, model in models.items():
-        model.fit(X=df_train[cst.FEATURES_LIST], y=df_train[cst.LOAD])
-        scores[model_name] = score_model(
-            df_train=df_train, df_test=df_test, model=model
-        )
+    for model_name, (model, model_scores) in zip(model_names, results):
+        scores[model_name] = model_scores
         trained_models[model_name] = model
     return trained_models, scores
 
 
+def fit_model(
+    model_name: str,
+    df_train: pd.DataFrame,
+    n_jobs: int = 1,
+    random_state: int = 0,
+    params: Optional[Dict[str, Dict[str, Any]]] = None,
+    global_model: bool = False,
+    scale_per_zone: bool = False,
+    streaming_linear: bool = False,
+) -> BaseEstimator:
+    """Fit one model.
+
+    Parameters
+    ----------
+    model_name : str
+        Name of the model (see `initialize_models`).
+    df_train : pd.DataFrame
+        Train set
+    n_jobs : int, optional
+        Number of threads used by the model, when supported, by default 1
+    random_state : int, optional
+        Seed of the randomized models, by default 0
+    params : Optional[Dict[str, Dict[str, Any]]], optional
+        Hyperparameters overriding the default ones (see `initialize_models`), by
+        default None
+    global_model : bool, optional
+        Fit a `GlobalModel` on all zones of the train set, by default False
+    scale_per_zone : bool, optional
+        Scale the load of each zone of a global model, by default False
+    streaming_linear : bool, optional
+        Fit linear models from streamed statistics (see `initialize_models`), by
+        default False
+
+    Returns
+    -------
+    BaseEstimator
+        Fitted model.
+    """
+    model = initialize_models(
+        random_state=random_state,
+        n_jobs=n_jobs,
+        params=params,
+        streaming_linear=streaming_linear,
+    )[model_name]
+    if global_model:
+        model = GlobalModel(model=model, scale_per_zone=scale_per_zone)
+        return model.fit(X=df_train, y=df_train[cst.LOAD])
+    model.fit(X=get_model_inputs(df=df_train), y=df_train[cst.LOAD])
+    return model
+
+
+def get_model_inputs(df: pd.DataFrame) -> pd.DataFrame:
+    """Select features, cast to float64.
+
+    Features may be stored with compact dtypes (see `extract_features`), but models
+    are fitted in double precision.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Features DataFrame.
+
+    Returns
+    -------
+    pd.DataFrame
+        Features of `FEATURES_LIST`, as float64.
+    """
+    return df[cst.FEATURES_LIST].astype(np.float64, copy=False)
+
+
 def score_model(
     df_train: pd.DataFrame, df_test: pd.DataFrame, model: BaseEstimator
 ) -> Dict[str, Any]:
@@ -200,7 +948,9 @@ def score_model(
     """
     scores = {}
     for kind, df in zip([cst.TRAIN, cst.TEST], [df_train, df_test]):
-        y_pred = model.predict(X=df[cst.FEATURES_LIST])
+        # Global models need the zone column
+        inputs = df if isinstance(model, GlobalModel) else get_model_inputs(df=df)
+        y_pred = model.predict(X=inputs)
         y_true = df[cst.LOAD]
         scores[kind] = {
             cst.MAE: mean_absolute_error(y_true=y_true, y_pred=y_pred),
@@ -209,26 +959,140 @@ def score_model(
     return scores
 
 
-def save_models(models: Dict[str, Any], scores: Dict[str, Any]) -> None:
+def save_models(
+    models: Dict[str, Any],
+    scores: Dict[str, Any],
+    path: Path = PATH_SAVED_MODELS,
+    compress: int = 0,
+    compress_method: str = "zlib",
+    compiled: bool = False,
+) -> None:
     """Save models and scores in sub-folders.
 
+    The size and compression of each model file are written next to the scores, in
+    `artifacts.json`.
+
     Parameters
     ----------
     models : Dict[str, Any]
         Models dictionary (one key per zone, then one key per model type)
     scores : Dict[str, Any]
         Scores dictionary (one key per zone, one key per model type then train/test)
+    path : Path, optional
+        Folder of saved models, by default PATH_SAVED_MODELS
+    compress : int, optional
+        Compression level, from 0 to 9, by default 0. Uncompressed files are loaded
+        faster and can be memory-mapped (see `ModelRegistry`).
+    compress_method : str, optional
+        Compression method of joblib (e.g. zlib, lzma or lz4 if installed), by
+        default "zlib"
+    compiled : bool, optional
+        Save random forests and gradient boostings compiled into flat arrays (see
+        `compiled_trees`), which predict the same values with less overhead, by
+        default False
     """
-    if not PATH_SAVED_MODELS.exists():
-        PATH_SAVED_MODELS.mkdir()
+    path = Path(path)
+    if not path.exists():
+        path.mkdir(parents=True)
     for zone, zone_models in models.items():
-        if not (PATH_SAVED_MODELS / zone).exists():
-            (PATH_SAVED_MODELS / zone).mkdir()
+        if not (path / zone).exists():
+            (path / zone).mkdir()
+        artifacts = {}
         for model_name, model in zone_models.items():
+            file_path = path / zone / f"{model_name}{cst.JOBLIB}"
             joblib.dump(
-                value=model, filename=PATH_SAVED_MODELS / zone / f"{model_name}.joblib"
+                value=compile_model(model=model) if compiled else model,
+                filename=file_path,
+                compress=(compress_method, compress) if compress > 0 else 0,
+            )
+            artifacts[model_name] = get_artifact_metadata(
+                file_path=file_path, compress=compress, compress_method=compress_method
             )
+        with open(path / zone / "scores.json", mode="w", encoding="utf-8") as file:
+            json.dump(obj=scores[zone], fp=file, indent=4)
+        with open(path / zone / cst.ARTIFACTS_FILE, mode="w", encoding="utf-8") as file:
+            json.dump(obj=artifacts, fp=file, indent=4)
+    get_registry(path=path).refresh()
+
+
+def get_artifact_metadata(
+    file_path: Path, compress: int = 0, compress_method: str = "zlib"
+) -> Dict[str, Any]:
+    """Describe a saved model.
+
+    Load times are measured by the registry, when models are first loaded (see
+    `ModelRegistry.get_load_times`).
+
+    Parameters
+    ----------
+    file_path : Path
+        Model file.
+    compress : int, optional
+        Compression level of the file, by default 0
+    compress_method : str, optional
+        Compression method of the file, by default "zlib"
+
+    Returns
+    -------
+    Dict[str, Any]
+        Metadata, with keys:
+        - bytes: size of the file
+        - compress: compression level
+        - compress_method: compression method (None if uncompressed)
+        - mmap: whether the file can be memory-mapped (uncompressed)
+    """
+    return {
+        "bytes": Path(file_path).stat().st_size,
+        "compress": compress,
+        "compress_method": compress_method if compress > 0 else None,
+        "mmap": compress == 0,
+    }
+
+
+def load_hyperparameters(
+    path: Path = PATH_SAVED_MODELS,
+) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Load the hyperparameters saved for each zone.
+
+    Parameters
+    ----------
+    path : Path, optional
+        Folder of saved models, by default PATH_SAVED_MODELS
+
+    Returns
+    -------
+    Dict[str, Dict[str, Dict[str, Any]]]
+        Hyperparameters per zone then model name, only for zones having a
+        `hyperparameters.json` file.
+    """
+    hyperparameters = {}
+    for file_path in sorted(Path(path).glob(f"*/hyperparameters{cst.JSON}")):
+        with open(file_path, mode="r", encoding="utf-8") as file:
+            hyperparameters[file_path.parent.name] = json.load(file)
+    return hyperparameters
+
+
+def save_hyperparameters(
+    hyperparameters: Dict[str, Dict[str, Dict[str, Any]]],
+    path: Path = PATH_SAVED_MODELS,
+) -> None:
+    """Save hyperparameters next to the models of each zone.
+
+    Hyperparameters of models missing from `hyperparameters` are kept.
+
+    Parameters
+    ----------
+    hyperparameters : Dict[str, Dict[str, Dict[str, Any]]]
+        Hyperparameters per zone then model name.
+    path : Path, optional
+        Folder of saved models, by default PATH_SAVED_MODELS
+    """
+    saved = load_hyperparameters(path=path)
+    for zone, zone_hyperparameters in hyperparameters.items():
+        (Path(path) / zone).mkdir(parents=True, exist_ok=True)
         with open(
-            PATH_SAVED_MODELS / zone / "scores.json", mode="w", encoding="utf-8"
+            Path(path) / zone / f"hyperparameters{cst.JSON}", mode="w", encoding="utf-8"
         ) as file:
-            json.dump(obj=scores[zone], fp=file, indent=4)
+            json.dump(
+                obj={**saved.get(zone, {}), **zone_hyperparameters}, fp=file, indent=4
+            )
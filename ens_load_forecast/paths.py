@@ -1,19 +1,76 @@
-"""Module containing paths for the project."""
+"""Module containing paths for the project.
 
+The data folder defaults to `ens_load_forecast/data` in the current directory, and
+the saved models to its `saved_models` sub-folder. They can be moved with the
+`ENS_LOAD_FORECAST_DATA` and `ENS_LOAD_FORECAST_MODELS` environment variables, or
+with the `--data-dir` and `--models-dir` options of `python -m ens_load_forecast`.
+"""
+
+import os
 from pathlib import Path
+from typing import Dict
+
+# Environment variables
+ENV_DATA = "ENS_LOAD_FORECAST_DATA"
+ENV_MODELS = "ENS_LOAD_FORECAST_MODELS"
+
+
+def get_data_paths(path_data: Path) -> Dict[str, Path]:
+    """Get the files and folders of a data folder.
+
+    Parameters
+    ----------
+    path_data : Path
+        Data folder.
+
+    Returns
+    -------
+    Dict[str, Path]
+        Path of each file or folder, with keys `load_actual`, `load_forecast`,
+        `weather` and `zones_and_stations` (source files, as expected by
+        `get_node_params`), `latest_load_forecast`, `latest_weather`,
+        `predictions`, `saved_models`, `artifacts` and `incremental`.
+    """
+    path_data = Path(path_data)
+    return {
+        "load_actual": path_data / "load_actual.csv",
+        "load_forecast": path_data / "load_forecast.csv",
+        "weather": path_data / "weather.csv",
+        "zones_and_stations": path_data / "zones_and_stations.csv",
+        "latest_load_forecast": path_data / "latest_load_forecast.csv",
+        "latest_weather": path_data / "latest_weather.csv",
+        "predictions": path_data / "predictions",
+        "saved_models": path_data / "saved_models",
+        "artifacts": path_data / "artifacts",
+        "incremental": path_data / "incremental",
+    }
+
 
 # Folders
 
 PATH_REPO = Path("").resolve()
 PATH_MODULE = PATH_REPO / "ens_load_forecast"
-PATH_DATA = PATH_MODULE / "data"
+PATH_DATA = Path(os.environ.get(ENV_DATA, PATH_MODULE / "data")).resolve()
+_DATA_PATHS = get_data_paths(path_data=PATH_DATA)
 
 # Files
 
-PATH_LOAD_ACTUAL = PATH_DATA / "load_actual.csv"
-PATH_LOAD_FORECAST = PATH_DATA / "load_forecast.csv"
-PATH_WEATHER = PATH_DATA / "weather.csv"
-PATH_PREPROCESSED_WEATHER = PATH_DATA / "preprocessed_weather.csv"
-PATH_ZONES_AND_STATIONS = PATH_DATA / "zones_and_stations.csv"
+PATH_LOAD_ACTUAL = _DATA_PATHS["load_actual"]
+PATH_LOAD_FORECAST = _DATA_PATHS["load_forecast"]
+PATH_WEATHER = _DATA_PATHS["weather"]
+PATH_PREPROCESSED_WEATHER = PATH_DATA / "preprocessed_weather"
+PATH_ZONES_AND_STATIONS = _DATA_PATHS["zones_and_stations"]
 PATH_MAP_DATA = PATH_DATA / "map_data.geojson"
-PATH_SAVED_MODELS = PATH_DATA / "saved_models"
+PATH_MAP_CACHE = PATH_DATA / "map_cache"
+PATH_SAVED_MODELS = Path(
+    os.environ.get(ENV_MODELS, _DATA_PATHS["saved_models"])
+).resolve()
+PATH_GLOBAL_MODELS = PATH_DATA / "global_models"
+PATH_INCREMENTAL = _DATA_PATHS["incremental"]
+PATH_LATEST_LOAD_FORECAST = _DATA_PATHS["latest_load_forecast"]
+PATH_LATEST_WEATHER = _DATA_PATHS["latest_weather"]
+PATH_PREDICTIONS = _DATA_PATHS["predictions"]
+PATH_SYNTHETIC_DATA = PATH_DATA / "synthetic"
+PATH_BENCHMARKS = PATH_DATA / "benchmarks"
+PATH_ARTIFACTS = _DATA_PATHS["artifacts"]
+PATH_BACKTESTS = PATH_DATA / "backtests"
@@ -0,0 +1,775 @@
+"""Module describing the pipeline as a DAG of memoized nodes.
+
+Nodes are: loaders (`load_actual`, `load_forecast`, `weather`) -> `merged` ->
+`features` -> `train` -> `score`, and for analysis plots `merged` -> `aggregates`
+(see `aggregates`) and `features` -> `feature_statistics` (see
+`streaming_statistics`).
+
+The output of each node is saved as an artifact, under a key hashing:
+- the name and parameters of the node (execution parameters such as `n_jobs`
+  excluded),
+- the fingerprint (size and modification time) of its source files,
+- the source code of the module of its function and of every module of the package
+  it imports, directly or not (see `get_module_dependencies`),
+- the keys of its upstream nodes.
+
+Keys are computed without running anything, so a node whose key is found in
+`artifacts/` is loaded instead of computed, and its upstream nodes are not even
+loaded. Changing a model hyperparameter only changes the keys of `train` and
+`score`, appending rows to `load_actual.csv` only changes the keys of
+`load_actual` and of its downstream nodes.
+
+Source nodes (loaders, without upstream nodes) needed by the same node can be
+computed concurrently, in worker processes (`source_jobs`). Each worker saves the
+artifact of its node, which the main process then loads (memory-mapped), so
+DataFrames are not sent back between processes.
+
+Functions of the nodes are imported when a node is computed, and the source code
+of their modules is hashed without importing them, so that a run whose targets
+are all cached does not import scikit-learn.
+"""
+
+import ast
+import hashlib
+import importlib
+import json
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import joblib
+import pandas as pd
+from joblib import Parallel, delayed, effective_n_jobs, parallel_backend
+
+import ens_load_forecast.cache as cache
+from ens_load_forecast.instrumentation import (
+    OUTPUT,
+    add_record,
+    get_report,
+    get_stage_name,
+    reset,
+    stage,
+)
+from ens_load_forecast.paths import (
+    PATH_ARTIFACTS,
+    PATH_LOAD_ACTUAL,
+    PATH_LOAD_FORECAST,
+    PATH_WEATHER,
+    PATH_ZONES_AND_STATIONS,
+)
+
+# Nodes
+LOAD_ACTUAL = "load_actual"
+LOAD_FORECAST = "load_forecast"
+WEATHER = "weather"
+MERGED = "merged"
+FEATURES = "features"
+TRAIN = "train"
+SCORE = "score"
+AGGREGATES = "aggregates"
+FEATURE_STATISTICS = "feature_statistics"
+
+# Artifact kinds
+FRAME = "frame"
+JOBLIB = "joblib"
+JSON = "json"
+
+ARTIFACT_FILE = "artifact.json"
+ARTIFACT_DATA = "data"
+
+# Modules of the nodes
+PACKAGE = "ens_load_forecast"
+AGGREGATES_MODULE = f"{PACKAGE}.aggregates"
+DATA_PREPROCESSING_MODULE = f"{PACKAGE}.data_preprocessing"
+FEATURES_ENGINEERING_MODULE = f"{PACKAGE}.features_engineering"
+MODELS_MODULE = f"{PACKAGE}.models"
+STREAMING_STATISTICS_MODULE = f"{PACKAGE}.streaming_statistics"
+
+# Parameters which do not change the output of a node
+EXECUTION_PARAMS = ["n_jobs", "chunksize"]
+
+
+class Node:
+    """Node of the pipeline.
+
+    Parameters
+    ----------
+    func : str
+        Function computing the output, as `<module>:<function>` (imported when the
+        node is computed, see `get_func`). It is called with the outputs of
+        upstream nodes and the parameters of the node as keyword arguments.
+    dependencies : Dict[str, str]
+        Upstream node of each argument of `func`.
+    kind : str
+        Kind of artifact (`frame`, `joblib` or `json`).
+    files : Optional[List[str]], optional
+        Parameters which are paths to source files, whose fingerprint is part of the
+        key, by default None
+    """
+
+    def __init__(  # noqa: D107 (disable ruff: missing docstring)
+        self,
+        func: str,
+        dependencies: Dict[str, str],
+        kind: str,
+        files: Optional[List[str]] = None,
+    ) -> None:
+        self.func = func
+        self.dependencies = dependencies
+        self.kind = kind
+        self.files = files or []
+
+    def get_func(self) -> Callable[..., Any]:
+        """Import the function computing the output.
+
+        Returns
+        -------
+        Callable[..., Any]
+            The function.
+        """
+        module_name, func_name = self.func.split(":")
+        return getattr(importlib.import_module(module_name), func_name)
+
+    def get_module(self) -> str:
+        """Get the name of the module of the function computing the output.
+
+        Returns
+        -------
+        str
+            Module name.
+        """
+        return self.func.split(":")[0]
+
+
+def get_module_dependencies(module: str) -> List[str]:
+    """Get the modules of the package a module imports, directly or not.
+
+    Imports are read from the source code, without importing anything, wherever
+    they are (imports inside functions included), so that the key of a node
+    changes with the code of every module it may run.
+
+    Parameters
+    ----------
+    module : str
+        Name of a module of the package.
+
+    Returns
+    -------
+    List[str]
+        Sorted names of the module and of the modules of the package it imports.
+    """
+    dependencies = set()
+    to_visit = [module]
+    while len(to_visit) != 0:
+        name = to_visit.pop()
+        if name in dependencies:
+            continue
+        dependencies.add(name)
+        for statement in ast.walk(ast.parse(get_module_path(module=name).read_bytes())):
+            if isinstance(statement, ast.Import):
+                imported = [alias.name for alias in statement.names]
+            elif isinstance(statement, ast.ImportFrom) and statement.level == 0:
+                # `from package import module` imports a module, other names are
+                # attributes of the module
+                imported = [statement.module] + [
+                    f"{statement.module}.{alias.name}" for alias in statement.names
+                ]
+            else:
+                continue
+            to_visit.extend(
+                name
+                for name in imported
+                if name is not None and get_module_path(module=name) is not None
+            )
+    return sorted(dependencies)
+
+
+def get_module_path(module: str) -> Optional[Path]:
+    """Get the source file of a module of the package, without importing it.
+
+    Parameters
+    ----------
+    module : str
+        Module name.
+
+    Returns
+    -------
+    Optional[Path]
+        Source file, None if the name is not a module of the package.
+    """
+    if module != PACKAGE and not module.startswith(f"{PACKAGE}."):
+        return None
+    path = Path(__file__).parent.joinpath(*module.split(".")[1:])
+    for candidate in [path / "__init__.py", path.with_suffix(".py")]:
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def compute_weather(
+    path: Path,
+    path_zones_and_stations: Path,
+    chunksize: Optional[int] = None,
+    compact: bool = False,
+) -> pd.DataFrame:
+    """Compute the weather data, without the cache of `get_weather`.
+
+    Parameters
+    ----------
+    path : Path
+        Weather forecasts.
+    path_zones_and_stations : Path
+        Stations weights.
+    chunksize : Optional[int], optional
+        Rows per chunk when streaming `weather.csv`, by default None (not streamed)
+    compact : bool, optional
+        Use compact dtypes (float32, categorical zone), by default False
+
+    Returns
+    -------
+    pd.DataFrame
+        Weather data (see `get_weather`).
+    """
+    # Imported here, to not import preprocessing modules when nodes are cached
+    import ens_load_forecast.data_preprocessing as data_preprocessing
+    import ens_load_forecast.memory as memory
+
+    df = data_preprocessing.aggregate_weather_record(
+        df=data_preprocessing.get_weather_records(
+            chunksize=chunksize,
+            path=path,
+            path_zones_and_stations=path_zones_and_stations,
+        )
+    )
+    return memory.to_compact(df=df) if compact else df
+
+
+NODES: Dict[str, Node] = {
+    LOAD_ACTUAL: Node(
+        func=f"{DATA_PREPROCESSING_MODULE}:get_load_actual",
+        dependencies={},
+        kind=FRAME,
+        files=["path"],
+    ),
+    LOAD_FORECAST: Node(
+        func=f"{DATA_PREPROCESSING_MODULE}:get_load_forecast",
+        dependencies={},
+        kind=FRAME,
+        files=["path"],
+    ),
+    WEATHER: Node(
+        func=f"{__name__}:compute_weather",
+        dependencies={},
+        kind=FRAME,
+        files=["path", "path_zones_and_stations"],
+    ),
+    MERGED: Node(
+        func=f"{DATA_PREPROCESSING_MODULE}:get_merged_dataset",
+        dependencies={
+            "df_weather": WEATHER,
+            "df_load_actual": LOAD_ACTUAL,
+            "df_load_forecast": LOAD_FORECAST,
+        },
+        kind=FRAME,
+    ),
+    FEATURES: Node(
+        func=f"{FEATURES_ENGINEERING_MODULE}:extract_features",
+        dependencies={"df": MERGED},
+        kind=FRAME,
+    ),
+    TRAIN: Node(
+        func=f"{MODELS_MODULE}:fit_models_for_each_zone",
+        dependencies={"df_features": FEATURES},
+        kind=JOBLIB,
+    ),
+    SCORE: Node(
+        func=f"{MODELS_MODULE}:score_models_for_each_zone",
+        dependencies={"fitted_models": TRAIN, "df_features": FEATURES},
+        kind=JSON,
+    ),
+    AGGREGATES: Node(
+        func=f"{AGGREGATES_MODULE}:compute_aggregates",
+        dependencies={"df": MERGED},
+        kind=JOBLIB,
+    ),
+    FEATURE_STATISTICS: Node(
+        func=f"{STREAMING_STATISTICS_MODULE}:compute_feature_statistics",
+        dependencies={"df_features": FEATURES},
+        kind=JOBLIB,
+    ),
+}
+
+
+def get_node_params(
+    paths: Optional[Dict[str, Path]] = None,
+    compact: bool = False,
+    chunksize: Optional[int] = None,
+    test_size: float = 0.25,
+    random_state: int = 0,
+    model_params: Optional[Dict[str, Dict[str, Any]]] = None,
+    zone_params: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None,
+    n_jobs: int = 1,
+    streaming_linear: bool = False,
+) -> Dict[str, Dict[str, Any]]:
+    """Dispatch pipeline parameters to nodes.
+
+    Parameters
+    ----------
+    paths : Optional[Dict[str, Path]], optional
+        Source files, with keys `load_actual`, `load_forecast`, `weather` and
+        `zones_and_stations` (missing keys use the default paths), by default None
+    compact : bool, optional
+        Use compact dtypes (float32, categorical zone), by default False. Linear
+        models are then fitted from streamed statistics, since `LinearRegression`
+        on the polynomial features of float32-rounded inputs is ill-conditioned.
+    chunksize : Optional[int], optional
+        Rows per chunk when streaming `weather.csv`, by default None
+    test_size : float, optional
+        Share of the test set of each zone, by default 0.25
+    random_state : int, optional
+        Seed of the randomized models and of the sampled features, by default 0
+    model_params : Optional[Dict[str, Dict[str, Any]]], optional
+        Hyperparameters overriding the default ones (see `initialize_models`), by
+        default None
+    zone_params : Optional[Dict[str, Dict[str, Dict[str, Any]]]], optional
+        Hyperparameters overriding `model_params`, per zone (see
+        `load_hyperparameters`), by default None
+    n_jobs : int, optional
+        Total number of cores used to train models (-1 for all cores), by default 1
+    streaming_linear : bool, optional
+        Fit the linear and polynomial models from streamed statistics (see
+        `initialize_models`), by default False
+
+    Returns
+    -------
+    Dict[str, Dict[str, Any]]
+        Parameters of each node.
+    """
+    paths = {
+        LOAD_ACTUAL: PATH_LOAD_ACTUAL,
+        LOAD_FORECAST: PATH_LOAD_FORECAST,
+        WEATHER: PATH_WEATHER,
+        "zones_and_stations": PATH_ZONES_AND_STATIONS,
+        **(paths or {}),
+    }
+    return {
+        LOAD_ACTUAL: {"path": paths[LOAD_ACTUAL], "compact": compact},
+        LOAD_FORECAST: {"path": paths[LOAD_FORECAST], "compact": compact},
+        WEATHER: {
+            "path": paths[WEATHER],
+            "path_zones_and_stations": paths["zones_and_stations"],
+            "chunksize": chunksize,
+            "compact": compact,
+        },
+        MERGED: {"compact": compact},
+        FEATURES: {"compact": compact},
+        TRAIN: {
+            "test_size": test_size,
+            "random_state": random_state,
+            "model_params": model_params,
+            "zone_params": zone_params,
+            "n_jobs": n_jobs,
+            "streaming_linear": streaming_linear or compact,
+        },
+        SCORE: {"test_size": test_size},
+        AGGREGATES: {},
+        FEATURE_STATISTICS: {"random_state": random_state},
+    }
+
+
+def run_pipeline(
+    targets: Iterable[str] = (SCORE,),
+    params: Optional[Dict[str, Dict[str, Any]]] = None,
+    force: Iterable[str] = (),
+    path: Path = PATH_ARTIFACTS,
+    source_jobs: int = 1,
+) -> Dict[str, Any]:
+    """Get the output of target nodes, computing only nodes without artifact.
+
+    Parameters
+    ----------
+    targets : Iterable[str], optional
+        Target nodes, by default (SCORE,)
+    params : Optional[Dict[str, Dict[str, Any]]], optional
+        Parameters of each node, by default None (see `get_node_params`)
+    force : Iterable[str], optional
+        Nodes to recompute even if an artifact exists, by default ()
+    path : Path, optional
+        Folder of artifacts, by default PATH_ARTIFACTS
+    source_jobs : int, optional
+        Number of parallel processes computing source nodes (-1 for all cores),
+        by default 1 (sources are computed one after the other, as with a single
+        core)
+
+    Returns
+    -------
+    Dict[str, Any]
+        Output of each target node.
+    """
+    params = get_node_params() if params is None else params
+    keys = get_node_keys(params=params)
+    force = set(force)
+    outputs: Dict[str, Any] = {}
+
+    def is_cached(name: str) -> bool:
+        return (
+            name not in force
+            and (Path(path) / name / keys[name] / ARTIFACT_FILE).exists()
+        )
+
+    def get_output(name: str) -> Any:
+        if name in outputs:
+            return outputs[name]
+        node = NODES[name]
+        artifact_path = Path(path) / name / keys[name]
+        output = None
+        if is_cached(name=name):
+            with stage(name=name) as record:
+                output = _load_artifact(node=node, path=artifact_path)
+                record.update({"key": keys[name], "cached": True, OUTPUT: output})
+        if output is None:
+            sources = [
+                dependency
+                for dependency in dict.fromkeys(node.dependencies.values())
+                if dependency not in outputs
+                and len(NODES[dependency].dependencies) == 0
+                and not is_cached(name=dependency)
+            ]
+            if effective_n_jobs(n_jobs=source_jobs) > 1 and len(sources) > 1:
+                outputs.update(
+                    _compute_sources(
+                        names=sources,
+                        params=params,
+                        keys=keys,
+                        path=Path(path),
+                        n_jobs=source_jobs,
+                    )
+                )
+            # Upstream nodes are resolved first, so that they are measured apart
+            inputs = {
+                argument: get_output(dependency)
+                for argument, dependency in node.dependencies.items()
+            }
+            with stage(name=name) as record:
+                output = node.get_func()(**inputs, **params[name])
+                _save_artifact(node=node, output=output, path=artifact_path)
+                record.update({"key": keys[name], "cached": False, OUTPUT: output})
+        outputs[name] = output
+        return output
+
+    return {target: get_output(target) for target in targets}
+
+
+def _compute_sources(
+    names: List[str],
+    params: Dict[str, Dict[str, Any]],
+    keys: Dict[str, str],
+    path: Path,
+    n_jobs: int,
+) -> Dict[str, Any]:
+    """Compute source nodes in parallel processes, and load their artifacts.
+
+    Stages measured in workers are added to the run report, followed by a
+    `sources` record estimating the saving compared with a sequential run:
+    - wall_seconds: time to compute all nodes and load their artifacts
+    - sequential_seconds: sum of the wall times of the nodes, i.e. the time of a
+      sequential run (overestimated if workers compete for cores)
+    - sequential_cpu_seconds: sum of the CPU times of the nodes, a lower bound
+    - saved_seconds: `sequential_seconds - wall_seconds`
+
+    Parameters
+    ----------
+    names : List[str]
+        Source nodes (without upstream nodes).
+    params : Dict[str, Dict[str, Any]]
+        Parameters of each node (see `get_node_params`).
+    keys : Dict[str, str]
+        Key of each node (see `get_node_keys`).
+    path : Path
+        Folder of artifacts.
+    n_jobs : int
+        Number of parallel processes (-1 for all cores), at most one per node.
+
+    Returns
+    -------
+    Dict[str, Any]
+        Output of each node.
+    """
+    start = time.perf_counter()
+    with parallel_backend(backend="loky"):
+        results = Parallel(n_jobs=min(effective_n_jobs(n_jobs=n_jobs), len(names)))(
+            delayed(_compute_source)(
+                name=name, params=params[name], path=path / name / keys[name]
+            )
+            for name in names
+        )
+    outputs = {}
+    sequential_seconds = 0.0
+    sequential_cpu_seconds = 0.0
+    for name, records in zip(names, results):
+        # The record of the node comes after its nested stages
+        records[-1].update({"key": keys[name], "cached": False})
+        sequential_seconds += records[-1]["wall_seconds"]
+        sequential_cpu_seconds += records[-1]["cpu_seconds"]
+        for record in records:
+            add_record(record={**record, "stage": get_stage_name(name=record["stage"])})
+        outputs[name] = _load_artifact(node=NODES[name], path=path / name / keys[name])
+    wall_seconds = time.perf_counter() - start
+    add_record(
+        record={
+            "stage": get_stage_name(name="sources"),
+            "nodes": names,
+            "wall_seconds": wall_seconds,
+            "sequential_seconds": sequential_seconds,
+            "sequential_cpu_seconds": sequential_cpu_seconds,
+            "saved_seconds": sequential_seconds - wall_seconds,
+        }
+    )
+    return outputs
+
+
+def _compute_source(
+    name: str, params: Dict[str, Any], path: Path
+) -> List[Dict[str, Any]]:
+    """Compute a source node in a worker process, and save its artifact.
+
+    Parameters
+    ----------
+    name : str
+        Source node.
+    params : Dict[str, Any]
+        Parameters of the node.
+    path : Path
+        Folder of the artifact.
+
+    Returns
+    -------
+    List[Dict[str, Any]]
+        Records of the stages measured in the worker.
+    """
+    reset()
+    node = NODES[name]
+    with stage(name=name) as record:
+        output = node.get_func()(**params)
+        _save_artifact(node=node, output=output, path=path)
+        record[OUTPUT] = output
+    return get_report()["stages"]
+
+
+def get_upstream_nodes(targets: Iterable[str]) -> List[str]:
+    """Get target nodes and all their upstream nodes.
+
+    Parameters
+    ----------
+    targets : Iterable[str]
+        Target nodes.
+
+    Returns
+    -------
+    List[str]
+        Nodes, upstream nodes first.
+    """
+    nodes: List[str] = []
+
+    def add_node(name: str) -> None:
+        if name in nodes:
+            return
+        for dependency in NODES[name].dependencies.values():
+            add_node(name=dependency)
+        nodes.append(name)
+
+    for target in targets:
+        add_node(name=target)
+    return nodes
+
+
+def get_node_keys(params: Dict[str, Dict[str, Any]]) -> Dict[str, str]:
+    """Compute the artifact key of every node.
+
+    Parameters
+    ----------
+    params : Dict[str, Dict[str, Any]]
+        Parameters of each node (see `get_node_params`).
+
+    Returns
+    -------
+    Dict[str, str]
+        Key (hexadecimal digest) of each node.
+    """
+    keys: Dict[str, str] = {}
+    code_hashes: Dict[str, str] = {}
+    node_modules: Dict[str, List[str]] = {}
+
+    def get_key(name: str) -> str:
+        if name in keys:
+            return keys[name]
+        node = NODES[name]
+        node_params = params[name]
+        if node.get_module() not in node_modules:
+            node_modules[node.get_module()] = get_module_dependencies(
+                module=node.get_module()
+            )
+        modules = node_modules[node.get_module()]
+        for module in modules:
+            if module not in code_hashes:
+                code_hashes[module] = hashlib.sha256(
+                    get_module_path(module=module).read_bytes()
+                ).hexdigest()
+        description = {
+            "node": name,
+            "params": {
+                param: value
+                for param, value in node_params.items()
+                if param not in EXECUTION_PARAMS
+            },
+            "files": cache.get_fingerprint(
+                paths=[node_params[param] for param in node.files]
+            ),
+            "code": {module: code_hashes[module] for module in modules},
+            "upstream": {
+                dependency: get_key(dependency)
+                for dependency in node.dependencies.values()
+            },
+        }
+        keys[name] = hashlib.sha256(
+            json.dumps(description, sort_keys=True, default=str).encode()
+        ).hexdigest()[:32]
+        return keys[name]
+
+    for name in NODES:
+        get_key(name)
+    return keys
+
+
+def _load_artifact(node: Node, path: Path) -> Any:
+    """Load the artifact of a node, and record its access time.
+
+    Parameters
+    ----------
+    node : Node
+        The node.
+    path : Path
+        Folder of the artifact.
+
+    Returns
+    -------
+    Any
+        Output of the node, None if there is no (complete) artifact.
+    """
+    metadata_path = path / ARTIFACT_FILE
+    if not metadata_path.exists():
+        return None
+    data_path = path / ARTIFACT_DATA
+    if node.kind == FRAME:
+        output = cache.load_frame(path=data_path)
+    elif node.kind == JOBLIB:
+        output = joblib.load(filename=data_path)
+    else:
+        with open(data_path, mode="r", encoding="utf-8") as file:
+            output = json.load(file)
+
+    with open(metadata_path, mode="r", encoding="utf-8") as file:
+        metadata = json.load(file)
+    metadata["last_access"] = time.time()
+    with open(metadata_path, mode="w", encoding="utf-8") as file:
+        json.dump(obj=metadata, fp=file, indent=4)
+    return output
+
+
+def _save_artifact(node: Node, output: Any, path: Path) -> None:
+    """Save the output of a node as an artifact.
+
+    The metadata file is written last, so that incomplete artifacts are ignored.
+
+    Parameters
+    ----------
+    node : Node
+        The node.
+    output : Any
+        Output of the node.
+    path : Path
+        Folder of the artifact.
+    """
+    if path.exists():
+        shutil.rmtree(path)
+    path.mkdir(parents=True)
+    data_path = path / ARTIFACT_DATA
+    if node.kind == FRAME:
+        cache.save_frame(df=output, path=data_path)
+    elif node.kind == JOBLIB:
+        joblib.dump(value=output, filename=data_path)
+    else:
+        with open(data_path, mode="w", encoding="utf-8") as file:
+            json.dump(obj=output, fp=file, indent=4)
+
+    now = time.time()
+    metadata = {
+        "kind": node.kind,
+        "created": now,
+        "last_access": now,
+        "size": _get_size(path=path),
+    }
+    with open(path / ARTIFACT_FILE, mode="w", encoding="utf-8") as file:
+        json.dump(obj=metadata, fp=file, indent=4)
+
+
+def evict_artifacts(
+    max_bytes: Optional[int] = None,
+    max_age_days: Optional[float] = None,
+    path: Path = PATH_ARTIFACTS,
+) -> List[Path]:
+    """Remove artifacts not accessed for a while, or least recently used ones.
+
+    Parameters
+    ----------
+    max_bytes : Optional[int], optional
+        Maximum total size of artifacts, least recently used ones are removed first,
+        by default None (no limit)
+    max_age_days : Optional[float], optional
+        Remove artifacts not accessed for this number of days, by default None (no
+        limit)
+    path : Path, optional
+        Folder of artifacts, by default PATH_ARTIFACTS
+
+    Returns
+    -------
+    List[Path]
+        Removed artifacts.
+    """
+    path = Path(path)
+    artifacts = []
+    for metadata_path in path.glob(f"*/*/{ARTIFACT_FILE}"):
+        with open(metadata_path, mode="r", encoding="utf-8") as file:
+            metadata = json.load(file)
+        artifacts.append((metadata["last_access"], metadata["size"], metadata_path))
+    artifacts.sort()
+
+    removed = []
+    total_bytes = sum(size for _, size, _ in artifacts)
+    now = time.time()
+    for last_access, size, metadata_path in artifacts:
+        too_old = max_age_days is not None and now - last_access > max_age_days * 86400
+        too_big = max_bytes is not None and total_bytes > max_bytes
+        if not (too_old or too_big):
+            continue
+        shutil.rmtree(metadata_path.parent)
+        removed.append(metadata_path.parent)
+        total_bytes -= size
+    return removed
+
+
+def _get_size(path: Path) -> int:
+    """Get the total size of the files of a folder.
+
+    Parameters
+    ----------
+    path : Path
+        The folder.
+
+    Returns
+    -------
+    int
+        Size in bytes.
+    """
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
@@ -10,4 +10,4 @@ EQUAL_ASPECT_RATIO_LAYOUT = {
     "width": 800,
 }
 
-TRANSPARENT_RED_MARKERS = {"color": "rgba(255,0,0,0.01)"}
+SAMPLE_MARKERS = {"size": 3, "opacity": 0.3}
@@ -0,0 +1,266 @@
+"""Module to predict the load of the next day (day-ahead) for all zones."""
+
+from pathlib import Path
+from typing import Dict, Optional
+
+import pandas as pd
+
+import ens_load_forecast.constants as cst
+from ens_load_forecast.data_preprocessing import (
+    aggregate_weather_record,
+    eastern_tz,
+    get_merged_dataset,
+    localize_weather_dates,
+    preprocess_load_forecast,
+    remove_forbidden_forecasts,
+)
+from ens_load_forecast.features_engineering import extract_features
+from ens_load_forecast.models import get_model_inputs
+from ens_load_forecast.paths import (
+    PATH_LATEST_LOAD_FORECAST,
+    PATH_LATEST_WEATHER,
+    PATH_PREDICTIONS,
+    PATH_SAVED_MODELS,
+    PATH_ZONES_AND_STATIONS,
+)
+from ens_load_forecast.registry import ModelRegistry, get_registry
+
+
+def predict_day_ahead(
+    delivery_date: str,
+    path_load_forecast: Path = PATH_LATEST_LOAD_FORECAST,
+    path_weather: Path = PATH_LATEST_WEATHER,
+    path_zones_and_stations: Path = PATH_ZONES_AND_STATIONS,
+    output_path: Optional[Path] = None,
+    model_names: Optional[Dict[str, str]] = None,
+    registry: Optional[ModelRegistry] = None,
+    compiled: bool = False,
+) -> pd.DataFrame:
+    """Predict the load of every zone for a delivery date.
+
+    Only forecasts targeting the delivery date are preprocessed, with the same
+    rules as the training data (forecasts issued after 5 AM the day before are
+    discarded, most recent forecast is kept).
+
+    Parameters
+    ----------
+    delivery_date : str
+        Delivery date (e.g. "2024-01-02"), in `EST`.
+    path_load_forecast : Path, optional
+        NYISO load forecasts, same format as `load_forecast.csv`, by default
+        PATH_LATEST_LOAD_FORECAST
+    path_weather : Path, optional
+        Weather forecasts, same format as `weather.csv`, by default
+        PATH_LATEST_WEATHER
+    path_zones_and_stations : Path, optional
+        Stations weights, by default PATH_ZONES_AND_STATIONS
+    output_path : Optional[Path], optional
+        Where to write predictions (csv). By default None, in which case they are
+        written in `PATH_PREDICTIONS/<delivery_date>.csv`.
+    model_names : Optional[Dict[str, str]], optional
+        Model used for each zone. By default None, in which case the model with the
+        lowest test RMSE is used.
+    registry : Optional[ModelRegistry], optional
+        Registry of saved models, by default the shared one.
+    compiled : bool, optional
+        Compile random forests and gradient boostings before predicting (see
+        `compiled_trees`), by default False. Compiled models are cached by the
+        registry. Models saved compiled (see `save_models`) are used as they are.
+
+    Returns
+    -------
+    pd.DataFrame
+        Predictions
+        - index: date (EST)
+        - columns:
+            - zone
+            - load_forecast: NYISO forecast (MW)
+            - load_prediction: corrected forecast (MW)
+            - model_name: model used
+    """
+    if registry is None:
+        registry = get_registry(path=PATH_SAVED_MODELS)
+    if model_names is None:
+        model_names = select_best_models(registry=registry)
+
+    start = pd.Timestamp(delivery_date).tz_localize(tz=eastern_tz)
+    end = start + pd.Timedelta(value=1, unit="days")
+
+    df_features = extract_features(
+        df=get_merged_dataset(
+            df_weather=get_weather_for_window(
+                start=start,
+                end=end,
+                path=path_weather,
+                path_zones_and_stations=path_zones_and_stations,
+            ),
+            df_load_actual=None,
+            df_load_forecast=get_load_forecast_for_window(
+                start=start, end=end, path=path_load_forecast
+            ),
+        )
+    )
+
+    predictions = []
+    for zone, df_zone in df_features.groupby(by=cst.ZONE, sort=False):
+        if zone not in model_names:
+            continue
+        model = registry.get_model(
+            zone=zone, model_name=model_names[zone], compiled=compiled
+        )
+        df_prediction = df_zone[[cst.ZONE, cst.LOAD_FORECAST]].copy()
+        df_prediction[cst.LOAD_PREDICTION] = model.predict(
+            X=get_model_inputs(df=df_zone)
+        )
+        df_prediction[cst.MODEL_NAME] = model_names[zone]
+        predictions.append(df_prediction)
+    if len(predictions) == 0:
+        if len(df_features) == 0:
+            raise ValueError(
+                f"No load and weather forecasts target {delivery_date} in "
+                f"{path_load_forecast} and {path_weather}."
+            )
+        missing_zones = sorted(
+            set(df_features[cst.ZONE].astype(str)) - set(model_names)
+        )
+        raise ValueError(
+            f"Cannot predict {delivery_date}: no saved model for zones {missing_zones}."
+        )
+    df_predictions = pd.concat(predictions).sort_values(
+        by=[cst.DELIVERY_TS, cst.ZONE], kind="stable"
+    )
+
+    if output_path is None:
+        output_path = PATH_PREDICTIONS / f"{delivery_date}.csv"
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    df_predictions.to_csv(path_or_buf=output_path)
+    return df_predictions
+
+
+def get_weather_for_window(
+    start: pd.Timestamp,
+    end: pd.Timestamp,
+    path: Path = PATH_LATEST_WEATHER,
+    path_zones_and_stations: Path = PATH_ZONES_AND_STATIONS,
+) -> pd.DataFrame:
+    """Get aggregated weather forecasts for a delivery window.
+
+    Parameters
+    ----------
+    start : pd.Timestamp
+        Start of the window (included).
+    end : pd.Timestamp
+        End of the window (excluded).
+    path : Path, optional
+        Weather forecasts, by default PATH_LATEST_WEATHER
+    path_zones_and_stations : Path, optional
+        Stations weights, by default PATH_ZONES_AND_STATIONS
+
+    Returns
+    -------
+    pd.DataFrame
+        Aggregated weather (see `get_weather`).
+    """
+    df = pd.read_csv(
+        path, index_col=1, low_memory=False
+    )  # using second column as index (target date of the forecast)
+    # Only rows of the window are preprocessed
+    df = _select_window(
+        df=df, dates=pd.to_datetime(df.index, utc=True), start=start, end=end
+    )
+    df = remove_forbidden_forecasts(
+        df=localize_weather_dates(df=df), duplicates_key=cst.STATION_CODE
+    )
+    df_zones_and_stations = pd.read_csv(
+        path_zones_and_stations, index_col=1
+    )  # using station code as index
+    return aggregate_weather_record(
+        df=df.join(other=df_zones_and_stations, on=cst.STATION_CODE, how="left")
+    )
+
+
+def get_load_forecast_for_window(
+    start: pd.Timestamp,
+    end: pd.Timestamp,
+    path: Path = PATH_LATEST_LOAD_FORECAST,
+) -> pd.DataFrame:
+    """Get load forecasts for a delivery window.
+
+    Parameters
+    ----------
+    start : pd.Timestamp
+        Start of the window (included).
+    end : pd.Timestamp
+        End of the window (excluded).
+    path : Path, optional
+        NYISO load forecasts, by default PATH_LATEST_LOAD_FORECAST
+
+    Returns
+    -------
+    pd.DataFrame
+        Load forecasts (see `get_load_forecast`).
+    """
+    df = pd.read_csv(
+        path, index_col=0
+    )  # use first column as index (target date of the forecast)
+    # Only rows of the window are preprocessed
+    dates = pd.to_datetime(df.index).tz_localize(tz=eastern_tz, ambiguous=True)
+    return preprocess_load_forecast(
+        df=_select_window(df=df, dates=dates, start=start, end=end)
+    )
+
+
+def select_best_models(registry: ModelRegistry) -> Dict[str, str]:
+    """Select, for each zone, the saved model with the lowest test RMSE.
+
+    Parameters
+    ----------
+    registry : ModelRegistry
+        Registry of saved models.
+
+    Returns
+    -------
+    Dict[str, str]
+        Model name for each zone.
+    """
+    best_models = {}
+    for zone in registry.zones:
+        available_models = registry.get_model_names(zone=zone)
+        if len(available_models) == 0 or not registry.has_scores(zone=zone):
+            continue
+        zone_scores = registry.get_scores(zone=zone)
+        best_model = min(
+            (name for name in available_models if name in zone_scores),
+            key=lambda name: zone_scores[name][cst.TEST][cst.RMSE],
+            default=None,
+        )
+        if best_model is not None:
+            best_models[zone] = best_model
+    return best_models
+
+
+def _select_window(
+    df: pd.DataFrame,
+    dates: pd.DatetimeIndex,
+    start: pd.Timestamp,
+    end: pd.Timestamp,
+) -> pd.DataFrame:
+    """Select rows whose date is in [start, end).
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Raw DataFrame.
+    dates : pd.DatetimeIndex
+        Localized target date of each row.
+    start : pd.Timestamp
+        Start of the window (included).
+    end : pd.Timestamp
+        End of the window (excluded).
+
+    Returns
+    -------
+    pd.DataFrame
+        Copy of the selected rows, to be preprocessed.
+    """
+    return df[(dates >= start) & (dates < end)].copy()
@@ -0,0 +1,268 @@
+"""Module implementing a lazy registry of saved models."""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import joblib
+from sklearn.base import BaseEstimator
+
+import ens_load_forecast.constants as cst
+from ens_load_forecast.compiled_trees import compile_model
+from ens_load_forecast.paths import PATH_SAVED_MODELS
+
+
+class ModelRegistry:
+    """Registry of saved models, loaded on first access.
+
+    Artifacts of `saved_models/` are indexed without being loaded. Loaded models are
+    kept in a least recently used (LRU) cache, bounded by a number of models and/or
+    by the size of their files. Compiled versions of the models (see
+    `compiled_trees`) are cached along with them, and evicted with them.
+
+    Parameters
+    ----------
+    path : Path, optional
+        Folder containing one sub-folder per zone, by default PATH_SAVED_MODELS
+    max_models : Optional[int], optional
+        Maximum number of resident models (None for no limit), by default None
+    max_bytes : Optional[int], optional
+        Maximum size of resident models, measured by their file size (None for no
+        limit), by default None
+    mmap_mode : Optional[str], optional
+        Memory-map the NumPy arrays of uncompressed models (see `save_models`) with
+        this mode (e.g. "r"), by default None. Pages of a memory-mapped file are
+        shared by the processes loading it, through the page cache.
+    """
+
+    def __init__(  # noqa: D107 (disable ruff: missing docstring)
+        self,
+        path: Path = PATH_SAVED_MODELS,
+        max_models: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        mmap_mode: Optional[str] = None,
+    ) -> None:
+        self.path = Path(path)
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+        self.mmap_mode = mmap_mode
+        self._lock = threading.RLock()
+        self._models: "OrderedDict[Tuple[str, str], BaseEstimator]" = OrderedDict()
+        self._compiled: Dict[Tuple[str, str], Any] = {}
+        self._scores: Dict[str, Any] = {}
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "load_time": 0.0}
+        self._load_times: Dict[Tuple[str, str], float] = {}
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Rescan the folder of saved models, and drop resident models."""
+        with self._lock:
+            self._artifacts: Dict[str, Dict[str, Path]] = {}
+            self._sizes: Dict[Tuple[str, str], int] = {}
+            self._score_files: Dict[str, Path] = {}
+            self._compressed: Set[Tuple[str, str]] = set()
+            if self.path.exists():
+                for zone_path in sorted(self.path.iterdir()):
+                    if not zone_path.is_dir():
+                        continue
+                    zone = zone_path.name
+                    self._artifacts[zone] = {}
+                    for file in sorted(zone_path.iterdir()):
+                        if file.suffix == cst.JOBLIB:
+                            self._artifacts[zone][file.stem] = file
+                            self._sizes[(zone, file.stem)] = file.stat().st_size
+                        elif file.name == f"scores{cst.JSON}":
+                            self._score_files[zone] = file
+                        elif file.name == cst.ARTIFACTS_FILE:
+                            with open(file, mode="r", encoding="utf-8") as metadata:
+                                for name, artifact in json.load(metadata).items():
+                                    if not artifact.get("mmap", True):
+                                        self._compressed.add((zone, name))
+            self._models.clear()
+            self._compiled.clear()
+            self._scores.clear()
+            self._load_times.clear()
+
+    @property
+    def zones(self) -> List[str]:
+        """Zones having a folder of saved models."""
+        return list(self._artifacts)
+
+    def get_model_names(self, zone: str) -> List[str]:
+        """Get names of the models saved for a zone.
+
+        Parameters
+        ----------
+        zone : str
+            The zone.
+
+        Returns
+        -------
+        List[str]
+            Model names.
+        """
+        return list(self._artifacts.get(zone, {}))
+
+    def get_model(
+        self, zone: str, model_name: str, compiled: bool = False
+    ) -> BaseEstimator:
+        """Get a model, loading it if it is not resident.
+
+        Parameters
+        ----------
+        zone : str
+            The zone.
+        model_name : str
+            Name of the model.
+        compiled : bool, optional
+            Get the model compiled by `compile_model`, compiling it on first
+            access, by default False
+
+        Returns
+        -------
+        BaseEstimator
+            The model.
+        """
+        key = (zone, model_name)
+        with self._lock:
+            if key in self._models:
+                self._stats["hits"] += 1
+                self._models.move_to_end(key)
+            else:
+                self._stats["misses"] += 1
+                start = time.perf_counter()
+                # Compressed files cannot be memory-mapped
+                mmap_mode = None if key in self._compressed else self.mmap_mode
+                self._models[key] = joblib.load(
+                    filename=self._artifacts[zone][model_name], mmap_mode=mmap_mode
+                )
+                load_time = time.perf_counter() - start
+                self._stats["load_time"] += load_time
+                self._load_times.setdefault(key, load_time)
+                self._evict()
+            if not compiled:
+                return self._models[key]
+            if key not in self._compiled:
+                self._compiled[key] = compile_model(model=self._models[key])
+            return self._compiled[key]
+
+    def get_scores(self, zone: str) -> Dict[str, Any]:
+        """Get the scores of the models of a zone.
+
+        Parameters
+        ----------
+        zone : str
+            The zone.
+
+        Returns
+        -------
+        Dict[str, Any]
+            Scores (one key per model type then train/test).
+        """
+        with self._lock:
+            if zone not in self._scores:
+                with open(
+                    file=self._score_files[zone], mode="r", encoding="utf-8"
+                ) as score_file:
+                    self._scores[zone] = json.load(score_file)
+            return self._scores[zone]
+
+    def has_scores(self, zone: str) -> bool:
+        """Check whether scores were saved for a zone.
+
+        Parameters
+        ----------
+        zone : str
+            The zone.
+
+        Returns
+        -------
+        bool
+            True if a scores file exists.
+        """
+        return zone in self._score_files
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics.
+
+        Returns
+        -------
+        Dict[str, Any]
+            Hits, misses (i.e. loads), evictions, total load time (seconds), number
+            and size (bytes) of resident models.
+        """
+        with self._lock:
+            return {
+                **self._stats,
+                "resident_models": len(self._models),
+                "resident_bytes": self._get_resident_bytes(),
+            }
+
+    def get_load_times(self) -> Dict[str, Dict[str, float]]:
+        """Get the time taken by the first load of each loaded model.
+
+        Returns
+        -------
+        Dict[str, Dict[str, float]]
+            Load time in seconds, per zone then model name, of the models loaded
+            since the last refresh.
+        """
+        with self._lock:
+            load_times: Dict[str, Dict[str, float]] = {}
+            for (zone, model_name), load_time in self._load_times.items():
+                load_times.setdefault(zone, {})[model_name] = load_time
+            return load_times
+
+    def _get_resident_bytes(self) -> int:
+        """Get the size of the files of resident models.
+
+        Returns
+        -------
+        int
+            Size in bytes.
+        """
+        return sum(self._sizes[key] for key in self._models)
+
+    def _evict(self) -> None:
+        """Evict least recently used models until capacity is respected.
+
+        The most recently used model is never evicted. Compiled versions of evicted
+        models are dropped.
+        """
+        while len(self._models) > 1 and (
+            (self.max_models is not None and len(self._models) > self.max_models)
+            or (
+                self.max_bytes is not None
+                and self._get_resident_bytes() > self.max_bytes
+            )
+        ):
+            key, _ = self._models.popitem(last=False)
+            self._compiled.pop(key, None)
+            self._stats["evictions"] += 1
+
+
+_registries: Dict[Path, ModelRegistry] = {}
+
+
+def get_registry(path: Path = PATH_SAVED_MODELS) -> ModelRegistry:
+    """Get the shared registry of a folder of saved models.
+
+    The folder is only scanned the first time.
+
+    Parameters
+    ----------
+    path : Path, optional
+        Folder of saved models, by default PATH_SAVED_MODELS
+
+    Returns
+    -------
+    ModelRegistry
+        The registry.
+    """
+    path = Path(path)
+    if path not in _registries:
+        _registries[path] = ModelRegistry(path=path)
+    return _registries[path]
@@ -0,0 +1,301 @@
+"""Module implementing a linear regression fitted from streamed statistics.
+
+`StreamingLinearRegression` only keeps the sufficient statistics of the least
+squares problem: the number of rows, the means of the expanded features and of
+the target, the centered `XᵀX` and the centered `Xᵀy`. They are accumulated chunk
+by chunk, so the design matrix is never held in memory. With `degree=2`, the
+pairwise products of the features are computed for one chunk at a time, in the
+order of `PolynomialFeatures(degree=2, include_bias=False)`.
+
+Statistics are centered per chunk and merged with the pairwise update of Chan et
+al., which avoids the cancellation of `XᵀX - n * mean * meanᵀ` for features far
+from zero. Statistics of several workers are combined with `merge`.
+
+The normal equations are solved with a pseudo-inverse, giving the minimum norm
+solution (as `LinearRegression` does when one-hots are collinear with the
+intercept), with an optional ridge penalty on the coefficients.
+"""
+
+from typing import Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, RegressorMixin
+
+import ens_load_forecast.constants as cst
+
+DEFAULT_CHUNKSIZE = 4096
+
+
+class StreamingLinearRegression(BaseEstimator, RegressorMixin):
+    """Linear regression on polynomial features, fitted from streamed statistics.
+
+    Parameters
+    ----------
+    degree : int, optional
+        Degree of the polynomial features, 1 or 2, by default 1
+    alpha : float, optional
+        Ridge penalty on the coefficients (not on the intercept), by default 0.0
+    chunksize : int, optional
+        Rows expanded at once by `fit` and `predict`, by default DEFAULT_CHUNKSIZE
+    keep_statistics : bool, optional
+        Keep the statistics once solved, to merge or update the model later, by
+        default True. Otherwise they are dropped to keep saved models small.
+    """
+
+    def __init__(  # noqa: D107 (disable ruff: missing docstring)
+        self,
+        degree: int = 1,
+        alpha: float = 0.0,
+        chunksize: int = DEFAULT_CHUNKSIZE,
+        keep_statistics: bool = True,
+    ) -> None:
+        super().__init__()
+        self.degree = degree
+        self.alpha = alpha
+        self.chunksize = chunksize
+        self.keep_statistics = keep_statistics
+
+    def fit(self, X, y) -> "StreamingLinearRegression":  # noqa: D102, N803
+        return self.fit_stream(chunks=iter_chunks(X=X, y=y, chunksize=self.chunksize))
+
+    def fit_stream(
+        self, chunks: Iterable[Tuple[np.ndarray, np.ndarray]]
+    ) -> "StreamingLinearRegression":
+        """Fit the model on chunks of rows.
+
+        Parameters
+        ----------
+        chunks : Iterable[Tuple[np.ndarray, np.ndarray]]
+            Features and target of each chunk (see `iter_chunks`).
+
+        Returns
+        -------
+        StreamingLinearRegression
+            Fitted model.
+        """
+        self.reset()
+        for X, y in chunks:  # noqa: N806
+            self.partial_fit(X=X, y=y)
+        return self.solve()
+
+    def reset(self) -> "StreamingLinearRegression":
+        """Drop the accumulated statistics.
+
+        Returns
+        -------
+        StreamingLinearRegression
+            Model without statistics.
+        """
+        self.n_samples_ = 0
+        self.n_features_in_ = None
+        self.x_mean_ = None
+        self.y_mean_ = 0.0
+        self.xtx_ = None
+        self.xty_ = None
+        return self
+
+    def partial_fit(self, X, y) -> "StreamingLinearRegression":  # noqa: N803
+        """Add the statistics of a chunk of rows, without solving.
+
+        Parameters
+        ----------
+        X : array-like
+            Features of the chunk, shape (n_rows, n_features).
+        y : array-like
+            Target of the chunk, shape (n_rows,).
+
+        Returns
+        -------
+        StreamingLinearRegression
+            Model with updated statistics (call `solve` to update coefficients).
+        """
+        if not hasattr(self, "n_samples_"):
+            self.reset()
+        X = np.asarray(X, dtype=np.float64)  # noqa: N806
+        y = np.asarray(y, dtype=np.float64)
+        if len(y) == 0:
+            return self
+        features = self._expand(X=X)
+        x_mean = features.mean(axis=0)
+        y_mean = y.mean()
+        centered = features - x_mean
+        return self._add_statistics(
+            n_samples=len(y),
+            n_features_in=X.shape[1],
+            x_mean=x_mean,
+            y_mean=y_mean,
+            xtx=centered.T @ centered,
+            xty=centered.T @ (y - y_mean),
+        )
+
+    def merge(self, other: "StreamingLinearRegression") -> "StreamingLinearRegression":
+        """Add the statistics of another model (e.g. fitted by another worker).
+
+        Parameters
+        ----------
+        other : StreamingLinearRegression
+            Model of the same degree, fitted on other rows.
+
+        Returns
+        -------
+        StreamingLinearRegression
+            Model with merged statistics (call `solve` to update coefficients).
+        """
+        if other.degree != self.degree:
+            raise ValueError("Cannot merge models of different degrees.")
+        if not hasattr(self, "n_samples_"):
+            self.reset()
+        if other.n_samples_ == 0:
+            return self
+        return self._add_statistics(
+            n_samples=other.n_samples_,
+            n_features_in=other.n_features_in_,
+            x_mean=other.x_mean_,
+            y_mean=other.y_mean_,
+            xtx=other.xtx_,
+            xty=other.xty_,
+        )
+
+    def solve(self) -> "StreamingLinearRegression":
+        """Solve the normal equations from the accumulated statistics.
+
+        Returns
+        -------
+        StreamingLinearRegression
+            Model with `coef_` and `intercept_`.
+        """
+        if getattr(self, "n_samples_", 0) == 0:
+            raise ValueError("No rows were given to the model.")
+        if self.xtx_ is None:
+            raise ValueError("Statistics were dropped (`keep_statistics=False`).")
+        xtx = self.xtx_ + self.alpha * np.eye(len(self.xtx_))
+        # Columns are scaled to unit norm, since squared loads and one-hots differ
+        # by orders of magnitude
+        scale = np.sqrt(np.diag(xtx))
+        scale[scale == 0] = 1.0
+        eigenvalues, eigenvectors = np.linalg.eigh(xtx / np.outer(scale, scale))
+        rcond = len(xtx) * np.finfo(np.float64).eps
+        kept = eigenvalues > rcond * max(eigenvalues.max(), 0.0)
+        coef = eigenvectors[:, kept] @ (
+            eigenvectors[:, kept].T @ (self.xty_ / scale) / eigenvalues[kept]
+        )
+        coef /= scale
+        # Directions without information (e.g. one-hots summing to one, or a month
+        # absent from the rows) are removed in the original scale, to get the
+        # minimum norm solution of `LinearRegression`
+        if not kept.all():
+            null_space, _ = np.linalg.qr(eigenvectors[:, ~kept] / scale[:, np.newaxis])
+            coef -= null_space @ (null_space.T @ coef)
+        self.coef_ = coef
+        self.intercept_ = self.y_mean_ - self.x_mean_ @ self.coef_
+        if not self.keep_statistics:
+            self.xtx_ = None
+            self.xty_ = None
+        return self
+
+    def predict(self, X) -> np.ndarray:  # noqa: D102, N803
+        X = np.asarray(X, dtype=np.float64)  # noqa: N806
+        predictions = np.empty(len(X))
+        for start in range(0, len(X), self.chunksize):
+            stop = start + self.chunksize
+            predictions[start:stop] = (
+                self._expand(X=X[start:stop]) @ self.coef_ + self.intercept_
+            )
+        return predictions
+
+    def _expand(self, X: np.ndarray) -> np.ndarray:  # noqa: N803
+        """Get polynomial features of a chunk (order of `PolynomialFeatures`)."""
+        if self.degree == 1:
+            return X
+        if self.degree != 2:
+            raise ValueError(f"Unsupported degree: {self.degree}")
+        rows, columns = np.triu_indices(X.shape[1])
+        return np.hstack([X, X[:, rows] * X[:, columns]])
+
+    def _add_statistics(
+        self,
+        n_samples: int,
+        n_features_in: int,
+        x_mean: np.ndarray,
+        y_mean: float,
+        xtx: np.ndarray,
+        xty: np.ndarray,
+    ) -> "StreamingLinearRegression":
+        """Merge centered statistics of other rows into the model statistics."""
+        if xtx is None or (self.n_samples_ != 0 and self.xtx_ is None):
+            raise ValueError("Statistics were dropped (`keep_statistics=False`).")
+        if self.n_samples_ == 0:
+            self.n_samples_ = n_samples
+            self.n_features_in_ = n_features_in
+            self.x_mean_ = np.array(x_mean, dtype=np.float64)
+            self.y_mean_ = float(y_mean)
+            self.xtx_ = np.array(xtx, dtype=np.float64)
+            self.xty_ = np.array(xty, dtype=np.float64)
+            return self
+        if n_features_in != self.n_features_in_:
+            raise ValueError(
+                f"Expected {self.n_features_in_} features, got {n_features_in}."
+            )
+        n_total = self.n_samples_ + n_samples
+        weight = self.n_samples_ * n_samples / n_total
+        x_delta = x_mean - self.x_mean_
+        y_delta = y_mean - self.y_mean_
+        self.xtx_ += xtx + weight * np.outer(x_delta, x_delta)
+        self.xty_ += xty + weight * x_delta * y_delta
+        self.x_mean_ += x_delta * n_samples / n_total
+        self.y_mean_ += y_delta * n_samples / n_total
+        self.n_samples_ = n_total
+        return self
+
+
+def iter_chunks(
+    X, y, chunksize: int = DEFAULT_CHUNKSIZE  # noqa: N803
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Split features and target in chunks of rows.
+
+    Parameters
+    ----------
+    X : array-like
+        Features, shape (n_rows, n_features).
+    y : array-like
+        Target, shape (n_rows,).
+    chunksize : int, optional
+        Rows per chunk, by default DEFAULT_CHUNKSIZE
+
+    Yields
+    ------
+    Iterator[Tuple[np.ndarray, np.ndarray]]
+        Features and target of each chunk.
+    """
+    X = np.asarray(X)  # noqa: N806
+    y = np.asarray(y)
+    for start in range(0, len(y), chunksize):
+        yield X[start : start + chunksize], y[start : start + chunksize]
+
+
+def iter_feature_chunks(
+    frames: Iterable[pd.DataFrame], chunksize: Optional[int] = None
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Get model inputs and actual load of a stream of features DataFrames.
+
+    Parameters
+    ----------
+    frames : Iterable[pd.DataFrame]
+        Features DataFrames (see `extract_features`), e.g. one per zone or per
+        period, only one of them being loaded at a time.
+    chunksize : Optional[int], optional
+        Rows per chunk, by default None (one chunk per DataFrame)
+
+    Yields
+    ------
+    Iterator[Tuple[np.ndarray, np.ndarray]]
+        Features (ordered as `FEATURES_LIST`, as float64) and actual load.
+    """
+    for df in frames:
+        X = df[cst.FEATURES_LIST].to_numpy(dtype=np.float64)  # noqa: N806
+        y = df[cst.LOAD].to_numpy(dtype=np.float64)
+        if chunksize is None:
+            yield X, y
+        else:
+            yield from iter_chunks(X=X, y=y, chunksize=chunksize)
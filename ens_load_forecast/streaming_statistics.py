@@ -0,0 +1,350 @@
+"""Module computing the feature statistics of analysis plots, in one streaming pass.
+
+`DataFrame.corr` on the features of every zone mixes the zones together, and
+plotting every row in a scatter matrix makes figures grow with the history. Both
+are instead computed from statistics accumulated chunk by chunk:
+- `ZoneMoments` keeps, for each zone, the number of rows, the means and the
+  centered co-moments (`XᵀX` of centered rows) of the columns. The statistics of a
+  chunk are merged with the pairwise update of Chan et al. (as in
+  `streaming_regression`), and those of all zones give the correlations of all
+  rows together. Rows with a missing value are ignored.
+- `ZoneReservoir` keeps a uniform sample of at most `size` rows of each zone: every
+  row gets a random key, and the rows with the smallest keys of each zone are kept
+  (reservoir sampling, in a form that can be merged).
+
+Both can be merged with the statistics of other chunks (e.g. computed by other
+workers). `compute_feature_statistics` runs them over a features DataFrame, and
+the `feature_statistics` node of the pipeline saves their results as an artifact.
+"""
+
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+import ens_load_forecast.constants as cst
+
+DEFAULT_CHUNKSIZE = 65536
+DEFAULT_SAMPLE_SIZE = 1000  # Rows per zone
+
+# Columns of the correlation matrices
+CORRELATION_COLUMNS = [*cst.FEATURES_LIST, cst.LOAD]
+# Columns of the scatter matrix (calendar one-hots excluded)
+SAMPLE_COLUMNS = [
+    cst.LOAD_FORECAST,
+    cst.TMP,
+    cst.DPT,
+    cst.SKY,
+    cst.WSP,
+    cst.GST,
+    cst.PSN,
+    cst.COS_WDR,
+    cst.SIN_WDR,
+    cst.LOAD,
+]
+
+
+class ZoneMoments:
+    """Running means and co-moments of columns, per zone.
+
+    Parameters
+    ----------
+    columns : Optional[List[str]], optional
+        Columns of the statistics, by default None (CORRELATION_COLUMNS)
+    """
+
+    def __init__(  # noqa: D107 (disable ruff: missing docstring)
+        self, columns: Optional[List[str]] = None
+    ) -> None:
+        self.columns = CORRELATION_COLUMNS if columns is None else list(columns)
+        self.reset()
+
+    def reset(self) -> "ZoneMoments":
+        """Drop the accumulated statistics.
+
+        Returns
+        -------
+        ZoneMoments
+            Empty statistics.
+        """
+        self.n_samples_: Dict[str, int] = {}
+        self.means_: Dict[str, np.ndarray] = {}
+        self.comoments_: Dict[str, np.ndarray] = {}
+        return self
+
+    def partial_fit(self, df: pd.DataFrame) -> "ZoneMoments":
+        """Add the statistics of a chunk of rows.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            Chunk of a features DataFrame, with a `zone` column and `columns`.
+
+        Returns
+        -------
+        ZoneMoments
+            Updated statistics.
+        """
+        values = df[self.columns].to_numpy(dtype=np.float64)
+        valid = ~np.isnan(values).any(axis=1)
+        codes, zones = pd.factorize(np.asarray(df[cst.ZONE])[valid])
+        values = values[valid]
+        # Rows sorted by zone, so that each zone is a slice
+        order = np.argsort(codes, kind="stable")
+        stops = np.cumsum(np.bincount(codes, minlength=len(zones)))
+        for zone, start, stop in zip(zones, stops - np.diff(stops, prepend=0), stops):
+            zone_values = values[order[start:stop]]
+            mean = zone_values.mean(axis=0)
+            centered = zone_values - mean
+            self._add_statistics(
+                zone=zone,
+                n_samples=len(zone_values),
+                mean=mean,
+                comoment=centered.T @ centered,
+            )
+        return self
+
+    def merge(self, other: "ZoneMoments") -> "ZoneMoments":
+        """Add the statistics of other rows (e.g. accumulated by another worker).
+
+        Parameters
+        ----------
+        other : ZoneMoments
+            Statistics of the same columns.
+
+        Returns
+        -------
+        ZoneMoments
+            Merged statistics.
+        """
+        if other.columns != self.columns:
+            raise ValueError("Cannot merge statistics of different columns.")
+        for zone, n_samples in other.n_samples_.items():
+            self._add_statistics(
+                zone=zone,
+                n_samples=n_samples,
+                mean=other.means_[zone],
+                comoment=other.comoments_[zone],
+            )
+        return self
+
+    def get_correlations(self) -> pd.DataFrame:
+        """Get the Pearson correlation matrix of each zone, and of all zones.
+
+        Returns
+        -------
+        pd.DataFrame
+            Correlations, with index (zone, column) and one column per column.
+            Zones are sorted, followed by `global` (all rows together). Columns
+            constant in a zone have missing correlations.
+        """
+        pooled = ZoneMoments(columns=self.columns)
+        for zone in self.n_samples_:
+            pooled._add_statistics(
+                zone=cst.GLOBAL,
+                n_samples=self.n_samples_[zone],
+                mean=self.means_[zone],
+                comoment=self.comoments_[zone],
+            )
+        comoments = {
+            **{zone: self.comoments_[zone] for zone in sorted(self.comoments_)},
+            **pooled.comoments_,
+        }
+        frames = {}
+        for zone, comoment in comoments.items():
+            deviations = np.sqrt(np.diag(comoment))
+            with np.errstate(invalid="ignore", divide="ignore"):
+                correlations = comoment / np.outer(deviations, deviations)
+            correlations[np.outer(deviations, deviations) == 0] = np.nan
+            frames[zone] = pd.DataFrame(
+                data=np.clip(correlations, -1.0, 1.0),
+                index=self.columns,
+                columns=self.columns,
+            )
+        if len(frames) == 0:
+            raise ValueError("No rows were given to the statistics.")
+        return pd.concat(frames, names=[cst.ZONE, None])
+
+    def _add_statistics(
+        self, zone: str, n_samples: int, mean: np.ndarray, comoment: np.ndarray
+    ) -> None:
+        """Merge centered statistics of other rows of a zone."""
+        if n_samples == 0:
+            return
+        if zone not in self.n_samples_:
+            self.n_samples_[zone] = n_samples
+            self.means_[zone] = np.array(mean, dtype=np.float64)
+            self.comoments_[zone] = np.array(comoment, dtype=np.float64)
+            return
+        n_total = self.n_samples_[zone] + n_samples
+        delta = mean - self.means_[zone]
+        self.comoments_[zone] += comoment + (
+            self.n_samples_[zone] * n_samples / n_total
+        ) * np.outer(delta, delta)
+        self.means_[zone] += delta * n_samples / n_total
+        self.n_samples_[zone] = n_total
+
+
+class ZoneReservoir:
+    """Uniform sample of the rows of each zone, of a fixed size.
+
+    Parameters
+    ----------
+    size : int, optional
+        Maximum number of rows kept per zone, by default DEFAULT_SAMPLE_SIZE
+    columns : Optional[List[str]], optional
+        Columns kept, besides the zone, by default None (SAMPLE_COLUMNS)
+    random_state : Optional[int], optional
+        Seed of the random keys, by default 0. Reservoirs merged together must
+        have different seeds.
+    """
+
+    def __init__(  # noqa: D107 (disable ruff: missing docstring)
+        self,
+        size: int = DEFAULT_SAMPLE_SIZE,
+        columns: Optional[List[str]] = None,
+        random_state: Optional[int] = 0,
+    ) -> None:
+        self.size = size
+        self.columns = SAMPLE_COLUMNS if columns is None else list(columns)
+        self.random_state = random_state
+        self.reset()
+
+    def reset(self) -> "ZoneReservoir":
+        """Drop the sampled rows.
+
+        Returns
+        -------
+        ZoneReservoir
+            Empty reservoir.
+        """
+        self.sample_: Optional[pd.DataFrame] = None
+        self.keys_ = np.empty(0)
+        self._random_generator = np.random.default_rng(self.random_state)
+        return self
+
+    def partial_fit(self, df: pd.DataFrame) -> "ZoneReservoir":
+        """Sample a chunk of rows.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            Chunk of a features DataFrame, with a `zone` column and `columns`.
+
+        Returns
+        -------
+        ZoneReservoir
+            Updated reservoir.
+        """
+        keys = self._random_generator.random(len(df))
+        return self._add_rows(rows=df[[cst.ZONE, *self.columns]], keys=keys)
+
+    def merge(self, other: "ZoneReservoir") -> "ZoneReservoir":
+        """Add the rows sampled by another reservoir (e.g. of another worker).
+
+        Parameters
+        ----------
+        other : ZoneReservoir
+            Reservoir of the same columns, sampled from other rows.
+
+        Returns
+        -------
+        ZoneReservoir
+            Merged reservoir, keeping the rows of smallest keys of both.
+        """
+        if other.columns != self.columns:
+            raise ValueError("Cannot merge samples of different columns.")
+        if other.sample_ is None:
+            return self
+        return self._add_rows(rows=other.sample_, keys=other.keys_)
+
+    def get_sample(self) -> pd.DataFrame:
+        """Get the sampled rows.
+
+        Returns
+        -------
+        pd.DataFrame
+            Sampled rows (with their original index), sorted by zone and date, with
+            a `zone` column and `columns`.
+        """
+        if self.sample_ is None:
+            raise ValueError("No rows were given to the reservoir.")
+        return self.sample_.sort_index(kind="stable").sort_values(
+            by=cst.ZONE, kind="stable"
+        )
+
+    def _add_rows(self, rows: pd.DataFrame, keys: np.ndarray) -> "ZoneReservoir":
+        """Keep the rows of smallest keys of each zone, among sampled and new rows."""
+        if self.sample_ is not None:
+            rows = pd.concat([self.sample_, rows])
+            keys = np.concatenate([self.keys_, keys])
+        codes, _ = pd.factorize(np.asarray(rows[cst.ZONE]))
+        # Rows sorted by zone then key, ranked within their zone
+        order = np.lexsort((keys, codes))
+        sorted_codes = codes[order]
+        starts = np.flatnonzero(np.diff(sorted_codes, prepend=-1) != 0)
+        ranks = np.arange(len(order)) - np.repeat(
+            starts, np.diff(starts, append=len(order))
+        )
+        kept = np.sort(order[ranks < self.size])
+        self.sample_ = rows.iloc[kept]
+        self.keys_ = keys[kept]
+        return self
+
+
+def iter_frame_chunks(
+    df: pd.DataFrame, chunksize: int = DEFAULT_CHUNKSIZE
+) -> Iterator[pd.DataFrame]:
+    """Split a DataFrame in chunks of rows.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame.
+    chunksize : int, optional
+        Rows per chunk, by default DEFAULT_CHUNKSIZE
+
+    Yields
+    ------
+    Iterator[pd.DataFrame]
+        Chunks, in the order of the rows.
+    """
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start : start + chunksize]
+
+
+def compute_feature_statistics(
+    df_features: pd.DataFrame,
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+    random_state: Optional[int] = 0,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+) -> Dict[str, pd.DataFrame]:
+    """Compute the correlations and the sample of each zone, in one pass.
+
+    Parameters
+    ----------
+    df_features : pd.DataFrame
+        Features DataFrame (see `extract_features`), with a `zone` column.
+    sample_size : int, optional
+        Rows sampled per zone, by default DEFAULT_SAMPLE_SIZE
+    random_state : Optional[int], optional
+        Seed of the sampling, by default 0
+    chunksize : int, optional
+        Rows per chunk, by default DEFAULT_CHUNKSIZE
+
+    Returns
+    -------
+    Dict[str, pd.DataFrame]
+        Statistics, with keys:
+        - correlations: see `ZoneMoments.get_correlations`
+        - sample: see `ZoneReservoir.get_sample`
+    """
+    moments = ZoneMoments()
+    reservoir = ZoneReservoir(size=sample_size, random_state=random_state)
+    for chunk in iter_frame_chunks(df=df_features, chunksize=chunksize):
+        moments.partial_fit(df=chunk)
+        reservoir.partial_fit(df=chunk)
+    return {
+        cst.CORRELATIONS: moments.get_correlations(),
+        cst.SAMPLE: reservoir.get_sample(),
+    }
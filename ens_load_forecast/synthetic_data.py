@@ -0,0 +1,364 @@
+"""Module to generate synthetic data with the shape of the NYISO data.
+
+Generated files have the same names, columns and formats as the real csv files
+(see `paths`), so that the whole pipeline can be run and benchmarked without them:
+- actual loads depend on the hour, the day of week and the temperature,
+- NYISO load forecasts are noisy actual loads, issued every day for the next days,
+- weather forecasts are issued several times a day for every station, in UTC, with
+  missing wind gusts and `NG` wind speeds,
+- stations are weighted per zone, some of them being shared by two zones.
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+import ens_load_forecast.constants as cst
+from ens_load_forecast.paths import (
+    PATH_LOAD_ACTUAL,
+    PATH_LOAD_FORECAST,
+    PATH_SYNTHETIC_DATA,
+    PATH_WEATHER,
+    PATH_ZONES_AND_STATIONS,
+)
+
+
+def generate_synthetic_data(
+    path: Path = PATH_SYNTHETIC_DATA,
+    n_years: float = 1.0,
+    zones: Optional[List[str]] = None,
+    n_stations: int = 30,
+    vintages_per_day: int = 2,
+    horizon_days: int = 2,
+    ng_rate: float = 0.01,
+    missing_rate: float = 0.02,
+    start: str = "2020-01-01",
+    seed: int = 0,
+) -> Dict[str, Path]:
+    """Generate synthetic csv files with the shape of the NYISO data.
+
+    Parameters
+    ----------
+    path : Path, optional
+        Output folder, by default PATH_SYNTHETIC_DATA
+    n_years : float, optional
+        Number of years of delivery dates, by default 1.0
+    zones : Optional[List[str]], optional
+        Zones, by default None (NYISO zones, see `ZONES`)
+    n_stations : int, optional
+        Number of weather stations, at least one per zone, by default 30
+    vintages_per_day : int, optional
+        Number of weather forecasts issued per day, by default 2
+    horizon_days : int, optional
+        Number of days covered by each forecast, after the day it is issued, by
+        default 2
+    ng_rate : float, optional
+        Rate of wind speeds given as `NG`, by default 0.01
+    missing_rate : float, optional
+        Rate of missing wind gusts, by default 0.02
+    start : str, optional
+        First delivery date (EST), by default "2020-01-01"
+    seed : int, optional
+        Seed of the random generator, by default 0
+
+    Returns
+    -------
+    Dict[str, Path]
+        Path of each generated file, with keys `load_actual`, `load_forecast`,
+        `weather` and `zones_and_stations`.
+    """
+    zones = cst.ZONES if zones is None else list(zones)
+    if n_stations < len(zones):
+        raise ValueError(
+            f"At least one station per zone is required, got {n_stations} stations "
+            f"for {len(zones)} zones"
+        )
+    rng = np.random.default_rng(seed=seed)
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+
+    delivery_ts = pd.date_range(
+        start=start, periods=int(round(n_years * 365)) * 24, freq="h"
+    )
+    temperature = _generate_temperature(delivery_ts=delivery_ts, rng=rng)
+
+    df_load_actual = _generate_load_actual(
+        delivery_ts=delivery_ts, temperature=temperature, zones=zones, rng=rng
+    )
+    df_load_forecast = _generate_load_forecast(
+        df_load_actual=df_load_actual, horizon_days=horizon_days, rng=rng
+    )
+    df_zones_and_stations = _generate_zones_and_stations(
+        zones=zones, n_stations=n_stations, rng=rng
+    )
+    df_weather = _generate_weather(
+        delivery_ts=delivery_ts,
+        temperature=temperature,
+        stations=df_zones_and_stations[cst.STATION_CODE].unique(),
+        vintages_per_day=vintages_per_day,
+        horizon_days=horizon_days,
+        ng_rate=ng_rate,
+        missing_rate=missing_rate,
+        rng=rng,
+    )
+
+    paths = {
+        "load_actual": path / PATH_LOAD_ACTUAL.name,
+        "load_forecast": path / PATH_LOAD_FORECAST.name,
+        "weather": path / PATH_WEATHER.name,
+        "zones_and_stations": path / PATH_ZONES_AND_STATIONS.name,
+    }
+    df_load_actual.to_csv(paths["load_actual"], index=False)
+    df_load_forecast.to_csv(paths["load_forecast"], index=False)
+    df_weather.to_csv(paths["weather"], index=False)
+    df_zones_and_stations.to_csv(paths["zones_and_stations"], index=False)
+    return paths
+
+
+def _generate_temperature(
+    delivery_ts: pd.DatetimeIndex, rng: np.random.Generator
+) -> np.ndarray:
+    """Generate an hourly temperature, with seasonal and daily cycles.
+
+    Parameters
+    ----------
+    delivery_ts : pd.DatetimeIndex
+        Hourly dates.
+    rng : np.random.Generator
+        Random generator.
+
+    Returns
+    -------
+    np.ndarray
+        Temperature (deg F) of each date.
+    """
+    season = 52 - 22 * np.cos(2 * np.pi * (delivery_ts.dayofyear - 20) / 365.25)
+    daily_cycle = 8 * np.sin(2 * np.pi * (delivery_ts.hour - 9) / 24)
+    # Weather regimes lasting a few days
+    n_days = len(delivery_ts) // 24 + 1
+    anomaly = np.convolve(rng.normal(0, 6, n_days), np.ones(3) / 3, mode="same")
+    return (
+        np.asarray(season)
+        + np.asarray(daily_cycle)
+        + np.repeat(anomaly, 24)[: len(delivery_ts)]
+        + rng.normal(0, 1, len(delivery_ts))
+    )
+
+
+def _generate_load_actual(
+    delivery_ts: pd.DatetimeIndex,
+    temperature: np.ndarray,
+    zones: List[str],
+    rng: np.random.Generator,
+) -> pd.DataFrame:
+    """Generate actual loads of each zone.
+
+    Parameters
+    ----------
+    delivery_ts : pd.DatetimeIndex
+        Hourly dates (EST).
+    temperature : np.ndarray
+        Temperature of each date.
+    zones : List[str]
+        Zones.
+    rng : np.random.Generator
+        Random generator.
+
+    Returns
+    -------
+    pd.DataFrame
+        Columns delivery_ts, zone and load (MW), sorted by date.
+    """
+    daily_shape = 1 + 0.15 * np.sin(2 * np.pi * (np.asarray(delivery_ts.hour) - 8) / 24)
+    weekend = np.where(np.asarray(delivery_ts.dayofweek) >= 5, 0.92, 1.0)
+    # Cooling and heating
+    weather_effect = (
+        1
+        + 0.012 * np.maximum(temperature - 65, 0)
+        + 0.005 * np.maximum(50 - temperature, 0)
+    )
+    shape = daily_shape * weekend * weather_effect
+
+    base_load = rng.lognormal(mean=7, sigma=0.6, size=len(zones))
+    load = shape[:, np.newaxis] * base_load[np.newaxis, :]
+    load *= 1 + rng.normal(0, 0.02, load.shape)
+    return pd.DataFrame(
+        {
+            cst.DELIVERY_TS: np.repeat(delivery_ts, len(zones)),
+            cst.ZONE: np.tile(zones, len(delivery_ts)),
+            cst.LOAD: load.ravel().round(1),
+        }
+    )
+
+
+def _generate_load_forecast(
+    df_load_actual: pd.DataFrame, horizon_days: int, rng: np.random.Generator
+) -> pd.DataFrame:
+    """Generate NYISO load forecasts, issued every day for the next days.
+
+    Parameters
+    ----------
+    df_load_actual : pd.DataFrame
+        Actual loads (see `_generate_load_actual`).
+    horizon_days : int
+        Number of days covered by each forecast.
+    rng : np.random.Generator
+        Random generator.
+
+    Returns
+    -------
+    pd.DataFrame
+        Columns delivery_ts, zone (lower case), load and vintage_date (issued day),
+        sorted by vintage date as if rows were appended daily.
+    """
+    delivery_day = df_load_actual[cst.DELIVERY_TS].dt.floor(freq="D")
+    forecasts = []
+    for lead_days in range(1, horizon_days + 1):
+        error = rng.normal(0, 0.015 * lead_days, len(df_load_actual))
+        forecasts.append(
+            pd.DataFrame(
+                {
+                    cst.DELIVERY_TS: df_load_actual[cst.DELIVERY_TS],
+                    cst.ZONE: df_load_actual[cst.ZONE].str.lower(),
+                    cst.LOAD: (df_load_actual[cst.LOAD] * (1 + error)).round(1),
+                    cst.VINTAGE_DATE: delivery_day
+                    - pd.Timedelta(value=lead_days, unit="days"),
+                }
+            )
+        )
+    df = pd.concat(forecasts, ignore_index=True).sort_values(
+        by=[cst.VINTAGE_DATE, cst.DELIVERY_TS], kind="stable"
+    )
+    df[cst.VINTAGE_DATE] = df[cst.VINTAGE_DATE].dt.strftime("%Y-%m-%d")
+    return df
+
+
+def _generate_zones_and_stations(
+    zones: List[str], n_stations: int, rng: np.random.Generator
+) -> pd.DataFrame:
+    """Assign weighted stations to zones.
+
+    Stations are distributed between zones, and the first station of each zone is
+    also used by the previous zone.
+
+    Parameters
+    ----------
+    zones : List[str]
+        Zones.
+    n_stations : int
+        Number of stations.
+    rng : np.random.Generator
+        Random generator.
+
+    Returns
+    -------
+    pd.DataFrame
+        Columns zone, station_code and weight.
+    """
+    stations = np.array([f"K{i:03d}" for i in range(n_stations)])
+    station_zones = np.arange(n_stations) % len(zones)
+    shared = np.arange(len(zones))  # first station of each zone
+    zone_index = np.concatenate([station_zones, (shared - 1) % len(zones)])
+    station_codes = np.concatenate([stations, stations[shared]])
+    order = np.argsort(zone_index, kind="stable")
+    return pd.DataFrame(
+        {
+            cst.ZONE: np.array(zones)[zone_index[order]],
+            cst.STATION_CODE: station_codes[order],
+            cst.WEIGHT: rng.uniform(0.5, 2, len(order)).round(3),
+        }
+    )
+
+
+def _generate_weather(
+    delivery_ts: pd.DatetimeIndex,
+    temperature: np.ndarray,
+    stations: np.ndarray,
+    vintages_per_day: int,
+    horizon_days: int,
+    ng_rate: float,
+    missing_rate: float,
+    rng: np.random.Generator,
+) -> pd.DataFrame:
+    """Generate weather forecasts of each station.
+
+    Forecasts are issued `vintages_per_day` times a day and cover the
+    `horizon_days` days following the day they are issued (in UTC).
+
+    Parameters
+    ----------
+    delivery_ts : pd.DatetimeIndex
+        Hourly dates (EST).
+    temperature : np.ndarray
+        Temperature of each date.
+    stations : np.ndarray
+        Station codes.
+    vintages_per_day : int
+        Number of forecasts issued per day.
+    horizon_days : int
+        Number of days covered by each forecast.
+    ng_rate : float
+        Rate of wind speeds given as `NG`.
+    missing_rate : float
+        Rate of missing wind gusts.
+    rng : np.random.Generator
+        Random generator.
+
+    Returns
+    -------
+    pd.DataFrame
+        Columns station_code, delivery_ts (UTC), vintage_date (UTC) and a column per
+        weather feature, sorted by vintage date as if rows were appended.
+    """
+    delivery_utc = delivery_ts.tz_localize(tz="EST").tz_convert(tz="UTC")
+    first_day = delivery_utc[0].floor(freq="D") - pd.Timedelta(
+        value=horizon_days, unit="days"
+    )
+    n_days = (delivery_utc[-1].floor(freq="D") - first_day).days
+    vintages = first_day + pd.to_timedelta(
+        np.arange(n_days * vintages_per_day) * (24 / vintages_per_day), unit="h"
+    )
+
+    # One row per (vintage, delivery date, station)
+    offsets = np.arange(24, 24 * (horizon_days + 1))
+    vintage = np.repeat(vintages, len(offsets))
+    delivery = vintage.floor(freq="D") + pd.to_timedelta(
+        np.tile(offsets, len(vintages)), unit="h"
+    )
+    position = (delivery - delivery_utc[0]) // pd.Timedelta(value=1, unit="h")
+    kept = (position >= 0) & (position < len(delivery_ts))
+    vintage, delivery, position = vintage[kept], delivery[kept], position[kept]
+    lead_days = np.asarray((delivery - vintage) / pd.Timedelta(value=1, unit="days"))
+
+    n_rows = len(vintage) * len(stations)
+    station_offset = rng.normal(0, 2, len(stations))
+    tmp = (
+        np.repeat(temperature[position], len(stations))
+        + np.tile(station_offset, len(vintage))
+        + rng.normal(0, 1, n_rows) * np.repeat(1.5 + 0.5 * lead_days, len(stations))
+    )
+    wsp = rng.gamma(shape=2, scale=4, size=n_rows).round()
+    gst = (wsp + rng.gamma(shape=2, scale=3, size=n_rows)).round()
+    gst[rng.random(n_rows) < missing_rate] = np.nan
+    return pd.DataFrame(
+        {
+            cst.STATION_CODE: np.tile(stations, len(vintage)),
+            cst.DELIVERY_TS: np.repeat(delivery, len(stations)),
+            cst.VINTAGE_DATE: np.repeat(vintage, len(stations)),
+            cst.TMP: tmp.round(),
+            cst.DPT: (tmp - rng.gamma(shape=2, scale=4, size=n_rows)).round(),
+            cst.SKY: rng.uniform(0, 100, n_rows).round(),
+            cst.WDR: (rng.uniform(0, 36, n_rows).round() * 10),
+            cst.WSP: np.where(
+                rng.random(n_rows) < ng_rate, cst.NG, wsp.astype(int).astype(str)
+            ),
+            cst.GST: gst,
+            cst.PSN: np.where(tmp < 36, rng.uniform(0, 100, n_rows), 0).round(),
+        }
+    )
+
+
+if __name__ == "__main__":
+    generate_synthetic_data()
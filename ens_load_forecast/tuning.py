@@ -0,0 +1,308 @@
+"""Module to search hyperparameters of each zone with successive halving.
+
+For each (zone, model), random candidates are drawn from a search space (the
+default hyperparameters are always a candidate). Each round fits the remaining
+candidates on the most recent rows of the train set, and keeps the best
+`1 / eta` of them on a validation set (the end of the train set, the test set is
+left untouched). The number of rows is multiplied by `eta` at each round, so most
+of the compute is spent on the most promising candidates.
+
+Rounds run for all zones and models at once, in parallel processes sharing the
+memory-mapped feature arrays of each zone. If a global time budget is given, the
+duration of each round is estimated from the previous one (in proportion to the
+number of fitted rows), no round is started unless it is expected to end within
+the budget, and the best candidate of the last round is kept.
+"""
+
+import math
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed, parallel_backend
+from sklearn.metrics import mean_squared_error
+
+import ens_load_forecast.constants as cst
+from ens_load_forecast.backtesting import get_zone_arrays, share_arrays
+from ens_load_forecast.models import initialize_models, save_hyperparameters
+from ens_load_forecast.paths import PATH_SAVED_MODELS
+
+# Values of each hyperparameter, given as `set_params` arguments
+SEARCH_SPACES: Dict[str, Dict[str, List[Any]]] = {
+    cst.GRADIENT_BOOSTING_MODEL: {
+        "gradient_boosting_model__n_estimators": [50, 100, 200, 400],
+        "gradient_boosting_model__learning_rate": [0.03, 0.1, 0.3],
+        "gradient_boosting_model__max_depth": [2, 3, 5],
+        "gradient_boosting_model__subsample": [0.7, 1.0],
+    },
+    cst.HIST_GRADIENT_BOOSTING_MODEL: {
+        "hist_gradient_boosting_model__learning_rate": [0.03, 0.1, 0.3],
+        "hist_gradient_boosting_model__max_leaf_nodes": [15, 31, 63],
+        "hist_gradient_boosting_model__min_samples_leaf": [10, 20, 50],
+        "hist_gradient_boosting_model__l2_regularization": [0.0, 0.1, 1.0],
+        "calendar_encoder__native_categoricals": [False, True],
+    },
+    cst.RANDOM_FOREST_MODEL: {
+        "random_forest_model__n_estimators": [50, 100, 200],
+        "random_forest_model__max_depth": [None, 10, 20],
+        "random_forest_model__min_samples_leaf": [1, 3, 10],
+        "random_forest_model__max_features": [1.0, 0.5, "sqrt"],
+    },
+}
+MIN_ROWS = 24 * 7  # rows of the first round, at least
+
+
+def search_hyperparameters(
+    df_features: pd.DataFrame,
+    model_names: Optional[List[str]] = None,
+    n_candidates: int = 16,
+    eta: int = 3,
+    test_size: float = 0.25,
+    validation_size: float = 0.2,
+    budget_seconds: Optional[float] = None,
+    n_jobs: int = 1,
+    random_state: int = 0,
+    path: Optional[Path] = PATH_SAVED_MODELS,
+) -> pd.DataFrame:
+    """Search the hyperparameters of each model of each zone.
+
+    Parameters
+    ----------
+    df_features : pd.DataFrame
+        DataFrame containing features for all zones
+    model_names : Optional[List[str]], optional
+        Models to tune, by default None (all models with a search space, see
+        `SEARCH_SPACES`)
+    n_candidates : int, optional
+        Number of candidates per (zone, model), by default 16
+    eta : int, optional
+        Share of candidates eliminated at each round (1 - 1 / eta), and growth of
+        the number of rows, by default 3
+    test_size : float, optional
+        Share of the test set, excluded from the search, by default 0.25
+    validation_size : float, optional
+        Share of the train set used for validation, by default 0.2
+    budget_seconds : Optional[float], optional
+        Global time budget, by default None (no limit). The first round is always
+        run, the next ones only if they are expected to end within the budget.
+    n_jobs : int, optional
+        Number of parallel processes (-1 for all cores), by default 1
+    random_state : int, optional
+        Seed of the candidates and of the randomized models, by default 0
+    path : Optional[Path], optional
+        Folder of saved models, where the best hyperparameters of each zone are
+        saved in `<zone>/hyperparameters.json`. By default PATH_SAVED_MODELS, None
+        to not save them.
+
+    Returns
+    -------
+    pd.DataFrame
+        Search history, one row per evaluation, with columns zone, model_name,
+        candidate, round, n_rows, validation_rmse, params and best (True for the
+        selected candidate of each zone and model, on its last round).
+    """
+    deadline = None if budget_seconds is None else time.perf_counter() + budget_seconds
+    if model_names is None:
+        model_names = list(SEARCH_SPACES)
+    rng = np.random.default_rng(seed=random_state)
+    candidates = {
+        model_name: _draw_candidates(
+            search_space=SEARCH_SPACES[model_name], n_candidates=n_candidates, rng=rng
+        )
+        for model_name in model_names
+    }
+    n_rounds = max(1, math.floor(math.log(max(n_candidates, 1), eta)) + 1)
+
+    arrays = {}
+    for zone, zone_arrays in get_zone_arrays(df_features=df_features).items():
+        n_train = len(zone_arrays["y"]) - math.ceil(len(zone_arrays["y"]) * test_size)
+        n_fit = n_train - math.ceil(n_train * validation_size)
+        arrays[zone] = {
+            "X": zone_arrays["X"][:n_train],
+            "y": zone_arrays["y"][:n_train],
+            "n_fit": n_fit,
+        }
+    active = {
+        (zone, model_name): list(range(len(candidates[model_name])))
+        for zone in arrays
+        for model_name in model_names
+    }
+
+    history = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if n_jobs != 1:
+            arrays = share_arrays(arrays=arrays, path=Path(tmp_dir))
+        seconds_per_row = None
+        for round_number in range(n_rounds):
+            tasks = []
+            for (zone, model_name), candidate_ids in active.items():
+                n_fit = arrays[zone]["n_fit"]
+                n_rows = min(
+                    n_fit,
+                    max(
+                        MIN_ROWS,
+                        math.ceil(n_fit * eta ** (round_number - n_rounds + 1)),
+                    ),
+                )
+                tasks.extend(
+                    (zone, model_name, candidate_id, n_rows)
+                    for candidate_id in candidate_ids
+                )
+            # Fitted rows of all tasks, the cost of a round being about proportional
+            n_task_rows = sum(n_rows for _, _, _, n_rows in tasks)
+            if deadline is not None and seconds_per_row is not None:
+                if time.perf_counter() + seconds_per_row * n_task_rows > deadline:
+                    break
+            start = time.perf_counter()
+            with parallel_backend(backend="loky", inner_max_num_threads=1):
+                rmses = Parallel(n_jobs=n_jobs)(
+                    delayed(_evaluate_candidate)(
+                        model_name=model_name,
+                        params=candidates[model_name][candidate_id],
+                        X=arrays[zone]["X"],
+                        y=arrays[zone]["y"],
+                        n_fit=arrays[zone]["n_fit"],
+                        n_rows=n_rows,
+                        random_state=random_state,
+                    )
+                    for zone, model_name, candidate_id, n_rows in tasks
+                )
+            seconds_per_row = (time.perf_counter() - start) / max(n_task_rows, 1)
+            for (zone, model_name, candidate_id, n_rows), rmse in zip(tasks, rmses):
+                history.append(
+                    {
+                        cst.ZONE: zone,
+                        cst.MODEL_NAME: model_name,
+                        "candidate": candidate_id,
+                        "round": round_number,
+                        "n_rows": n_rows,
+                        "validation_rmse": rmse,
+                        "params": candidates[model_name][candidate_id],
+                    }
+                )
+            active = _select_candidates(
+                history=history, round_number=round_number, eta=eta
+            )
+
+    df_history = pd.DataFrame(history)
+    df_history["best"] = False
+    best_params: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for (zone, model_name), df in df_history.groupby(
+        by=[cst.ZONE, cst.MODEL_NAME], sort=False
+    ):
+        df = df[df["round"] == df["round"].max()]
+        best = df["validation_rmse"].idxmin()
+        df_history.loc[best, "best"] = True
+        best_params.setdefault(zone, {})[model_name] = df_history.loc[best, "params"]
+    if path is not None:
+        save_hyperparameters(hyperparameters=best_params, path=path)
+    return df_history
+
+
+def _draw_candidates(
+    search_space: Dict[str, List[Any]], n_candidates: int, rng: np.random.Generator
+) -> List[Dict[str, Any]]:
+    """Draw distinct random candidates, the first one being the default.
+
+    Parameters
+    ----------
+    search_space : Dict[str, List[Any]]
+        Values of each hyperparameter.
+    n_candidates : int
+        Number of candidates (fewer if the search space is smaller).
+    rng : np.random.Generator
+        Random generator.
+
+    Returns
+    -------
+    List[Dict[str, Any]]
+        Hyperparameters of each candidate (see `initialize_models`).
+    """
+    n_combinations = math.prod(len(values) for values in search_space.values())
+    candidates: List[Dict[str, Any]] = [{}]
+    while len(candidates) < min(n_candidates, n_combinations + 1):
+        candidate = {
+            name: values[rng.integers(len(values))]
+            for name, values in search_space.items()
+        }
+        if candidate not in candidates:
+            candidates.append(candidate)
+    return candidates
+
+
+def _evaluate_candidate(
+    model_name: str,
+    params: Dict[str, Any],
+    X: np.ndarray,  # noqa: N803
+    y: np.ndarray,
+    n_fit: int,
+    n_rows: int,
+    random_state: int,
+) -> float:
+    """Fit a candidate on the last rows before validation, and score it.
+
+    Parameters
+    ----------
+    model_name : str
+        Name of the model (see `initialize_models`).
+    params : Dict[str, Any]
+        Hyperparameters of the candidate.
+    X : np.ndarray
+        Features of the train set of the zone.
+    y : np.ndarray
+        Actual load of the train set of the zone.
+    n_fit : int
+        Number of rows before the validation set.
+    n_rows : int
+        Number of rows used for fitting.
+    random_state : int
+        Seed of the randomized models.
+
+    Returns
+    -------
+    float
+        Validation RMSE.
+    """
+    model = initialize_models(random_state=random_state, params={model_name: params})[
+        model_name
+    ]
+    model.fit(X[n_fit - n_rows : n_fit], y[n_fit - n_rows : n_fit])
+    return mean_squared_error(
+        y_true=y[n_fit:], y_pred=model.predict(X[n_fit:]), squared=False
+    )
+
+
+def _select_candidates(
+    history: List[Dict[str, Any]], round_number: int, eta: int
+) -> Dict[Tuple[str, str], List[int]]:
+    """Keep the best candidates of a round, for each zone and model.
+
+    Parameters
+    ----------
+    history : List[Dict[str, Any]]
+        Evaluations so far.
+    round_number : int
+        Round to select from.
+    eta : int
+        Share of candidates eliminated (1 - 1 / eta).
+
+    Returns
+    -------
+    Dict[Tuple[str, str], List[int]]
+        Candidates of the next round, per (zone, model).
+    """
+    evaluations: Dict[Tuple[str, str], List[Tuple[float, int]]] = {}
+    for evaluation in history:
+        if evaluation["round"] == round_number:
+            evaluations.setdefault(
+                (evaluation[cst.ZONE], evaluation[cst.MODEL_NAME]), []
+            ).append((evaluation["validation_rmse"], evaluation["candidate"]))
+    return {
+        key: [
+            candidate for _, candidate in sorted(scores)[: math.ceil(len(scores) / eta)]
+        ]
+        for key, scores in evaluations.items()
+    }
@@ -0,0 +1,110 @@
+"""Aggregate cube of the analysis plots, against direct groupbys."""
+
+import numpy as np
+import pandas as pd
+
+import ens_load_forecast.constants as cst
+from ens_load_forecast.aggregates import compute_aggregates, get_zone_statistics
+
+STATISTICS = [cst.LOAD, cst.BIAS, cst.MAE, cst.RMSE]
+
+
+def _get_data(seed: int = 0) -> pd.DataFrame:
+    """Two zones over a non-leap and a leap year, with missing days and loads."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(
+        start="2019-01-01", end="2020-12-31 23:00", freq="h", tz="EST"
+    )
+    # 4 July is missing in both years, 10 March in 2019 only
+    dates = dates[
+        ~((dates.month == 7) & (dates.day == 4))
+        & ~((dates.year == 2019) & (dates.month == 3) & (dates.day == 10))
+    ]
+    frames = []
+    for zone, scale in [("CAPITL", 1000.0), ("WEST", 2000.0)]:
+        load = scale + 100.0 * rng.normal(size=len(dates))
+        frames.append(
+            pd.DataFrame(
+                {
+                    cst.ZONE: zone,
+                    cst.LOAD: load,
+                    cst.LOAD_FORECAST: load + 50.0 * rng.normal(size=len(dates)),
+                },
+                index=dates,
+            )
+        )
+    df = pd.concat(frames)
+    df.iloc[rng.choice(len(df), size=100, replace=False), 1] = np.nan
+    return df
+
+
+def _get_direct_statistics(df: pd.DataFrame, keys: list) -> pd.DataFrame:
+    """Statistics of rows without missing values, grouped by arrays of keys."""
+    errors = df[cst.LOAD_FORECAST] - df[cst.LOAD]
+    grouped = pd.DataFrame(
+        {
+            cst.LOAD: df[cst.LOAD],
+            cst.BIAS: errors,
+            cst.MAE: errors.abs(),
+            cst.RMSE: errors**2,
+        }
+    ).groupby(by=keys)
+    statistics = grouped.mean()
+    statistics[cst.RMSE] = np.sqrt(statistics[cst.RMSE])
+    statistics.insert(0, cst.COUNT, grouped.size())
+    return statistics
+
+
+def test_seasonal_cells_follow_a_leap_year_calendar():
+    df = _get_data()
+    seasonal = compute_aggregates(df=df)[cst.SEASONAL]
+    assert len(seasonal) == 2 * cst.DAYS_IN_LEAP_YEAR * 24
+
+    # Day of year in 2000, a leap year
+    df_valid = df.dropna()
+    dates = df_valid.index
+    day_of_year = pd.to_datetime(
+        pd.DataFrame({"year": 2000, "month": dates.month, "day": dates.day})
+    ).dt.dayofyear
+    expected = _get_direct_statistics(
+        df=df_valid,
+        keys=[df_valid[cst.ZONE].to_numpy(), day_of_year.to_numpy(), dates.hour],
+    )
+    expected.index.names = [cst.ZONE, cst.DAY_OF_YEAR, cst.HOUR]
+    pd.testing.assert_frame_equal(
+        seasonal[seasonal[cst.COUNT] > 0],
+        expected,
+        check_dtype=False,
+        check_index_type=False,
+        rtol=1e-10,
+    )
+
+    # 29 February only exists in 2020, 1 March is day 61 in both years
+    assert (seasonal.xs(60, level=cst.DAY_OF_YEAR)[cst.COUNT] <= 1).all()
+    assert seasonal.xs(60, level=cst.DAY_OF_YEAR)[cst.COUNT].sum() > 40
+    assert seasonal.xs(61, level=cst.DAY_OF_YEAR)[cst.COUNT].max() == 2
+    # 10 March only in 2020, 4 July in no year
+    assert seasonal.xs(70, level=cst.DAY_OF_YEAR)[cst.COUNT].max() == 1
+    july_4 = seasonal.xs(186, level=cst.DAY_OF_YEAR)
+    assert (july_4[cst.COUNT] == 0).all()
+    assert july_4[STATISTICS].isna().all().all()
+
+
+def test_zone_statistics_match_a_direct_groupby():
+    df = _get_data()
+    aggregates = compute_aggregates(df=df)
+    for months in [None, [2, 3], [7]]:
+        df_months = df.dropna()
+        if months is not None:
+            df_months = df_months[df_months.index.month.isin(months)]
+        expected = _get_direct_statistics(
+            df=df_months, keys=[df_months[cst.ZONE].to_numpy()]
+        )
+        pd.testing.assert_frame_equal(
+            get_zone_statistics(aggregates=aggregates, months=months).set_index(
+                cst.ZONE
+            ),
+            expected.rename_axis(index=cst.ZONE),
+            check_dtype=False,
+            rtol=1e-10,
+        )
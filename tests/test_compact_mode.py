@@ -0,0 +1,38 @@
+"""Accuracy of models fitted on compact dtypes."""
+
+import ens_load_forecast.constants as cst
+from ens_load_forecast.benchmarks import benchmark_compact_mode
+from ens_load_forecast.data_preprocessing import (
+    get_load_actual,
+    get_load_forecast,
+    get_weather,
+)
+from ens_load_forecast.synthetic_data import generate_synthetic_data
+
+
+def test_compact_mode_is_within_tolerance(tmp_path):
+    paths = generate_synthetic_data(
+        path=tmp_path, n_years=0.1, zones=["CAPITL", "N.Y.C.", "WEST"], n_stations=6
+    )
+    df_weather = get_weather(
+        force_recompute=True,
+        path=paths["weather"],
+        path_zones_and_stations=paths["zones_and_stations"],
+        path_preprocessed=tmp_path / "preprocessed_weather",
+    )
+    results = benchmark_compact_mode(
+        df_weather=df_weather,
+        df_load_actual=get_load_actual(path=paths["load_actual"]),
+        df_load_forecast=get_load_forecast(path=paths["load_forecast"]),
+    )
+    changes = results["relative_rmse_change"]
+    assert sorted(changes) == ["CAPITL", "N.Y.C.", "WEST"]
+    assert all(
+        change <= cst.COMPACT_RMSE_TOLERANCE
+        for zone_changes in changes.values()
+        for change in zone_changes.values()
+    )
+    assert results["within_tolerance"] is True
+    assert results["memory"]["compact"]["features"] < (
+        results["memory"]["default"]["features"]
+    )
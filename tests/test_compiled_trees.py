@@ -0,0 +1,107 @@
+"""Predictions of compiled tree ensembles."""
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+import ens_load_forecast.constants as cst
+from ens_load_forecast.compiled_trees import CompiledTreeEnsemble, compile_model
+from ens_load_forecast.models import GlobalModel, get_model_inputs, initialize_models
+from ens_load_forecast.registry import ModelRegistry
+
+ZONES = ["CAPITL", "N.Y.C.", "WEST"]
+
+
+def _get_features(n_rows: int = 600, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(
+        rng.normal(size=(n_rows, len(cst.FEATURES_LIST))), columns=cst.FEATURES_LIST
+    )
+    df[cst.LOAD_FORECAST] = 1000.0 + 200.0 * df[cst.LOAD_FORECAST]
+    df[cst.ZONE] = rng.choice(ZONES, size=n_rows)
+    df[cst.LOAD] = df[cst.LOAD_FORECAST] + 50.0 * df[cst.TMP] * df[cst.DPT]
+    return df
+
+
+def _get_models() -> dict:
+    df = _get_features()
+    models = initialize_models()
+    forest = models[cst.RANDOM_FOREST_MODEL].set_params(
+        random_forest_model__n_estimators=20
+    )
+    boosting = models[cst.GRADIENT_BOOSTING_MODEL].set_params(
+        gradient_boosting_model__n_estimators=30
+    )
+    global_forest = GlobalModel(
+        model=initialize_models()[cst.RANDOM_FOREST_MODEL].set_params(
+            random_forest_model__n_estimators=20
+        ),
+        scale_per_zone=True,
+    )
+    return {
+        cst.RANDOM_FOREST_MODEL: forest.fit(get_model_inputs(df=df), df[cst.LOAD]),
+        cst.GRADIENT_BOOSTING_MODEL: boosting.fit(
+            get_model_inputs(df=df), df[cst.LOAD]
+        ),
+        "global_model": global_forest.fit(df, df[cst.LOAD]),
+    }
+
+
+@pytest.mark.parametrize("n_rows", [1, 24, 300])
+def test_compiled_models_predict_the_same_values(n_rows):
+    df = _get_features(n_rows=300, seed=1).iloc[:n_rows]
+    for model_name, model in _get_models().items():
+        compiled = compile_model(model=model)
+        inputs = df if model_name == "global_model" else get_model_inputs(df=df)
+        if model_name == "global_model":
+            assert isinstance(compiled.model, CompiledTreeEnsemble)
+        else:
+            assert isinstance(compiled, CompiledTreeEnsemble)
+        assert np.array_equal(compiled.predict(inputs), model.predict(inputs))
+
+
+def test_compiled_models_predict_no_rows():
+    df = _get_features(n_rows=10, seed=1).iloc[:0]
+    for model_name, model in _get_models().items():
+        compiled = compile_model(model=model)
+        inputs = df if model_name == "global_model" else get_model_inputs(df=df)
+        predictions = compiled.predict(inputs)
+        assert predictions.shape == (0,)
+
+
+def test_registry_caches_compiled_models(tmp_path):
+    models = _get_models()
+    for zone in ZONES[:2]:
+        (tmp_path / zone).mkdir()
+        for model_name in [cst.RANDOM_FOREST_MODEL, cst.GRADIENT_BOOSTING_MODEL]:
+            joblib.dump(
+                value=models[model_name],
+                filename=tmp_path / zone / f"{model_name}{cst.JOBLIB}",
+            )
+    registry = ModelRegistry(path=tmp_path, max_models=1)
+
+    compiled = registry.get_model(
+        zone=ZONES[0], model_name=cst.RANDOM_FOREST_MODEL, compiled=True
+    )
+    assert isinstance(compiled, CompiledTreeEnsemble)
+    assert (
+        registry.get_model(
+            zone=ZONES[0], model_name=cst.RANDOM_FOREST_MODEL, compiled=True
+        )
+        is compiled
+    )
+    assert not isinstance(
+        registry.get_model(zone=ZONES[0], model_name=cst.RANDOM_FOREST_MODEL),
+        CompiledTreeEnsemble,
+    )
+    assert registry.get_stats()["misses"] == 1
+
+    # Compiled models are evicted with their model
+    registry.get_model(zone=ZONES[1], model_name=cst.RANDOM_FOREST_MODEL)
+    assert (
+        registry.get_model(
+            zone=ZONES[0], model_name=cst.RANDOM_FOREST_MODEL, compiled=True
+        )
+        is not compiled
+    )
@@ -0,0 +1,108 @@
+"""Vectorized weather aggregation, against the `groupby().apply` reference."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import ens_load_forecast.constants as cst
+from ens_load_forecast.data_preprocessing import (
+    _aggregate_weather_record_apply,
+    aggregate_weather_record,
+    get_weather,
+)
+from ens_load_forecast.synthetic_data import generate_synthetic_data
+
+DATES = pd.date_range(start="2020-01-01", periods=6, freq="h", tz="EST")
+STATIONS = {"CAPITL": {"ALB": 1.0, "GFL": 0.5}, "WEST": {"BUF": 0.7, "JHW": 0.2}}
+
+
+def _get_records(seed: int = 0) -> pd.DataFrame:
+    """Station records of every date, zone and station, with values of all features."""
+    rng = np.random.default_rng(seed)
+    rows = [
+        {cst.DELIVERY_TS: date, cst.ZONE: zone, cst.STATION_CODE: code, cst.WEIGHT: w}
+        for date in DATES
+        for zone, stations in STATIONS.items()
+        for code, w in stations.items()
+    ]
+    df = pd.DataFrame(rows).set_index(cst.DELIVERY_TS)
+    for feature in cst.SELECTED_WEATHER_FEATURES:
+        df[feature] = rng.uniform(low=0.0, high=100.0, size=len(df)).round(1)
+    return df
+
+
+def _weighted_mean(df: pd.DataFrame, feature: str) -> pd.Series:
+    """Weighted mean of a feature per date and zone, over stations having a value."""
+    values = pd.to_numeric(df[feature].replace(to_replace=cst.NG, value=np.nan))
+    available = values.notna()
+    keys = [df.index, df[cst.ZONE]]
+    weighted_sums = (values * df[cst.WEIGHT]).groupby(by=keys).sum(min_count=1)
+    weights = df[cst.WEIGHT].where(available).groupby(by=keys).sum()
+    sums = weighted_sums / weights
+    sums.index.names = [cst.DELIVERY_TS, cst.ZONE]
+    return sums
+
+
+def test_same_aggregation_as_apply():
+    df = _get_records()
+    expected = _aggregate_weather_record_apply(df=df)
+    pd.testing.assert_frame_equal(
+        aggregate_weather_record(df=df),
+        expected[cst.SELECTED_WEATHER_FEATURES].astype(float),
+        check_exact=False,
+        rtol=1e-12,
+    )
+
+
+def test_missing_values_renormalize_weights():
+    df = _get_records()
+    # Wind speed `NG` at one station, temperature missing at another one, and no
+    # temperature at all in a zone
+    df[cst.WSP] = df[cst.WSP].astype(object)
+    df.iloc[0, df.columns.get_loc(cst.WSP)] = cst.NG
+    df.iloc[6, df.columns.get_loc(cst.TMP)] = np.nan
+    df.iloc[[2, 3], df.columns.get_loc(cst.TMP)] = np.nan
+    aggregated = aggregate_weather_record(df=df)
+    reference = _aggregate_weather_record_apply(df=df)
+
+    for feature in cst.SELECTED_WEATHER_FEATURES:
+        pd.testing.assert_series_equal(
+            aggregated[feature],
+            _weighted_mean(df=df, feature=feature),
+            check_names=False,
+            rtol=1e-12,
+        )
+    # The reference discards the station with wind speed `NG` for every feature,
+    # and keeps the weight of the station missing a temperature
+    ng_row = (DATES[0], "CAPITL")
+    assert np.isclose(aggregated.loc[ng_row, cst.WSP], reference.loc[ng_row, cst.WSP])
+    assert aggregated.loc[ng_row, cst.DPT] != reference.loc[ng_row, cst.DPT]
+    missing_row = (DATES[1], "WEST")
+    assert np.isclose(aggregated.loc[missing_row, cst.TMP], df.iloc[7][cst.TMP])
+    assert reference.loc[missing_row, cst.TMP] < aggregated.loc[missing_row, cst.TMP]
+    assert np.isnan(aggregated.loc[(DATES[0], "WEST"), cst.TMP])
+
+    # Rows without missing values are aggregated as by the reference
+    complete = [(date, zone) for date in DATES[2:] for zone in STATIONS]
+    pd.testing.assert_frame_equal(
+        aggregated.loc[complete],
+        reference.loc[complete, cst.SELECTED_WEATHER_FEATURES].astype(float),
+        rtol=1e-12,
+    )
+
+
+@pytest.mark.parametrize("chunksize", [1, 97, 1000, 10**6])
+def test_chunked_weather_is_the_eager_one(tmp_path, chunksize):
+    # Two forecasts a day, each replacing the overlapping hours of the previous one
+    paths = generate_synthetic_data(
+        path=tmp_path, n_years=0.01, zones=["CAPITL", "WEST"], n_stations=3
+    )
+    kwargs = {
+        "force_recompute": True,
+        "path": paths["weather"],
+        "path_zones_and_stations": paths["zones_and_stations"],
+        "path_preprocessed": tmp_path / "preprocessed_weather",
+    }
+    pd.testing.assert_frame_equal(
+        get_weather(chunksize=chunksize, **kwargs), get_weather(**kwargs)
+    )
@@ -0,0 +1,155 @@
+"""Downsampled series, against the points they are expected to keep."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ens_load_forecast.downsampling import (
+    TimeSeriesPyramid,
+    lttb_indices,
+    min_max_indices,
+)
+
+
+def _get_series(n_points: int = 10_000, seed: int = 0) -> np.ndarray:
+    """Daily and yearly cycles with noise, and a few spikes."""
+    rng = np.random.default_rng(seed)
+    hours = np.arange(n_points)
+    y = (
+        1000.0
+        + 200.0 * np.sin(2 * np.pi * hours / 24)
+        + 300.0 * np.sin(2 * np.pi * hours / 8760)
+        + 20.0 * rng.normal(size=n_points)
+    )
+    y[rng.choice(n_points, size=5, replace=False)] += 2000.0
+    y[rng.choice(n_points, size=5, replace=False)] -= 2000.0
+    return y
+
+
+def _get_buckets(n_points: int, n_buckets: int) -> list:
+    """Indices of each bucket of `min_max_indices`."""
+    edges = np.linspace(0, n_points, n_buckets + 1).astype(np.int64)
+    return [np.arange(start, stop) for start, stop in zip(edges[:-1], edges[1:])]
+
+
+@pytest.mark.parametrize("n_points", [10_000, 9_999, 1_001])
+@pytest.mark.parametrize("n_buckets", [1, 7, 100, 333])
+def test_min_max_keeps_extrema_of_each_bucket(n_points, n_buckets):
+    y = _get_series(n_points=n_points)
+    indices = min_max_indices(y=y, n_buckets=n_buckets)
+    assert len(indices) <= 2 * n_buckets
+    assert (np.diff(indices) > 0).all()
+    assert np.argmax(y) in indices
+    assert np.argmin(y) in indices
+    for bucket in _get_buckets(n_points=n_points, n_buckets=n_buckets):
+        kept = indices[(indices >= bucket[0]) & (indices <= bucket[-1])]
+        assert set(y[kept]) == {y[bucket].min(), y[bucket].max()}
+
+
+def test_min_max_of_short_series_keeps_every_point():
+    y = _get_series(n_points=20)
+    np.testing.assert_array_equal(min_max_indices(y=y, n_buckets=10), np.arange(20))
+
+
+def test_min_max_ignores_missing_values():
+    y = _get_series(n_points=1000)
+    y[100:200] = np.nan  # Whole buckets
+    y[205] = np.nan  # Part of a bucket
+    y[-1] = np.nan
+    indices = min_max_indices(y=y, n_buckets=100)
+    assert not np.isnan(y[indices]).any()
+    assert not ((indices >= 100) & (indices < 200)).any()
+    assert np.nanargmax(y) in indices
+    assert np.nanargmin(y) in indices
+    for bucket in _get_buckets(n_points=1000, n_buckets=100):
+        kept = indices[(indices >= bucket[0]) & (indices <= bucket[-1])]
+        if np.isnan(y[bucket]).all():
+            assert len(kept) == 0
+        else:
+            assert set(y[kept]) == {np.nanmin(y[bucket]), np.nanmax(y[bucket])}
+
+    assert len(min_max_indices(y=np.full(1000, np.nan), n_buckets=10)) == 0
+
+
+@pytest.mark.parametrize("n_out", [3, 4, 50, 999])
+def test_lttb_keeps_first_and_last_points(n_out):
+    y = _get_series(n_points=1000)
+    x = np.arange(1000) * 3600
+    indices = lttb_indices(x=x, y=y, n_out=n_out)
+    assert len(indices) == n_out
+    assert indices[0] == 0
+    assert indices[-1] == 999
+    assert (np.diff(indices) > 0).all()
+
+
+def test_lttb_keeps_a_spike_and_drops_missing_values():
+    y = np.zeros(1000)
+    y[500] = 100.0
+    y[[0, 10, 20]] = np.nan
+    indices = lttb_indices(x=np.arange(1000), y=y, n_out=20)
+    assert len(indices) == 20
+    assert indices[0] == 1
+    assert 500 in indices
+    assert not np.isnan(y[indices]).any()
+    # Series not longer than `n_out` are kept whole
+    np.testing.assert_array_equal(
+        lttb_indices(x=np.arange(1000), y=y, n_out=997), np.flatnonzero(~np.isnan(y))
+    )
+
+
+def test_pyramid_levels_keep_extrema():
+    series = pd.Series(
+        _get_series(n_points=10_000),
+        index=pd.date_range(start="2020-01-01", periods=10_000, freq="h"),
+    )
+    pyramid = TimeSeriesPyramid(series=series, factor=2, min_buckets=100)
+    assert len(pyramid.levels) > 3
+    for finer, coarser in zip(pyramid.levels[:-1], pyramid.levels[1:]):
+        assert len(coarser) < len(finer)
+    for level in pyramid.levels:
+        assert level[0] == 0
+        assert level[-1] == len(series) - 1
+        assert series.argmax() in level
+        assert series.argmin() in level
+
+
+@pytest.mark.parametrize("max_points", [200, 500, 2000, 20_000])
+@pytest.mark.parametrize(
+    "start, end",
+    [
+        (None, None),
+        ("2020-02-01", "2020-05-01 12:30"),
+        ("2020-03-03 03:00", "2020-03-05"),
+        ("2019-12-01", "2020-01-02"),
+        ("2021-01-10", "2022-01-01"),
+    ],
+)
+def test_pyramid_points_of_a_range(max_points, start, end):
+    series = pd.Series(
+        _get_series(n_points=10_000),
+        index=pd.date_range(start="2020-01-01", periods=10_000, freq="h"),
+    )
+    pyramid = TimeSeriesPyramid(series=series, factor=2, min_buckets=100)
+    start = None if start is None else pd.Timestamp(start)
+    end = None if end is None else pd.Timestamp(end)
+    dates, values = pyramid.get_points(start=start, end=end, max_points=max_points)
+
+    in_range = (dates >= (start or dates[0])) & (dates <= (end or dates[-1]))
+    assert in_range.sum() <= max_points
+    assert dates.is_monotonic_increasing
+    np.testing.assert_array_equal(values, series[dates].to_numpy())
+    expected = series[start:end]
+    # Points just outside the range are included, so that lines reach its edges
+    if start is not None and start > series.index[0]:
+        assert dates[0] < start
+    if end is not None and end < series.index[-1]:
+        assert dates[-1] > end
+    if len(expected) <= max_points:
+        pd.testing.assert_series_equal(
+            pd.Series(values[in_range], index=dates[in_range]),
+            expected,
+            check_freq=False,
+        )
+    else:
+        assert expected.max() in values
+        assert expected.min() in values
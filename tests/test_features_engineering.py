@@ -0,0 +1,110 @@
+"""Features computed in one pass, against the encodings of per-feature helpers."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import ens_load_forecast.constants as cst
+from ens_load_forecast.features_engineering import (
+    extract_feature_matrix,
+    extract_features,
+)
+
+CONTINUOUS_FEATURES = [cst.LOAD_FORECAST, cst.TMP, cst.DPT, cst.WSP, cst.GST]
+
+
+def _get_merged(seed: int = 0) -> pd.DataFrame:
+    """Merged rows of two zones over a week, across a month and a year boundary."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(
+        start="2019-12-27", end="2020-01-02 23:00", freq="h", tz="EST"
+    ).repeat(2)
+    df = pd.DataFrame(
+        {
+            cst.ZONE: np.tile(["CAPITL", "WEST"], len(dates) // 2),
+            cst.LOAD: rng.uniform(low=500.0, high=2000.0, size=len(dates)),
+            **{
+                feature: rng.uniform(low=0.0, high=100.0, size=len(dates))
+                for feature in [*CONTINUOUS_FEATURES, *cst.PERCENT_FEATURES]
+            },
+            cst.WDR: rng.uniform(low=0.0, high=360.0, size=len(dates)),
+        },
+        index=pd.Index(dates, name=cst.DELIVERY_TS),
+    )
+    return df
+
+
+def _get_baseline_encodings(df: pd.DataFrame) -> pd.DataFrame:
+    """One-hot and cyclic encodings of the former per-feature helpers."""
+    hours = pd.Series(df.index.hour, index=df.index)
+    time_of_day = np.select(
+        [hours < 7, hours < 19], [cst.MORNING, cst.WORKING_HOURS], cst.EVENING
+    )
+    calendar = pd.DataFrame(
+        {
+            cst.MONTH: df.index.month_name(),
+            cst.DAY_OF_WEEK: df.index.day_name(),
+            cst.TIME_OF_DAY: time_of_day,
+        },
+        index=df.index,
+    )
+    wind_direction = df[cst.WDR] * np.pi / 180
+    return pd.concat(
+        [
+            pd.get_dummies(data=calendar, prefix_sep="_", dtype=int),
+            pd.DataFrame(
+                {
+                    cst.COS_WDR: np.cos(wind_direction),
+                    cst.SIN_WDR: np.sin(wind_direction),
+                }
+            ),
+        ],
+        axis="columns",
+    )
+
+
+def test_feature_matrix_matches_baseline_encodings():
+    df = _get_merged()
+    matrix = pd.DataFrame(
+        extract_feature_matrix(df=df), index=df.index, columns=cst.FEATURES_LIST
+    )
+    baseline = _get_baseline_encodings(df=df)
+    assert {f"{cst.MONTH}_December", f"{cst.MONTH}_January"} <= set(baseline.columns)
+
+    pd.testing.assert_frame_equal(
+        matrix[baseline.columns], baseline, check_dtype=False, rtol=1e-12
+    )
+    # Calendar values absent from the rows have columns of zeros
+    absent = [column for column in cst.CALENDAR_FEATURES if column not in baseline]
+    assert len(absent) == 10
+    assert (matrix[absent] == 0).all().all()
+    pd.testing.assert_frame_equal(
+        matrix[CONTINUOUS_FEATURES], df[CONTINUOUS_FEATURES], check_dtype=False
+    )
+    pd.testing.assert_frame_equal(
+        matrix[cst.PERCENT_FEATURES],
+        df[cst.PERCENT_FEATURES] / 100,
+        check_dtype=False,
+    )
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_features_keep_the_columns_of_the_merged_frame(compact):
+    df = _get_merged()
+    df_copy = df.copy()
+    df_features = extract_features(df=df, compact=compact)
+
+    pd.testing.assert_frame_equal(df, df_copy)
+    columns = [column for column in df.columns if column != cst.WDR]
+    new_columns = [column for column in cst.FEATURES_LIST if column not in columns]
+    assert list(df_features.columns) == [*columns, *new_columns]
+    # Columns of `df` are not copied
+    for column in [cst.LOAD, *([] if compact else CONTINUOUS_FEATURES)]:
+        assert np.shares_memory(df_features[column].to_numpy(), df[column].to_numpy())
+
+    expected = extract_feature_matrix(
+        df=df, dtype=np.float32 if compact else np.float64
+    )
+    np.testing.assert_array_equal(df_features[cst.FEATURES_LIST].to_numpy(), expected)
+    if compact:
+        assert (df_features[cst.CALENDAR_FEATURES].dtypes == np.int8).all()
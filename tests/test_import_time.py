@@ -0,0 +1,79 @@
+"""Import time of the command line interface."""
+
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PATH_REPO = Path(__file__).resolve().parents[1]
+HEAVY_MODULES = ["pandas", "sklearn", "geopandas", "plotly"]
+
+
+def _run_python(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=PATH_REPO,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def _get_import_seconds(module: str) -> float:
+    """Cumulative import time of a module, from `python -X importtime`."""
+    stderr = _run_python("-X", "importtime", "-c", f"import {module}").stderr
+    for line in stderr.splitlines():
+        _, _, cumulative, name = [
+            field.strip() for field in line.replace(":", "|").split("|")
+        ]
+        if name == module:
+            return int(cumulative) / 1e6
+    raise AssertionError(f"{module} not found in the import times")
+
+
+def test_main_does_not_import_heavy_modules():
+    stdout = _run_python(
+        "-c",
+        "import sys, ens_load_forecast.__main__, ens_load_forecast.paths; "
+        "print(' '.join(sys.modules))",
+    ).stdout
+    modules = set(stdout.split())
+    for module in HEAVY_MODULES:
+        assert module not in modules
+
+
+def test_graphs_does_not_import_plotting_libraries():
+    stdout = _run_python(
+        "-c", "import sys, ens_load_forecast.graphs; print(' '.join(sys.modules))"
+    ).stdout
+    modules = set(stdout.split())
+    assert "geopandas" not in modules
+    assert "plotly" not in modules
+    assert "shapely" not in modules
+
+
+def _get_wall_seconds(*args: str, repeat: int = 3) -> float:
+    """Best wall time of a Python command, startup included."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _run_python(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+# Timings are compared with the import of pandas on the same machine, so that the
+# checks do not depend on the speed of the machine running them
+
+
+def test_main_import_time():
+    assert _get_import_seconds(module="ens_load_forecast.__main__") < (
+        0.25 * _get_import_seconds(module="pandas")
+    )
+
+
+def test_help_wall_time():
+    startup = _get_wall_seconds("-c", "pass")
+    pandas_import = _get_wall_seconds("-c", "import pandas") - startup
+    help_overhead = _get_wall_seconds("-m", "ens_load_forecast", "--help") - startup
+    assert help_overhead < 0.5 * pandas_import
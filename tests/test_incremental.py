@@ -0,0 +1,137 @@
+"""Incremental updates of the merged dataset, against full rebuilds."""
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import ens_load_forecast.constants as cst
+from ens_load_forecast.data_preprocessing import (
+    get_load_actual,
+    get_load_forecast,
+    get_merged_dataset,
+    get_weather,
+)
+from ens_load_forecast.incremental import LOAD_ACTUAL, update_merged_dataset
+from ens_load_forecast.synthetic_data import generate_synthetic_data
+
+SOURCES = [LOAD_ACTUAL, cst.LOAD_FORECAST, "weather"]
+
+
+@pytest.fixture(scope="module")
+def full_paths(tmp_path_factory) -> dict:
+    return generate_synthetic_data(
+        path=tmp_path_factory.mktemp("full"),
+        n_years=0.02,
+        zones=["CAPITL", "WEST"],
+        n_stations=3,
+    )
+
+
+def _write_rows(source: Path, destination: Path, share: float) -> None:
+    """Write the header and the first `share` of the rows of a csv file."""
+    with open(source, mode="r", encoding="utf-8") as file:
+        lines = file.readlines()
+    n_rows = round(share * (len(lines) - 1))
+    with open(destination, mode="w", encoding="utf-8") as file:
+        file.writelines(lines[: 1 + n_rows])
+
+
+def _append_line(path: Path, line: str) -> None:
+    with open(path, mode="a", encoding="utf-8") as file:
+        file.write(line)
+
+
+def _rebuild(paths: dict, path: Path) -> pd.DataFrame:
+    """Merged dataset computed from the whole source files."""
+    df_weather = get_weather(
+        force_recompute=True,
+        path=paths["weather"],
+        path_zones_and_stations=paths["zones_and_stations"],
+        path_preprocessed=path / "preprocessed_weather",
+    )
+    df_merged = get_merged_dataset(
+        df_weather=df_weather,
+        df_load_actual=get_load_actual(path=paths[LOAD_ACTUAL]),
+        df_load_forecast=get_load_forecast(path=paths[cst.LOAD_FORECAST]),
+    )
+    return df_merged.sort_values(by=[cst.DELIVERY_TS, cst.ZONE], kind="stable")
+
+
+def _get_paths(full_paths: dict, path: Path) -> dict:
+    return {
+        **{name: path / Path(full_paths[name]).name for name in SOURCES},
+        "zones_and_stations": full_paths["zones_and_stations"],
+    }
+
+
+@pytest.mark.parametrize(
+    "shares",
+    [
+        # Shares of the rows of load_actual, load_forecast and weather, per update
+        [(1.0, 1.0, 1.0)],
+        [(0.5, 0.5, 0.5), (1.0, 1.0, 1.0)],
+        [(0.2, 0.6, 0.37), (0.7, 0.61, 0.9), (0.7, 0.95, 0.9), (1.0, 1.0, 1.0)],
+    ],
+)
+def test_updates_equal_a_rebuild(tmp_path, full_paths, shares):
+    paths = _get_paths(full_paths=full_paths, path=tmp_path)
+    for update_shares in shares:
+        for name, share in zip(SOURCES, update_shares):
+            _write_rows(source=full_paths[name], destination=paths[name], share=share)
+        df = update_merged_dataset(paths=paths, path=tmp_path / "incremental")
+        pd.testing.assert_frame_equal(df, _rebuild(paths=paths, path=tmp_path))
+    assert len(df) == len(_rebuild(paths=full_paths, path=tmp_path))
+
+
+def test_corrected_forecast_replaces_the_stored_one(tmp_path, full_paths):
+    paths = _get_paths(full_paths=full_paths, path=tmp_path)
+    for name in SOURCES:
+        _write_rows(source=full_paths[name], destination=paths[name], share=1.0)
+    df = update_merged_dataset(paths=paths, path=tmp_path / "incremental")
+
+    # Forecasts re-sent for a stored date, with an older vintage than the latest
+    # stored one
+    date = df.index[len(df) // 2]
+    with open(paths["weather"], mode="r", encoding="utf-8") as file:
+        lines = file.readlines()
+    utc_date = date.tz_convert("UTC").strftime("%Y-%m-%d %H:%M:%S+00:00")
+    weather_line = next(line for line in lines if f",{utc_date}," in line)
+    station, _, vintage, tmp, *others = weather_line.split(",")
+    _append_line(
+        path=paths["weather"],
+        line=",".join([station, utc_date, vintage, str(float(tmp) + 30.0), *others]),
+    )
+    _append_line(
+        path=paths[cst.LOAD_FORECAST],
+        line=f"{date.strftime('%Y-%m-%d %H:%M:%S')},capitl,12345.0,"
+        f"{(date - pd.Timedelta(days=2)).strftime('%Y-%m-%d')}\n",
+    )
+    updated = update_merged_dataset(paths=paths, path=tmp_path / "incremental")
+    pd.testing.assert_frame_equal(updated, _rebuild(paths=paths, path=tmp_path))
+
+    row = (updated.index == date) & (updated[cst.ZONE] == "CAPITL")
+    assert row.sum() == 1
+    assert (updated.loc[row, cst.LOAD_FORECAST] == 12345.0).all()
+    assert (updated.loc[row, cst.TMP] != df.loc[row, cst.TMP]).all()
+    unchanged = updated.index != date
+    pd.testing.assert_frame_equal(updated[unchanged], df[unchanged])
+
+
+def test_rewritten_file_is_rebuilt(tmp_path, full_paths):
+    paths = _get_paths(full_paths=full_paths, path=tmp_path)
+    for name in SOURCES:
+        _write_rows(source=full_paths[name], destination=paths[name], share=1.0)
+    df = update_merged_dataset(paths=paths, path=tmp_path / "incremental")
+
+    # One processed value changed
+    with open(paths[LOAD_ACTUAL], mode="r", encoding="utf-8") as file:
+        lines = file.readlines()
+    date, zone, _ = lines[1].split(",")
+    lines[1] = f"{date},{zone},1.0\n"
+    with open(paths[LOAD_ACTUAL], mode="w", encoding="utf-8") as file:
+        file.writelines(lines)
+
+    updated = update_merged_dataset(paths=paths, path=tmp_path / "incremental")
+    pd.testing.assert_frame_equal(updated, _rebuild(paths=paths, path=tmp_path))
+    assert not updated[cst.LOAD].equals(df[cst.LOAD])
@@ -0,0 +1,63 @@
+"""Keys of the pipeline nodes."""
+
+import json
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+from ens_load_forecast import pipeline
+
+PATH_REPO = Path(__file__).resolve().parents[1]
+PRINT_KEYS = (
+    "import json; from ens_load_forecast import pipeline; "
+    "print(json.dumps(pipeline.get_node_keys(pipeline.get_node_params())))"
+)
+
+
+def _get_keys(path_repo: Path) -> dict:
+    """Node keys computed with the package of a folder."""
+    stdout = subprocess.run(
+        [sys.executable, "-c", PRINT_KEYS],
+        cwd=path_repo,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(stdout)
+
+
+def test_node_modules_include_imported_modules():
+    modules = {
+        name: pipeline.get_module_dependencies(module=node.get_module())
+        for name, node in pipeline.NODES.items()
+    }
+    assert "ens_load_forecast.streaming_regression" in modules[pipeline.TRAIN]
+    assert "ens_load_forecast.streaming_regression" in modules[pipeline.SCORE]
+    assert "ens_load_forecast.pipeline" in modules[pipeline.WEATHER]
+    assert "ens_load_forecast.cache" in modules[pipeline.WEATHER]
+    assert "ens_load_forecast.models" not in modules[pipeline.FEATURES]
+
+
+def test_editing_a_dependency_changes_the_key(tmp_path):
+    shutil.copytree(
+        PATH_REPO / "ens_load_forecast",
+        tmp_path / "ens_load_forecast",
+        ignore=shutil.ignore_patterns("data", "__pycache__"),
+    )
+    keys = _get_keys(path_repo=tmp_path)
+
+    with open(tmp_path / "ens_load_forecast" / "streaming_regression.py", "a") as file:
+        file.write("\n# Edited\n")
+    edited_keys = _get_keys(path_repo=tmp_path)
+    for name in [pipeline.TRAIN, pipeline.SCORE]:
+        assert edited_keys[name] != keys[name]
+    for name in [pipeline.MERGED, pipeline.FEATURES, pipeline.AGGREGATES]:
+        assert edited_keys[name] == keys[name]
+
+    with open(tmp_path / "ens_load_forecast" / "cache.py", "a") as file:
+        file.write("\n# Edited\n")
+    edited_cache_keys = _get_keys(path_repo=tmp_path)
+    assert edited_cache_keys[pipeline.WEATHER] != edited_keys[pipeline.WEATHER]
+    # Downstream nodes change with the keys of their upstream nodes
+    assert edited_cache_keys[pipeline.FEATURES] != edited_keys[pipeline.FEATURES]
@@ -0,0 +1,103 @@
+"""Equivalence of `StreamingLinearRegression` with scikit-learn pipelines."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import PolynomialFeatures
+
+import ens_load_forecast.constants as cst
+from ens_load_forecast.models import initialize_models
+from ens_load_forecast.streaming_regression import StreamingLinearRegression
+
+
+def _get_data(n_groups: int, n_rows: int = 3000, seed: int = 0):
+    """Continuous features and groups of one-hots, collinear with the intercept."""
+    rng = np.random.default_rng(seed)
+    continuous = rng.normal(size=(n_rows, 4)) * [1.0, 10.0, 5.0, 0.5]
+    continuous += [0.0, 20.0, -3.0, 1.0]
+    y = (
+        continuous @ [1.0, -2.0, 0.5, 3.0]
+        + 0.3 * continuous[:, 0] * continuous[:, 1]
+        + rng.normal(size=n_rows)
+    )
+    columns = [continuous]
+    for n_categories in [3, 2][:n_groups]:
+        one_hots = np.eye(n_categories)[rng.integers(0, n_categories, size=n_rows)]
+        y += one_hots @ np.arange(n_categories)
+        columns.append(one_hots)
+    return np.hstack(columns), y
+
+
+def _expand(X: np.ndarray, degree: int) -> np.ndarray:  # noqa: N803
+    if degree == 1:
+        return X
+    return PolynomialFeatures(degree=degree, include_bias=False).fit_transform(X)
+
+
+@pytest.mark.parametrize("degree,n_groups", [(1, 1), (1, 2), (2, 1)])
+def test_same_fit_as_linear_regression(degree, n_groups):
+    X, y = _get_data(n_groups=n_groups)  # noqa: N806
+    reference = LinearRegression().fit(_expand(X=X, degree=degree), y)
+    model = StreamingLinearRegression(degree=degree).fit(X, y)
+
+    np.testing.assert_allclose(model.coef_, reference.coef_, rtol=0, atol=1e-9)
+    np.testing.assert_allclose(model.intercept_, reference.intercept_, rtol=1e-10)
+    np.testing.assert_allclose(
+        model.predict(X), reference.predict(_expand(X=X, degree=degree)), rtol=1e-10
+    )
+
+
+def test_least_squares_fit_of_rank_deficient_polynomial():
+    # Products of two groups of one-hots leave 23 of the 55 polynomial features
+    # collinear, where `LinearRegression` does not reach the least squares fit
+    X, y = _get_data(n_groups=2)  # noqa: N806
+    expanded = _expand(X=X, degree=2)
+    design = np.hstack([expanded, np.ones((len(y), 1))])
+    solution, _, _, _ = np.linalg.lstsq(design, y, rcond=None)
+    model = StreamingLinearRegression(degree=2).fit(X, y)
+
+    np.testing.assert_allclose(model.predict(X), design @ solution, rtol=1e-9)
+    reference = LinearRegression().fit(expanded, y)
+    assert np.sum((model.predict(X) - y) ** 2) <= np.sum(
+        (reference.predict(expanded) - y) ** 2
+    )
+
+
+@pytest.mark.parametrize("degree", [1, 2])
+def test_chunks_and_merge_give_the_same_fit(degree):
+    X, y = _get_data(n_groups=2)  # noqa: N806
+    model = StreamingLinearRegression(degree=degree).fit(X, y)
+
+    chunked = StreamingLinearRegression(degree=degree)
+    for start in range(0, len(y), 700):
+        chunked.partial_fit(X[start : start + 700], y[start : start + 700])
+    chunked.solve()
+
+    # Statistics of two workers, on interleaved rows
+    merged = StreamingLinearRegression(degree=degree).partial_fit(X[::2], y[::2])
+    merged.merge(
+        StreamingLinearRegression(degree=degree).partial_fit(X[1::2], y[1::2])
+    ).solve()
+
+    for other in [chunked, merged]:
+        np.testing.assert_allclose(other.coef_, model.coef_, rtol=0, atol=1e-9)
+        np.testing.assert_allclose(other.intercept_, model.intercept_, rtol=1e-10)
+        np.testing.assert_allclose(other.predict(X), model.predict(X), rtol=1e-10)
+
+
+def test_streaming_models_are_opt_in():
+    X, y = _get_data(n_groups=1)  # noqa: N806
+    X = pd.DataFrame(X)  # noqa: N806
+    models = initialize_models()
+    streaming_models = initialize_models(streaming_linear=True)
+    for model_name in [cst.LINEAR_MODEL, cst.POLYNOMIAL_MODEL]:
+        assert isinstance(models[model_name].steps[-1][1], LinearRegression)
+        assert isinstance(
+            streaming_models[model_name].steps[-1][1], StreamingLinearRegression
+        )
+        np.testing.assert_allclose(
+            streaming_models[model_name].fit(X, y).predict(X),
+            models[model_name].fit(X, y).predict(X),
+            rtol=1e-10,
+        )
@@ -0,0 +1,108 @@
+"""Streamed correlations and samples, against single passes over all rows."""
+
+import numpy as np
+import pandas as pd
+
+import ens_load_forecast.constants as cst
+from ens_load_forecast.streaming_statistics import (
+    ZoneMoments,
+    ZoneReservoir,
+    iter_frame_chunks,
+)
+
+COLUMNS = ["a", "b", "c"]
+ZONE_SIZES = {"CAPITL": 3000, "N.Y.C.": 2000, "WEST": 40}
+
+
+def _get_data(seed: int = 0) -> pd.DataFrame:
+    """Correlated columns, shifted and scaled per zone, with missing values."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for offset, (zone, size) in enumerate(ZONE_SIZES.items()):
+        a = rng.normal(size=size)
+        values = {
+            "a": 100.0 * offset + a,
+            "b": 10.0 * offset + (offset + 1) * a + rng.normal(size=size),
+            "c": rng.normal(size=size) * 1e3,
+        }
+        frames.append(pd.DataFrame({cst.ZONE: zone, **values}))
+    # Zones interleaved, as rows of a features DataFrame
+    df = pd.concat(frames).sample(frac=1.0, random_state=seed)
+    df.index = pd.date_range(start="2020-01-01", periods=len(df), freq="h")
+    df.iloc[rng.choice(len(df), size=50, replace=False), 2] = np.nan
+    return df
+
+
+def test_correlations_match_dataframe_corr():
+    df = _get_data()
+    correlations = ZoneMoments(columns=COLUMNS).partial_fit(df=df).get_correlations()
+    assert list(correlations.index.unique(level=cst.ZONE)) == [
+        *sorted(ZONE_SIZES),
+        cst.GLOBAL,
+    ]
+    # Rows with a missing value are ignored for every column
+    df_valid = df.dropna()
+    for zone, df_zone in [*df_valid.groupby(by=cst.ZONE), (cst.GLOBAL, df_valid)]:
+        pd.testing.assert_frame_equal(
+            correlations.loc[zone], df_zone[COLUMNS].corr(), rtol=1e-10
+        )
+
+
+def test_chunks_and_merge_give_the_same_correlations():
+    df = _get_data()
+    single_pass = ZoneMoments(columns=COLUMNS).partial_fit(df=df).get_correlations()
+
+    chunked = ZoneMoments(columns=COLUMNS)
+    for chunk in iter_frame_chunks(df=df, chunksize=333):
+        chunked.partial_fit(df=chunk)
+    # Statistics of two workers, on interleaved rows
+    merged = ZoneMoments(columns=COLUMNS).partial_fit(df=df.iloc[::2])
+    merged.merge(ZoneMoments(columns=COLUMNS).partial_fit(df=df.iloc[1::2]))
+
+    for other in [chunked, merged]:
+        pd.testing.assert_frame_equal(other.get_correlations(), single_pass, rtol=1e-10)
+        for zone, n_samples in other.n_samples_.items():
+            assert n_samples == len(df[df[cst.ZONE] == zone].dropna())
+
+
+def test_reservoir_keeps_at_most_size_rows_per_zone():
+    df = _get_data()
+    sample = ZoneReservoir(size=100, columns=["a"]).partial_fit(df=df).get_sample()
+    sizes = sample[cst.ZONE].value_counts()
+    assert sizes["CAPITL"] == 100
+    assert sizes["N.Y.C."] == 100
+    # Zones with fewer rows are kept whole
+    assert sizes["WEST"] == ZONE_SIZES["WEST"]
+    assert set(sample.index) <= set(df.index)
+    pd.testing.assert_frame_equal(sample, df.loc[sample.index, [cst.ZONE, "a"]])
+
+
+def test_chunks_and_merge_give_the_same_sample():
+    df = _get_data()
+    single_pass = ZoneReservoir(size=100, columns=["a"]).partial_fit(df=df)
+
+    # Keys are drawn in the order of the rows, whatever the chunks
+    chunked = ZoneReservoir(size=100, columns=["a"])
+    for chunk in iter_frame_chunks(df=df, chunksize=333):
+        chunked.partial_fit(df=chunk)
+    pd.testing.assert_frame_equal(chunked.get_sample(), single_pass.get_sample())
+
+    # Two workers with their own seeds keep the rows of smallest keys of both
+    half = len(df) // 2
+    merged = ZoneReservoir(size=100, columns=["a"], random_state=1)
+    merged.partial_fit(df=df.iloc[:half])
+    merged.merge(
+        ZoneReservoir(size=100, columns=["a"], random_state=2).partial_fit(
+            df=df.iloc[half:]
+        )
+    )
+    keys = np.concatenate(
+        [
+            np.random.default_rng(1).random(half),
+            np.random.default_rng(2).random(len(df) - half),
+        ]
+    )
+    expected = (
+        df.assign(key=keys).sort_values(by="key").groupby(by=cst.ZONE).head(100).index
+    )
+    assert set(merged.get_sample().index) == set(expected)